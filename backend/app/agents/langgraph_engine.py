@@ -12,13 +12,10 @@ from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from app.mcp import mcp_server
 from app.agents.core import llm_client, AgentModels, format_as_bullets
-from app.database.memory_repository import MemoryRepository
+from app.database.memory_repository import memory_repository
 from app.core.logger import logger
 from app.utils.scrip_utils import get_instrument_token
 
-# Initialize memory repository
-memory_repository = MemoryRepository()
-
 
 # ==========================
 # State Schema
@@ -53,6 +50,14 @@ class AgentState(TypedDict):
     visited_intents: List[str]
 
 
+def _history_messages(state: AgentState, turns: int) -> List[Dict[str, str]]:
+    """The session summary of compacted turns (if any) plus the last `turns` messages."""
+    history = state.get("chat_history") or []
+    summary = history[:1] if history and history[0].get("agent_name") == "MemorySummary" else []
+    recent = history[len(summary):][-turns:] if turns > 0 else []
+    return [{"role": msg["role"], "content": msg["content"]} for msg in summary + recent]
+
+
 # ==========================
 # Node Implementations
 # ==========================
@@ -136,10 +141,8 @@ async def intent_classifier_node(state: AgentState) -> AgentState:
         {"role": "system", "content": system_prompt},
     ]
     
-    # 2. Add Chat History (limited to last 4 for context)
-    if state.get("chat_history"):
-        for msg in state["chat_history"][-4:]:
-            messages.append({"role": msg["role"], "content": msg["content"]})
+    # 2. Add Chat History (summary + last 4 for context)
+    messages.extend(_history_messages(state, 4))
     
     # 3. Add current query
     messages.append({"role": "user", "content": state["user_query"]})
@@ -407,9 +410,7 @@ async def market_explainer_node(state: AgentState) -> AgentState:
             ]
             
             # Add context from history
-            if state.get("chat_history"):
-                for msg in state["chat_history"][-2:]:
-                    messages.append({"role": msg["role"], "content": msg["content"]})
+            messages.extend(_history_messages(state, 2))
             
             messages.append({"role": "user", "content": f"Query: {state['user_query']}\n\nData: {context}"})
             
@@ -522,8 +523,10 @@ async def data_interpreter_node(state: AgentState) -> AgentState:
             elif "executed" in query_lower or "completed" in query_lower: status = "COMPLETE"
             elif "open" in query_lower: status = "PENDING"
                 
-            res = await mcp_server.call_tool("getOrders", {"status": status} if status else None)
-            state["mcp_tool_calls"].append({"tool": "getOrders", "args": {"status": status}, "result": res})
+            # One page of recent orders is enough context
+            args = {"status": status, "limit": 20} if status else {"limit": 20}
+            res = await mcp_server.call_tool("getOrders", args)
+            state["mcp_tool_calls"].append({"tool": "getOrders", "args": args, "result": res})
             
             if res.get("success"):
                 orders = res.get("data", [])
@@ -546,6 +549,24 @@ async def data_interpreter_node(state: AgentState) -> AgentState:
                 ])
                 tool_context += f"\nOpen Positions:\n{pos_summary if pos_summary else 'No open positions.'}\n"
 
+        # 3b. Check for Risk Intent
+        if any(k in query_lower for k in ["risk", "value at risk", "beta", "drawdown", "exposure", "concentration"]):
+            res = await mcp_server.call_tool("getPortfolioRisk", {})
+            state["mcp_tool_calls"].append({"tool": "getPortfolioRisk", "args": {}, "result": res})
+            
+            if res.get("success"):
+                r = res.get("data", {})
+                top = ", ".join(f"{p.get('symbol')} {p.get('weight')}" for p in r.get("top_positions", []))
+                tool_context += (
+                    f"\nPortfolio Risk (1-day, {r.get('lookback_days')} days of history):\n"
+                    f"- Exposure: gross {r.get('gross_exposure')}, net {r.get('net_exposure')}\n"
+                    f"- Beta vs {r.get('benchmark')}: {r.get('beta')} (beta exposure {r.get('beta_exposure')})\n"
+                    f"- VaR 95%: {r.get('var_95')}, VaR 99%: {r.get('var_99')}, ES 95%: {r.get('expected_shortfall_95')}\n"
+                    f"- Max drawdown: {r.get('max_drawdown')} ({r.get('max_drawdown_pct')}%)\n"
+                    f"- Concentration: HHI {r.get('hhi')}, top weights {top or 'n/a'}\n"
+                    f"- Not covered by history: {', '.join(r.get('uncovered', [])) or 'none'}\n"
+                )
+
         # 4. Check for WebSocket Status Intent
         if any(k in query_lower for k in ["feed", "websocket", "connected", "working", "status", "connection"]):
             res = await mcp_server.call_tool("getWebSocketStatus", {})
@@ -0,0 +1,107 @@
+"""
+Background compactor for agent memory.
+
+Keeps agent_memory bounded: every AGENT_MEMORY_COMPACT_INTERVAL_S, each
+session's turns beyond its AGENT_MEMORY_KEEP_TURNS most recent ones are
+moved to agent_memory_archive and folded into the session's summary row
+(agent_memory_summary). Archived turns are deleted after
+AGENT_MEMORY_ARCHIVE_DAYS.
+
+The summary is extractive (no LLM call): one line per archived user
+question, capped at AGENT_MEMORY_SUMMARY_CHARS with the oldest lines
+dropped first.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+from app.core.logger import logger
+from app.database.memory_repository import memory_repository
+
+settings = get_settings()
+
+SUMMARY_HEADER = "Earlier in this session the user asked about:"
+LINE_CHARS = 160
+
+
+def summarize_turns(previous: Optional[str], turns: List[Dict], max_chars: int) -> str:
+    """Fold archived turns into a session summary."""
+    lines = []
+    if previous:
+        lines = [line for line in previous.splitlines()[1:] if line.strip()]
+    for turn in turns:
+        if turn.get("role") != "user":
+            continue
+        text = " ".join(str(turn.get("content") or "").split())
+        if text:
+            lines.append(f"- {text[:LINE_CHARS - 3] + '...' if len(text) > LINE_CHARS else text}")
+
+    # Drop the oldest lines until the summary fits
+    size = len(SUMMARY_HEADER) + sum(len(line) + 1 for line in lines)
+    while lines and size > max_chars:
+        size -= len(lines.pop(0)) + 1
+    return "\n".join([SUMMARY_HEADER, *lines])
+
+
+class MemoryCompactor:
+    """Periodically archives and summarizes old agent memory turns."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("🧹 Agent memory compactor started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.compact()
+            except Exception as e:
+                logger.error(f"Agent memory compaction failed: {e}")
+            await asyncio.sleep(settings.AGENT_MEMORY_COMPACT_INTERVAL_S)
+
+    async def compact_session(self, session_id: str, keep: int) -> int:
+        """Archive one session's turns beyond `keep`; returns the number archived."""
+        turns = await memory_repository.get_turns_to_archive(session_id, keep)
+        if not turns:
+            return 0
+        previous = await memory_repository.get_session_summary(session_id)
+        summary = summarize_turns(
+            previous["summary"] if previous else None, turns, settings.AGENT_MEMORY_SUMMARY_CHARS
+        )
+        await memory_repository.archive_turns(session_id, turns[-1]["id"], len(turns), summary)
+        return len(turns)
+
+    async def compact(self) -> dict:
+        """One compaction pass over all sessions."""
+        keep = settings.AGENT_MEMORY_KEEP_TURNS
+        archived = 0
+        sessions = await memory_repository.get_sessions_over(keep)
+        for session_id in sessions:
+            archived += await self.compact_session(session_id, keep)
+
+        purged = 0
+        if settings.AGENT_MEMORY_ARCHIVE_DAYS > 0:
+            purged = await memory_repository.purge_archive(
+                int(time.time()) - settings.AGENT_MEMORY_ARCHIVE_DAYS * 86400
+            )
+
+        if archived or purged:
+            logger.info(
+                f"🧹 Agent memory: archived {archived} turns from {len(sessions)} sessions, "
+                f"purged {purged} archived turns"
+            )
+        return {"sessions": len(sessions), "archived": archived, "purged": purged}
+
+
+memory_compactor = MemoryCompactor()
@@ -6,6 +6,10 @@ from app.agents.langgraph_engine import agent_graph
 from app.database.memory_repository import memory_repository
 from app.core.logger import logger
 from app.agents.core import format_as_bullets
+from app.core.rate_limiter import Priority, request_priority
+from app.config import get_settings
+
+settings = get_settings()
 
 router = APIRouter(prefix="/agent", tags=["Agentic AI"])
 
@@ -28,7 +32,7 @@ async def agent_chat(request: ChatRequest):
         await memory_repository.add_message(session_id, "user", request.query, "User")
         
         # 2. Get Chat History for Context
-        history = await memory_repository.get_session_history(session_id, limit=6)
+        history = await memory_repository.get_session_history(session_id, limit=6, include_summary=True, fresh=True)
         
         # 3. Build Initial State for LangGraph
         initial_state = {
@@ -50,7 +54,9 @@ async def agent_chat(request: ChatRequest):
         # 4. Invoke LangGraph
         logger.info(f"[Router] Invoking LangGraph for session: {session_id}")
         
-        final_state = await agent_graph.ainvoke(initial_state)
+        # Agent tool calls queue behind orders, quotes and dashboard reads
+        with request_priority(Priority.AGENT):
+            final_state = await agent_graph.ainvoke(initial_state)
         
         # 5. Extract Response
         agent_response = final_state.get("agent_response", "No response generated")
@@ -85,6 +91,29 @@ async def agent_chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/memory/cache/stats")
+async def get_memory_cache_stats():
+    """Chat history cache counters (hit rate, evictions) for sizing AGENT_MEMORY_CACHE_* settings."""
+    return {"stat": "Ok", "data": memory_repository.history_cache.stats()}
+
+
+@router.get("/memory/{session_id}")
+async def get_session_memory(session_id: str, limit: int = 50, cursor: Optional[str] = None):
+    """
+    A session's chat messages, newest first, one page at a time
+    (pass "next_cursor" back as cursor for older messages). Turns compacted
+    out of the live history are covered by "summary".
+    """
+    try:
+        messages, next_cursor = await memory_repository.get_session_page(
+            session_id, limit=max(1, min(limit, settings.HISTORY_PAGE_MAX)), cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    summary = await memory_repository.get_session_summary(session_id) if not cursor else None
+    return {"session_id": session_id, "data": messages, "next_cursor": next_cursor, "summary": summary}
+
+
 @router.get("/health")
 async def health_check():
     """Check agent system health."""
@@ -16,6 +16,86 @@ class Settings(BaseSettings):
     # URLs
     KOTAK_TRADE_API_URL: str = "https://mis.kotaksecurities.com"
 
+    # Scrip master lookups (thread pool for cache misses)
+    SCRIP_LOOKUP_WORKERS: int = 4
+    SCRIP_CACHE_SYMBOL_SIZE: int = 10000
+    SCRIP_CACHE_TOKEN_SIZE: int = 10000
+    SCRIP_CACHE_SEARCH_SIZE: int = 1000
+    SCRIP_CACHE_NEGATIVE_TTL: float = 30.0  # seconds a "not found" result is trusted
+
+    # Broker HTTP gateway (pooled keep-alive clients per origin)
+    BROKER_HTTP2: bool = True  # used only when the optional h2 package is installed
+    BROKER_MAX_CONNECTIONS: int = 20
+    BROKER_MAX_KEEPALIVE: int = 10
+    BROKER_KEEPALIVE_EXPIRY: float = 60.0
+
+    # Client-side broker rate limits (requests/second; bursts up to one second's worth)
+    BROKER_RATE_LIMIT_ENABLED: bool = True
+    BROKER_RATE_LIMIT_PER_SEC: float = 20.0  # shared by all REST calls
+    BROKER_RATE_LIMIT_BURST: int = 20
+    RATE_LIMIT_ORDER_PER_SEC: float = 10.0  # place / modify / cancel
+    RATE_LIMIT_QUOTE_PER_SEC: float = 10.0
+    RATE_LIMIT_READ_PER_SEC: float = 10.0  # order book, positions, holdings, limits
+
+    # Order book cache (concurrent readers share one fetch; writes invalidate)
+    ORDER_BOOK_CACHE_TTL: float = 1.0  # seconds
+    ORDER_TRACK_TIMEOUT: float = 120.0  # seconds a placed order is followed for status updates
+    ORDER_TRACK_RETENTION: float = 600.0  # seconds a settled order's tracker state stays queryable
+    ORDER_STATE_MAX_AGE: float = 3.0  # seconds the order state store is served without a broker sync
+    ORDER_STATE_HISTORY_DAYS: int = 30  # history loaded from order_history into the store
+
+    # orders.db connections (WAL: one writer, a pool of read-only readers)
+    DB_READ_POOL_SIZE: int = 4
+    DB_CACHE_SIZE_KB: int = 16384  # page cache per connection
+    DB_MMAP_SIZE: int = 268435456  # bytes of the file memory-mapped per connection
+
+    # orders.db write-behind queue (group commit)
+    DB_WRITE_BATCH_MS: float = 5.0  # how long a flush waits for more writes to join
+    DB_WRITE_BATCH_MAX: int = 200  # writes per transaction
+
+    # Agent memory retention (background compactor)
+    AGENT_MEMORY_KEEP_TURNS: int = 50  # most recent turns kept per session in agent_memory
+    AGENT_MEMORY_COMPACT_INTERVAL_S: float = 600.0
+    AGENT_MEMORY_ARCHIVE_DAYS: int = 30  # archived turns are deleted after this (0 = keep forever)
+    AGENT_MEMORY_SUMMARY_CHARS: int = 2000  # size cap of a session summary
+
+    # Agent chat history cache (recent turns of active sessions, in memory)
+    AGENT_MEMORY_CACHE_SESSIONS: int = 1000
+    AGENT_MEMORY_CACHE_TURNS: int = 20  # turns kept per cached session
+    AGENT_MEMORY_CACHE_IDLE_S: float = 1800.0  # sessions idle this long are dropped
+
+    # Portfolio reads (stale-while-revalidate cache of positions / holdings / limits)
+    PORTFOLIO_CACHE_TTL: float = 2.0  # seconds a response is served without a refresh
+    PORTFOLIO_CACHE_MAX_STALE: float = 30.0  # older than TTL but within this: served while refreshing
+
+    # Live portfolio (positions / holdings valued on HSM ticks)
+    PORTFOLIO_PUSH_INTERVAL_S: float = 0.5  # websocket portfolio_update coalescing window
+    PORTFOLIO_RESYNC_S: float = 300.0  # full broker reload interval (also after our own orders)
+    PORTFOLIO_RETRY_S: float = 5.0  # retry interval after a failed or partial reload
+    PORTFOLIO_SNAPSHOT_DEADLINE_S: float = 5.0  # per-section deadline of /portfolio/snapshot
+
+    # Portfolio risk analytics (historical VaR, beta, drawdown over daily candles)
+    RISK_LOOKBACK_DAYS: int = 250  # daily returns behind VaR, beta and drawdown
+    RISK_BENCHMARK: str = "NIFTY 50"  # beta reference (daily_candles symbol)
+
+    # Keyset-paginated history endpoints (order history, agent memory)
+    HISTORY_PAGE_MAX: int = 200  # largest page returned
+
+    # Trade fills (local copy of the trade book)
+    FILLS_SYNC_MAX_AGE: float = 5.0  # seconds the local trade book is served without a broker sync
+    FILLS_PAGE_MAX: int = 500  # largest page /orders/trade-book returns
+
+    # Pre-trade validation
+    ORDER_VALIDATE_MARKET_HOURS: bool = True  # warn about non-AMO orders outside market hours (and AMO inside)
+
+    # Order-path latency histograms (GET /orders/latency)
+    LATENCY_WINDOW_S: float = 900.0  # rolling window for percentiles
+    LATENCY_MAX_SAMPLES: int = 2000  # per operation/stage
+
+    # Basket orders
+    BASKET_MAX_CONCURRENCY: int = 5  # legs in flight to the OMS at once
+    BASKET_RATE_PER_SEC: float = 10.0  # leg submissions per second (0 = unlimited)
+
     # Agentic AI
     GROQ_API_KEY: str | None = None  # FREE Groq API
     OPENROUTER_API_KEY: str | None = None  # Fallback (requires credits)
@@ -0,0 +1,140 @@
+"""
+Shared HTTP gateway for Kotak REST calls.
+
+Every service used to open a throwaway httpx.AsyncClient per request,
+paying a fresh TCP + TLS handshake to the same host each time. The gateway
+keeps one pooled keep-alive client per origin (HTTP/2 when the optional
+`h2` package is installed), applies per-endpoint timeouts and injects the
+session / access-token headers in one place. Calls are paced by the
+priority-aware rate limiter (app/core/rate_limiter.py) before they are sent.
+"""
+
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import get_settings
+from app.core.logger import logger
+from app.core.rate_limiter import rate_limiter
+from app.utils import cache
+
+settings = get_settings()
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Auth modes
+SESSION = "session"  # Auth + sid from the trade session (orders, portfolio)
+ACCESS = "access"    # Authorization: access token (quotes, scrip master)
+NONE = None          # No broker auth (e.g. pre-signed CSV downloads)
+
+
+class BrokerGateway:
+    # Endpoint class -> (connect, read) timeout in seconds
+    TIMEOUTS = {
+        "order": (5.0, 15.0),      # place / modify / cancel
+        "book": (5.0, 15.0),       # order book / trade book
+        "portfolio": (5.0, 20.0),  # positions / holdings / limits
+        "quote": (5.0, 10.0),
+        "default": (5.0, 30.0),
+        "download": (10.0, 120.0), # scrip master CSVs
+    }
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.http2 = settings.BROKER_HTTP2 and HTTP2_AVAILABLE
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parsed = httpx.URL(url)
+        return f"{parsed.scheme}://{parsed.host}:{parsed.port or ''}"
+
+    def _client(self, url: str) -> httpx.AsyncClient:
+        """Pooled client for the URL's origin (created on first use)."""
+        origin = self._origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=settings.BROKER_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.BROKER_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.BROKER_KEEPALIVE_EXPIRY,
+                ),
+                timeout=self._timeout("default"),
+            )
+            self._clients[origin] = client
+            logger.info(f"🔌 Broker gateway: new pooled client for {origin} (http2={self.http2})")
+        return client
+
+    def _timeout(self, endpoint: str) -> httpx.Timeout:
+        connect, read = self.TIMEOUTS.get(endpoint, self.TIMEOUTS["default"])
+        return httpx.Timeout(read, connect=connect)
+
+    @staticmethod
+    def _auth_headers(auth: Optional[str]) -> dict:
+        if auth == SESSION:
+            trade_token, trade_sid, _, _ = cache.get_trade_session()
+            return {"Auth": trade_token or "", "sid": trade_sid or "", "neo-fin-key": "neotradeapi"}
+        if auth == ACCESS:
+            return {"Authorization": settings.KOTAK_ACCESS_TOKEN or ""}
+        return {}
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        endpoint: str = "default",
+        auth: Optional[str] = SESSION,
+        headers: Optional[dict] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request over the pooled client for the URL's origin.
+
+        Args:
+            endpoint: Timeout and rate-limit class (see TIMEOUTS)
+            auth: SESSION, ACCESS or None
+            headers: Extra headers (override the auth headers)
+
+        Returns:
+            The httpx response; callers decide on raise_for_status()
+        """
+        waited = await rate_limiter.acquire(endpoint)
+        if waited > 0.5:
+            logger.warning(f"⏳ Broker rate limit: {method} {endpoint} call queued {waited * 1000:.0f}ms")
+        
+        merged = self._auth_headers(auth)
+        if headers:
+            merged.update(headers)
+        return await self._client(url).request(
+            method, url, headers=merged, timeout=self._timeout(endpoint), **kwargs
+        )
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stream(self, method: str, url: str, *, endpoint: str = "download",
+               auth: Optional[str] = NONE, headers: Optional[dict] = None, **kwargs):
+        """Streaming request context manager over the pooled client."""
+        merged = self._auth_headers(auth)
+        if headers:
+            merged.update(headers)
+        return self._client(url).stream(
+            method, url, headers=merged, timeout=self._timeout(endpoint), **kwargs
+        )
+
+    async def close(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+broker_gateway = BrokerGateway()
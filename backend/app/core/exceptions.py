@@ -16,3 +16,10 @@ class AuthenticationError(KotakAppException):
 class OrderError(KotakAppException):
     """Raised when order placement/modification fails."""
     pass
+
+class OrderValidationError(OrderError):
+    """Raised when an order fails local pre-trade validation."""
+    def __init__(self, reasons: list):
+        # reasons: [{"code": ..., "field": ..., "message": ...}, ...]
+        self.reasons = reasons
+        super().__init__("Order failed pre-trade validation: " + "; ".join(r["message"] for r in reasons))
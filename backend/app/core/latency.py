@@ -0,0 +1,112 @@
+"""
+Per-stage latency tracing with rolling-window percentiles.
+
+A trace times the stages of one operation (e.g. place_order: scrip
+lookup, validation, payload build, OMS POST). Finished traces feed
+per-(operation, stage) sample windows, from which p50/p95/p99 are
+computed on demand.
+"""
+
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class LatencyTrace:
+    """Stage timings for one operation; stages may repeat (durations add up)."""
+
+    def __init__(self, recorder: "LatencyRecorder", operation: str):
+        self._recorder = recorder
+        self.operation = operation
+        self.stages: Dict[str, float] = {}
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, (time.perf_counter() - started) * 1000)
+
+    def add(self, stage: str, ms: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+
+    def finish(self) -> "LatencyTrace":
+        """Record the trace (once) into the recorder's histograms."""
+        if self._finished is None:
+            self._finished = time.perf_counter()
+            self._recorder.record(self.operation, "total", self.total_ms)
+            for stage, ms in self.stages.items():
+                self._recorder.record(self.operation, stage, ms)
+        return self
+
+    @property
+    def total_ms(self) -> float:
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return (end - self._started) * 1000
+
+    def as_dict(self) -> dict:
+        return {
+            "operation": self.operation,
+            "stages_ms": {stage: round(ms, 3) for stage, ms in self.stages.items()},
+            "total_ms": round(self.total_ms, 3),
+        }
+
+
+class LatencyRecorder:
+    """Rolling window of samples per (operation, stage)."""
+
+    def __init__(self, window_s: float, max_samples: int):
+        self.window_s = window_s
+        self.max_samples = max_samples
+        self._samples: Dict[Tuple[str, str], Deque[Tuple[float, float]]] = {}
+
+    def trace(self, operation: str) -> LatencyTrace:
+        return LatencyTrace(self, operation)
+
+    def record(self, operation: str, stage: str, ms: float):
+        samples = self._samples.get((operation, stage))
+        if samples is None:
+            samples = self._samples[(operation, stage)] = deque(maxlen=self.max_samples)
+        samples.append((time.monotonic(), ms))
+
+    @staticmethod
+    def _percentile(ordered: list, q: float) -> float:
+        # Nearest-rank percentile
+        index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+        return round(ordered[index], 3)
+
+    def summary(self, operation: Optional[str] = None, window_s: Optional[float] = None) -> dict:
+        """
+        Percentiles per operation and stage over the rolling window.
+
+        Returns:
+            {operation: {stage: {count, p50, p95, p99, max}}} in milliseconds
+        """
+        cutoff = time.monotonic() - (window_s or self.window_s)
+        result: Dict[str, Dict[str, dict]] = {}
+        for (op, stage), samples in list(self._samples.items()):
+            if operation and op != operation:
+                continue
+            values = sorted(ms for ts, ms in samples if ts >= cutoff)
+            if not values:
+                continue
+            result.setdefault(op, {})[stage] = {
+                "count": len(values),
+                "p50": self._percentile(values, 50),
+                "p95": self._percentile(values, 95),
+                "p99": self._percentile(values, 99),
+                "max": round(values[-1], 3),
+            }
+        return result
+
+
+latency_recorder = LatencyRecorder(settings.LATENCY_WINDOW_S, settings.LATENCY_MAX_SAMPLES)
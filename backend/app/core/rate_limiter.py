@@ -0,0 +1,194 @@
+"""
+Priority-aware client-side rate limiting for Kotak REST calls.
+
+Each endpoint class has its own token bucket, and every call also draws
+from one shared broker-wide bucket. When callers have to queue, tokens
+go out in priority order: orders before quotes before portfolio reads
+before agent traffic. A burst of dashboard refreshes therefore waits
+behind an order instead of pushing it into a 429.
+
+The priority comes from the endpoint class unless the caller sets one
+for the current task with `request_priority(...)`. The agent chat
+endpoint does this, so agent tool calls rank last.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class Priority(IntEnum):
+    ORDER = 0
+    QUOTE = 1
+    PORTFOLIO = 2
+    AGENT = 3
+
+
+# Default priority per gateway endpoint class
+ENDPOINT_PRIORITY = {
+    "order": Priority.ORDER,
+    "quote": Priority.QUOTE,
+    "book": Priority.PORTFOLIO,
+    "portfolio": Priority.PORTFOLIO,
+    "default": Priority.PORTFOLIO,
+}
+
+_priority: ContextVar[Optional[Priority]] = ContextVar("broker_request_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """Run broker calls made inside the block (and tasks it spawns) at this priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority(endpoint: str) -> Priority:
+    priority = _priority.get()
+    if priority is not None:
+        return priority
+    return ENDPOINT_PRIORITY.get(endpoint, Priority.PORTFOLIO)
+
+
+class PriorityTokenBucket:
+    """Token bucket whose waiters are served highest priority first (FIFO within a class)."""
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._waiters: list = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        # Per-priority wait instrumentation
+        self._stats = {p: {"calls": 0, "queued": 0, "wait_total": 0.0, "wait_max": 0.0} for p in Priority}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: Priority) -> float:
+        """Take one token, waiting if needed. Returns seconds spent waiting."""
+        stats = self._stats[priority]
+        stats["calls"] += 1
+        if self.rate <= 0:
+            return 0.0
+
+        self._refill()
+        # Take a token directly only if nobody is already queued
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), future))
+        stats["queued"] += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before we were cancelled; give it back (never above the burst)
+                self._tokens = min(self.capacity, self._tokens + 1)
+            raise
+
+        waited = time.monotonic() - started
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+        return waited
+
+    async def _dispatch(self):
+        while self._waiters:
+            self._refill()
+            while self._waiters and self._tokens >= 1:
+                _, _, future = heapq.heappop(self._waiters)
+                if future.done():  # waiter was cancelled
+                    continue
+                self._tokens -= 1
+                future.set_result(None)
+            if self._waiters:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            "name": self.name,
+            "rate_per_s": self.rate,
+            "burst": int(self.capacity),
+            "tokens": round(self._tokens, 2),
+            "waiting": len(self._waiters),
+            "by_priority": {
+                p.name.lower(): {
+                    "calls": s["calls"],
+                    "queued": s["queued"],
+                    "avg_wait_ms": round(s["wait_total"] / s["queued"] * 1000, 2) if s["queued"] else 0.0,
+                    "max_wait_ms": round(s["wait_max"] * 1000, 2),
+                }
+                for p, s in self._stats.items()
+            },
+        }
+
+
+class BrokerRateLimiter:
+    """Per-endpoint buckets plus one broker-wide bucket."""
+
+    def __init__(self):
+        self.enabled = settings.BROKER_RATE_LIMIT_ENABLED
+        self.global_bucket = PriorityTokenBucket(
+            "global", settings.BROKER_RATE_LIMIT_PER_SEC, settings.BROKER_RATE_LIMIT_BURST
+        )
+        self.buckets: Dict[str, PriorityTokenBucket] = {
+            name: PriorityTokenBucket(name, rate, burst)
+            for name, (rate, burst) in {
+                "order": (settings.RATE_LIMIT_ORDER_PER_SEC, settings.RATE_LIMIT_ORDER_PER_SEC),
+                "quote": (settings.RATE_LIMIT_QUOTE_PER_SEC, settings.RATE_LIMIT_QUOTE_PER_SEC),
+                "book": (settings.RATE_LIMIT_READ_PER_SEC, settings.RATE_LIMIT_READ_PER_SEC),
+                "portfolio": (settings.RATE_LIMIT_READ_PER_SEC, settings.RATE_LIMIT_READ_PER_SEC),
+                "default": (settings.RATE_LIMIT_READ_PER_SEC, settings.RATE_LIMIT_READ_PER_SEC),
+            }.items()
+        }
+
+    async def acquire(self, endpoint: str) -> float:
+        """
+        Wait for a slot for one broker call on this endpoint class.
+
+        Endpoint classes without a bucket (e.g. CSV downloads) are not limited.
+
+        Returns:
+            Total seconds spent queued
+        """
+        bucket = self.buckets.get(endpoint)
+        if not self.enabled or bucket is None:
+            return 0.0
+        priority = current_priority(endpoint)
+        waited = await bucket.acquire(priority)
+        waited += await self.global_bucket.acquire(priority)
+        return waited
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "global": self.global_bucket.stats(),
+            "endpoints": [bucket.stats() for bucket in self.buckets.values()],
+        }
+
+
+rate_limiter = BrokerRateLimiter()
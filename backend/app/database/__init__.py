@@ -1,14 +1,26 @@
 """
 Database initialization and connection management for order history.
 Uses SQLite for local order storage.
+
+orders.db runs in WAL mode with one writer connection (get_db, used by
+the write-behind queue and migrations) and a pool of read-only
+connections (read_db), so reads never wait behind writes.
 """
 
+import json
 import sqlite3
+import zlib
 import aiosqlite
 import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Any, List, Optional
+from app.config import get_settings
 from app.core.logger import logger
 
+settings = get_settings()
+
 # Database file path
 DB_DIR = Path(__file__).parent.parent.parent / "data"
 DB_DIR.mkdir(exist_ok=True)
@@ -27,14 +39,49 @@ CREATE TABLE IF NOT EXISTS order_history (
     status TEXT,
     exchange TEXT,
     order_datetime TEXT NOT NULL,
-    kotak_response TEXT,
+    order_epoch INTEGER, -- order_datetime as unix seconds (range queries / ordering)
+    kotak_response TEXT, -- legacy; raw broker responses live in order_payloads
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX IF NOT EXISTS idx_order_datetime ON order_history(order_datetime);
-CREATE INDEX IF NOT EXISTS idx_trading_symbol ON order_history(trading_symbol);
-CREATE INDEX IF NOT EXISTS idx_status ON order_history(status);
+
+CREATE TABLE IF NOT EXISTS order_payloads (
+    order_id TEXT PRIMARY KEY,
+    payload BLOB NOT NULL, -- zlib-compressed JSON of the raw broker response
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS trade_fills (
+    fill_id TEXT PRIMARY KEY,
+    order_id TEXT NOT NULL,
+    trading_symbol TEXT NOT NULL,
+    exchange TEXT,
+    product TEXT,
+    transaction_type TEXT, -- 'B' or 'S'
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL,
+    fill_epoch INTEGER NOT NULL, -- unix seconds of the fill
+    kotak_response TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_fills_order_id ON trade_fills(order_id);
+CREATE INDEX IF NOT EXISTS idx_fills_symbol_epoch ON trade_fills(trading_symbol, fill_epoch, fill_id);
+CREATE INDEX IF NOT EXISTS idx_fills_epoch ON trade_fills(fill_epoch, fill_id);
+CREATE INDEX IF NOT EXISTS idx_fills_product_epoch ON trade_fills(product, fill_epoch, fill_id);
+
+-- Daily OHLC candles (risk analytics); day is the session date as YYYYMMDD
+CREATE TABLE IF NOT EXISTS daily_candles (
+    symbol TEXT NOT NULL, -- trading symbol or index name ('NIFTY 50')
+    day INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL NOT NULL,
+    volume INTEGER,
+    PRIMARY KEY (symbol, day)
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS agent_memory (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -45,13 +92,141 @@ CREATE TABLE IF NOT EXISTS agent_memory (
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX IF NOT EXISTS idx_session_id ON agent_memory(session_id);
+CREATE INDEX IF NOT EXISTS idx_session_id_id ON agent_memory(session_id, id);
+DROP INDEX IF EXISTS idx_session_id;
+
+-- Turns moved out of agent_memory by the memory compactor
+CREATE TABLE IF NOT EXISTS agent_memory_archive (
+    id INTEGER PRIMARY KEY, -- id the turn had in agent_memory
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    agent_name TEXT,
+    timestamp TIMESTAMP,
+    archived_at INTEGER NOT NULL -- unix seconds
+);
+
+CREATE INDEX IF NOT EXISTS idx_archive_archived_at ON agent_memory_archive(archived_at);
+
+-- One compact summary of the archived turns per session
+CREATE TABLE IF NOT EXISTS agent_memory_summary (
+    session_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    archived_turns INTEGER NOT NULL DEFAULT 0,
+    last_archived_id INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Indexes on columns added by migrations (created after the columns exist).
+# Every history filter leads an index ending in the (order_epoch, order_id)
+# page key, so filtered keyset pages are index range scans.
+EPOCH_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_order_epoch ON order_history(order_epoch, order_id);
+CREATE INDEX IF NOT EXISTS idx_symbol_epoch_id ON order_history(trading_symbol, order_epoch, order_id);
+CREATE INDEX IF NOT EXISTS idx_status_epoch_id ON order_history(status COLLATE NOCASE, order_epoch, order_id);
+CREATE INDEX IF NOT EXISTS idx_product_epoch_id ON order_history(product, order_epoch, order_id);
+DROP INDEX IF EXISTS idx_order_datetime;
+DROP INDEX IF EXISTS idx_symbol_epoch;
+DROP INDEX IF EXISTS idx_trading_symbol;
+DROP INDEX IF EXISTS idx_status;
 """
 
+# Format of order_history.order_datetime (Kotak ordDtTm), e.g. "08-Jan-2026 14:30:45"
+ORDER_DATETIME_FORMAT = "%d-%b-%Y %H:%M:%S"
+
+
+def order_epoch(order_datetime: Optional[str]) -> Optional[int]:
+    """Convert an order_datetime string to unix seconds (None if unparseable)."""
+    try:
+        return int(datetime.strptime(str(order_datetime), ORDER_DATETIME_FORMAT).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def pack_payload(payload: Any) -> Optional[bytes]:
+    """Compress a raw broker response (dict or JSON string) for order_payloads."""
+    if payload is None:
+        return None
+    text = payload if isinstance(payload, str) else json.dumps(payload, separators=(',', ':'))
+    return zlib.compress(text.encode(), 6)
+
+
+def unpack_payload(blob: Optional[bytes]) -> Any:
+    """Decode an order_payloads blob back into the broker response."""
+    if blob is None:
+        return None
+    return json.loads(zlib.decompress(blob))
+
+
+async def _migrate_order_payloads(db: aiosqlite.Connection):
+    """Move raw responses still stored inline in order_history into order_payloads."""
+    cursor = await db.execute(
+        "SELECT order_id, kotak_response FROM order_history WHERE kotak_response IS NOT NULL"
+    )
+    rows = await cursor.fetchall()
+    if not rows:
+        return
+    await db.executemany(
+        "INSERT OR IGNORE INTO order_payloads (order_id, payload) VALUES (?, ?)",
+        [(order_id, pack_payload(text)) for order_id, text in rows]
+    )
+    await db.execute("UPDATE order_history SET kotak_response = NULL WHERE kotak_response IS NOT NULL")
+    logger.info(f"Moved {len(rows)} raw order responses to compressed storage")
+
+
+async def _migrate_order_epoch(db: aiosqlite.Connection):
+    """Add order_history.order_epoch to older databases and backfill it."""
+    cursor = await db.execute("PRAGMA table_info(order_history)")
+    columns = {row[1] for row in await cursor.fetchall()}
+    if "order_epoch" not in columns:
+        await db.execute("ALTER TABLE order_history ADD COLUMN order_epoch INTEGER")
+
+    # SQLite can't parse '%d-%b-%Y', so the backfill converts in Python
+    cursor = await db.execute(
+        "SELECT order_id, order_datetime FROM order_history WHERE order_epoch IS NULL"
+    )
+    backfill = [
+        (epoch, order_id)
+        for order_id, order_datetime in await cursor.fetchall()
+        if (epoch := order_epoch(order_datetime)) is not None
+    ]
+    if backfill:
+        await db.executemany("UPDATE order_history SET order_epoch = ? WHERE order_id = ?", backfill)
+        logger.info(f"Backfilled order_epoch for {len(backfill)} orders")
+
+    await db.executescript(EPOCH_INDEX_SQL)
 
-# Persistent connection singleton
+
+# Persistent writer connection singleton and read-only connection pool
 _db_connection = None
 _db_lock = asyncio.Lock()
+_read_pool: Optional["asyncio.Queue[aiosqlite.Connection]"] = None
+_read_connections: List[aiosqlite.Connection] = []
+_read_pool_lock = asyncio.Lock()
+
+
+def _tuning_pragmas() -> str:
+    return f"""
+    PRAGMA synchronous=NORMAL;
+    PRAGMA busy_timeout=5000;
+    PRAGMA cache_size=-{settings.DB_CACHE_SIZE_KB};
+    PRAGMA mmap_size={settings.DB_MMAP_SIZE};
+    """
+
+
+async def _connect_writer() -> aiosqlite.Connection:
+    db = await aiosqlite.connect(DB_PATH)
+    await db.execute("PRAGMA journal_mode=WAL;")
+    await db.executescript(_tuning_pragmas())
+    return db
+
+
+async def _connect_reader() -> aiosqlite.Connection:
+    db = await aiosqlite.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    db.row_factory = sqlite3.Row
+    await db.executescript(_tuning_pragmas() + "PRAGMA query_only=1;")
+    return db
 
 async def init_database():
     """Initialize the database and create schema if needed."""
@@ -61,9 +236,11 @@ async def init_database():
             DB_DIR.mkdir(exist_ok=True)
             # Create connection if not exists
             if _db_connection is None:
-                _db_connection = await aiosqlite.connect(DB_PATH)
+                _db_connection = await _connect_writer()
                 
             await _db_connection.executescript(SCHEMA_SQL)
+            await _migrate_order_epoch(_db_connection)
+            await _migrate_order_payloads(_db_connection)
             await _db_connection.commit()
             logger.info(f"Order history database initialized at {DB_PATH}")
         except Exception as e:
@@ -71,9 +248,53 @@ async def init_database():
             raise
 
 async def get_db():
-    """Get persistent database connection."""
+    """Get the persistent writer connection (writes go through the write-behind queue)."""
     global _db_connection
     async with _db_lock:
         if _db_connection is None:
-            _db_connection = await aiosqlite.connect(DB_PATH)
+            _db_connection = await _connect_writer()
         return _db_connection
+
+async def _open_read_pool() -> "asyncio.Queue[aiosqlite.Connection]":
+    global _read_pool
+    async with _read_pool_lock:
+        if _read_pool is None:
+            # The writer creates the file and switches it to WAL first
+            await get_db()
+            pool: "asyncio.Queue[aiosqlite.Connection]" = asyncio.Queue()
+            for _ in range(settings.DB_READ_POOL_SIZE):
+                db = await _connect_reader()
+                _read_connections.append(db)
+                pool.put_nowait(db)
+            _read_pool = pool
+            logger.info(f"Opened {settings.DB_READ_POOL_SIZE} read-only connections to {DB_PATH}")
+        return _read_pool
+
+@asynccontextmanager
+async def read_db():
+    """
+    Borrow a read-only connection from the pool (rows are sqlite3.Row).
+
+    Usage:
+        async with read_db() as db:
+            cursor = await db.execute("SELECT ...")
+    """
+    pool = _read_pool or await _open_read_pool()
+    db = await pool.get()
+    try:
+        yield db
+    finally:
+        pool.put_nowait(db)
+
+async def close_database():
+    """Close the read pool and the writer connection (application shutdown)."""
+    global _db_connection, _read_pool
+    async with _read_pool_lock:
+        for db in _read_connections:
+            await db.close()
+        _read_connections.clear()
+        _read_pool = None
+    async with _db_lock:
+        if _db_connection is not None:
+            await _db_connection.close()
+            _db_connection = None
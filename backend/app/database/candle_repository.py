@@ -0,0 +1,67 @@
+"""
+Candle repository for the local daily candle store (daily_candles).
+"""
+
+from typing import Dict, List, Sequence, Tuple
+from app.database import read_db
+from app.database.write_queue import write_queue
+from app.core.logger import logger
+
+
+class CandleRepository:
+    """Repository for daily candle database operations."""
+
+    async def upsert_candles(self, candles: List[Tuple]) -> int:
+        """
+        Store (symbol, day, open, high, low, close, volume) rows, replacing
+        existing days (today's candle changes until the close).
+
+        Returns:
+            Number of rows written
+        """
+        if not candles:
+            return 0
+        written = await write_queue.executemany("""
+            INSERT OR REPLACE INTO daily_candles (symbol, day, open, high, low, close, volume)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, candles, durable=True)
+        logger.debug(f"Stored {len(candles)} daily candles")
+        return written or 0
+
+    async def delete_symbols(self, symbols: Sequence[str]) -> int:
+        """Drop all stored candles of the symbols (their history is reloaded)."""
+        if not symbols:
+            return 0
+        deleted = await write_queue.execute(
+            f"DELETE FROM daily_candles WHERE symbol IN ({', '.join('?' for _ in symbols)})",
+            tuple(symbols), durable=True
+        )
+        return deleted or 0
+
+    async def get_last_days(self, symbols: Sequence[str]) -> Dict[str, int]:
+        """Latest stored day per symbol (symbols without candles are absent)."""
+        if not symbols:
+            return {}
+        async with read_db() as db:
+            cursor = await db.execute(f"""
+                SELECT symbol, MAX(day) FROM daily_candles
+                WHERE symbol IN ({', '.join('?' for _ in symbols)})
+                GROUP BY symbol
+            """, tuple(symbols))
+            return {row[0]: row[1] for row in await cursor.fetchall()}
+
+    async def get_closes(self, symbols: Sequence[str], since_day: int) -> List[Tuple[str, int, float]]:
+        """(symbol, day, close) rows from since_day on, ordered by day."""
+        if not symbols:
+            return []
+        async with read_db() as db:
+            cursor = await db.execute(f"""
+                SELECT symbol, day, close FROM daily_candles
+                WHERE symbol IN ({', '.join('?' for _ in symbols)}) AND day >= ?
+                ORDER BY day
+            """, (*symbols, since_day))
+            return [tuple(row) for row in await cursor.fetchall()]
+
+
+# Singleton instance
+candle_repository = CandleRepository()
@@ -0,0 +1,158 @@
+"""
+Fill repository for the local copy of the Kotak trade book (trade_fills).
+"""
+
+import json
+from typing import List, Dict, Optional, Set, Tuple
+from app.database import read_db
+from app.database.pagination import keyset_predicate, paginate, where_clause
+from app.database.write_queue import write_queue
+from app.core.logger import logger
+
+
+class FillRepository:
+    """Repository for trade fill database operations."""
+
+    async def insert_fills(self, fills: List[Dict]) -> int:
+        """
+        Insert fills, ignoring ones already stored (fill_id is the key).
+
+        Returns:
+            Number of fills actually inserted
+
+        Raises:
+            Exception: If the write fails (nothing of the batch is stored)
+        """
+        if not fills:
+            return 0
+        try:
+            inserted = await write_queue.executemany("""
+                INSERT OR IGNORE INTO trade_fills
+                (fill_id, order_id, trading_symbol, exchange, product,
+                 transaction_type, quantity, price, fill_epoch, kotak_response)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(
+                fill['fill_id'],
+                fill['order_id'],
+                fill['trading_symbol'],
+                fill.get('exchange'),
+                fill.get('product'),
+                fill.get('transaction_type'),
+                fill['quantity'],
+                fill['price'],
+                fill['fill_epoch'],
+                json.dumps(fill.get('kotak_response'))
+            ) for fill in fills], durable=True)
+            logger.info(f"Stored {inserted} new trade fills")
+            return inserted
+        except Exception as e:
+            logger.error(f"Failed to store trade fills: {e}")
+            raise
+
+    async def get_fill_ids_since(self, since_epoch: int) -> Set[str]:
+        """Fill ids stored at or after since_epoch (used to skip known fills on sync)."""
+        try:
+            async with read_db() as db:
+                cursor = await db.execute(
+                    "SELECT fill_id FROM trade_fills WHERE fill_epoch >= ?", (since_epoch,)
+                )
+                return {row[0] for row in await cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Failed to get stored fill ids: {e}")
+            return set()
+
+    async def get_fills_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        trading_symbol: Optional[str] = None,
+        order_id: Optional[str] = None,
+        product: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Fills newest first, keyset-paginated on (fill_epoch, fill_id).
+
+        Args:
+            limit: Page size
+            cursor: next_cursor of the previous page
+            trading_symbol: Only fills for this symbol
+            order_id: Only fills of this order
+            product: Only fills for this product
+
+        Returns:
+            (fills, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        keyset, params = keyset_predicate(("fill_epoch", "fill_id"), cursor)
+        predicates = [keyset]
+        if trading_symbol:
+            predicates.append("trading_symbol = ?")
+            params.append(trading_symbol)
+        if order_id:
+            predicates.append("order_id = ?")
+            params.append(order_id)
+        if product:
+            predicates.append("product = ?")
+            params.append(product)
+
+        async with read_db() as db:
+            rows_cursor = await db.execute(f"""
+                SELECT * FROM trade_fills
+                {where_clause(predicates)}
+                ORDER BY fill_epoch DESC, fill_id DESC
+                LIMIT ?
+            """, (*params, limit + 1))
+            rows = await rows_cursor.fetchall()
+
+        fills = []
+        for row in rows:
+            fill = dict(row)
+            if fill.get('kotak_response'):
+                try:
+                    fill['kotak_response'] = json.loads(fill['kotak_response'])
+                except ValueError:
+                    pass
+            fills.append(fill)
+        return paginate(fills, limit, lambda fill: (fill['fill_epoch'], fill['fill_id']))
+
+    async def get_symbol_stats(self, since_epoch: Optional[int] = None,
+                               trading_symbol: Optional[str] = None) -> List[Dict]:
+        """
+        Per-symbol fill aggregates: fill count, bought/sold quantity and value,
+        first and last fill time.
+        """
+        clauses, params = [], []
+        if since_epoch is not None:
+            clauses.append("fill_epoch >= ?")
+            params.append(since_epoch)
+        if trading_symbol:
+            clauses.append("trading_symbol = ?")
+            params.append(trading_symbol)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        try:
+            async with read_db() as db:
+                cursor = await db.execute(f"""
+                    SELECT trading_symbol,
+                           COUNT(*) AS fills,
+                           SUM(CASE WHEN transaction_type = 'B' THEN quantity ELSE 0 END) AS buy_qty,
+                           SUM(CASE WHEN transaction_type = 'B' THEN quantity * price ELSE 0 END) AS buy_value,
+                           SUM(CASE WHEN transaction_type = 'S' THEN quantity ELSE 0 END) AS sell_qty,
+                           SUM(CASE WHEN transaction_type = 'S' THEN quantity * price ELSE 0 END) AS sell_value,
+                           MIN(fill_epoch) AS first_fill_epoch,
+                           MAX(fill_epoch) AS last_fill_epoch
+                    FROM trade_fills
+                    {where}
+                    GROUP BY trading_symbol
+                    ORDER BY last_fill_epoch DESC
+                """, params)
+                return [dict(row) for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Failed to get fill stats: {e}")
+            return []
+
+
+# Singleton instance
+fill_repository = FillRepository()
@@ -0,0 +1,139 @@
+"""
+In-memory cache of recent chat turns per agent session.
+
+MemoryRepository writes every message through to agent_memory and also
+appends it here, so building a session's chat history is a dict lookup
+instead of a SQLite read. A session is loaded from the database
+once (on its first miss) and then kept current by the write-through.
+
+Sessions are kept in least-recently-used order. Sessions idle for longer
+than idle_ttl are dropped, and the least recently used session is evicted
+when more than max_sessions are cached. The cache lives on the event loop
+(no locking).
+"""
+
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+
+class _Session:
+    __slots__ = ("turns", "summary", "last_used")
+
+    def __init__(self, turns: List[Dict[str, Any]], summary: Optional[Dict[str, Any]], max_turns: int):
+        self.turns: Deque[Dict[str, Any]] = deque(turns, maxlen=max_turns)
+        self.summary = summary
+        self.last_used = time.monotonic()
+
+
+class SessionHistoryCache:
+    """LRU of the most recent turns of active sessions, with idle expiry."""
+
+    def __init__(self, max_sessions: int, max_turns: int, idle_ttl: float):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        # session_id -> [loads in progress, appends seen meanwhile]; a load
+        # that raced with a write to its session isn't cached
+        self._loading: Dict[str, List[int]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.idle_evictions = 0
+
+    def _expire_idle(self, now: float):
+        # LRU order is last-use order, so idle sessions are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self.idle_evictions += 1
+
+    def get(self, session_id: str, limit: int, include_summary: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """
+        The newest `limit` turns of a session (oldest first), or None on a
+        miss. Requests for more turns than the cache holds are misses.
+        """
+        now = time.monotonic()
+        self._expire_idle(now)
+        session = self._sessions.get(session_id)
+        if session is None or limit > self.max_turns:
+            self.misses += 1
+            return None
+
+        session.last_used = now
+        self._sessions.move_to_end(session_id)
+        self.hits += 1
+        turns = list(session.turns)[-limit:] if limit > 0 else []
+        history = [dict(turn) for turn in turns]
+        if include_summary and session.summary:
+            history.insert(0, dict(session.summary))
+        return history
+
+    def begin_load(self, session_id: str) -> int:
+        """Call before reading a session from the database; pair with end_load."""
+        loading = self._loading.setdefault(session_id, [0, 0])
+        loading[0] += 1
+        return loading[1]
+
+    def end_load(self, session_id: str):
+        loading = self._loading[session_id]
+        loading[0] -= 1
+        if loading[0] == 0:
+            del self._loading[session_id]
+
+    def load(self, session_id: str, turns: List[Dict[str, Any]], summary: Optional[Dict[str, Any]],
+             token: int):
+        """
+        Cache a session read from the database.
+
+        Args:
+            turns: The session's newest turns (up to max_turns), oldest first
+            summary: Its summary message, or None
+            token: begin_load() result from before the read
+        """
+        if self._loading[session_id][1] != token:
+            return
+        self._sessions[session_id] = _Session(turns, summary, self.max_turns)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def append(self, session_id: str, turn: Dict[str, Any]):
+        """Write-through of a new message (only sessions already cached are updated)."""
+        loading = self._loading.get(session_id)
+        if loading is not None:
+            loading[1] += 1
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.turns.append(turn)
+
+    def invalidate(self, session_id: str):
+        loading = self._loading.get(session_id)
+        if loading is not None:
+            loading[1] += 1
+        self._sessions.pop(session_id, None)
+
+    def clear(self):
+        self._sessions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "max_turns": self.max_turns,
+            "idle_ttl_s": self.idle_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "idle_evictions": self.idle_evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -1,53 +1,219 @@
-from app.database import get_db
+from app.config import get_settings
+from app.database import read_db
+from app.database.memory_cache import SessionHistoryCache
+from app.database.pagination import keyset_predicate, paginate, where_clause
+from app.database.write_queue import write_queue
 from app.core.logger import logger
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+settings = get_settings()
 
 class MemoryRepository:
-    async def add_message(self, session_id: str, role: str, content: str, agent_name: str = None):
-        """Save a message to the agent memory."""
+    def __init__(self):
+        # Recent turns of active sessions, written through by add_message
+        self.history_cache = SessionHistoryCache(
+            max_sessions=settings.AGENT_MEMORY_CACHE_SESSIONS,
+            max_turns=settings.AGENT_MEMORY_CACHE_TURNS,
+            idle_ttl=settings.AGENT_MEMORY_CACHE_IDLE_S,
+        )
+
+    async def add_message(self, session_id: str, role: str, content: str, agent_name: str = None,
+                          durable: bool = False):
+        """Save a message to the agent memory (queued; durable=True waits for the commit)."""
         try:
-            db = await get_db()
-            await db.execute(
+            await write_queue.execute(
                 """
                 INSERT INTO agent_memory (session_id, role, content, agent_name)
                 VALUES (?, ?, ?, ?)
                 """,
-                (session_id, role, content, agent_name)
+                (session_id, role, content, agent_name),
+                durable=durable
             )
-            await db.commit()
+            # Same shape and (UTC) timestamp format as a row read back
+            self.history_cache.append(session_id, {
+                "role": role,
+                "content": content,
+                "agent_name": agent_name,
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+            })
             logger.info(f"Saved memory for session {session_id}: {role} ({agent_name})")
         except Exception as e:
             logger.error(f"Failed to save agent memory: {e}")
 
-    async def get_session_history(self, session_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Retrieve recent chat history for a session."""
+    async def get_session_history(self, session_id: str, limit: int = 10,
+                                  include_summary: bool = False, fresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Retrieve recent chat history for a session (oldest first).
+        Served from the session history cache when the session is cached;
+        otherwise the newest rows are read off the (session_id, id) index
+        and the session is cached. With include_summary, the session's
+        compacted summary (if any) is prepended as a system message.
+        Pass fresh=True right after add_message, so a cache miss waits for
+        the queued write instead of caching a history without it.
+        """
+        cached = self.history_cache.get(session_id, limit, include_summary)
+        if cached is not None:
+            return cached
+
+        token = self.history_cache.begin_load(session_id)
         try:
-            db = await get_db()
-            async with db.execute(
-                """
-                SELECT role, content, agent_name, timestamp 
-                FROM agent_memory 
-                WHERE session_id = ? 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-                """,
-                (session_id, limit)
-            ) as cursor:
-                rows = await cursor.fetchall()
-                
-                # Reverse to return in chronological order (oldest first)
-                history = [
-                    {
-                        "role": row[0],
-                        "content": row[1],
-                        "agent_name": row[2],
-                        "timestamp": row[3]
-                    }
-                    for row in rows
-                ]
-                return history[::-1]
+            if fresh:
+                # The caller just queued a message for this session: include it
+                await write_queue.barrier()
+            async with read_db() as db:
+                # One snapshot for the summary and the turns, so an archive
+                # committing in between can't drop turns from both
+                await db.execute("BEGIN")
+                try:
+                    cursor = await db.execute(
+                        "SELECT summary, updated_at FROM agent_memory_summary WHERE session_id = ?",
+                        (session_id,)
+                    )
+                    summary = await cursor.fetchone()
+                    cursor = await db.execute(
+                        """
+                        SELECT role, content, agent_name, timestamp 
+                        FROM agent_memory 
+                        WHERE session_id = ? 
+                        ORDER BY id DESC 
+                        LIMIT ?
+                        """,
+                        (session_id, max(limit, self.history_cache.max_turns))
+                    )
+                    rows = await cursor.fetchall()
+                finally:
+                    await db.rollback()
+
+            # Reverse to return in chronological order (oldest first)
+            turns = [
+                {
+                    "role": row[0],
+                    "content": row[1],
+                    "agent_name": row[2],
+                    "timestamp": row[3]
+                }
+                for row in rows
+            ]
+            turns.reverse()
+            summary_message = {
+                "role": "system",
+                "content": summary["summary"],
+                "agent_name": "MemorySummary",
+                "timestamp": summary["updated_at"]
+            } if summary else None
+            self.history_cache.load(
+                session_id, turns[-self.history_cache.max_turns:], summary_message, token
+            )
+
+            history = [dict(turn) for turn in turns[-limit:]] if limit > 0 else []
+            if include_summary and summary_message:
+                history.insert(0, dict(summary_message))
+            return history
         except Exception as e:
             logger.error(f"Failed to retrieve agent memory: {e}")
             return []
+        finally:
+            self.history_cache.end_load(session_id)
+
+    async def get_session_summary(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Compacted summary of a session's archived turns, or None."""
+        async with read_db() as db:
+            cursor = await db.execute(
+                "SELECT * FROM agent_memory_summary WHERE session_id = ?", (session_id,)
+            )
+            row = await cursor.fetchone()
+        return dict(row) if row else None
+
+    # ---------- Retention (used by the memory compactor) ----------
+
+    async def get_sessions_over(self, keep: int) -> List[str]:
+        """Sessions holding more than `keep` turns in agent_memory."""
+        async with read_db() as db:
+            cursor = await db.execute(
+                "SELECT session_id FROM agent_memory GROUP BY session_id HAVING COUNT(*) > ?", (keep,)
+            )
+            return [row[0] for row in await cursor.fetchall()]
+
+    async def get_turns_to_archive(self, session_id: str, keep: int) -> List[Dict[str, Any]]:
+        """A session's turns older than its `keep` most recent ones (oldest first)."""
+        async with read_db() as db:
+            cursor = await db.execute(
+                """
+                SELECT id, role, content, agent_name, timestamp
+                FROM agent_memory
+                WHERE session_id = ? AND id <= (
+                    SELECT id FROM agent_memory WHERE session_id = ?
+                    ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+                ORDER BY id
+                """,
+                (session_id, session_id, keep)
+            )
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def archive_turns(self, session_id: str, last_id: int, archived: int, summary: str):
+        """
+        Move a session's turns up to last_id into agent_memory_archive and
+        store its updated summary, atomically. Waits until it is committed.
+        """
+        archived_at = int(time.time())
+        # Its summary changes: discard loads in flight now...
+        self.history_cache.invalidate(session_id)
+        # One atomic unit: turns are only deleted together with their archived copies
+        await write_queue.execute_atomic([
+            ("""
+            INSERT OR IGNORE INTO agent_memory_archive
+            (id, session_id, role, content, agent_name, timestamp, archived_at)
+            SELECT id, session_id, role, content, agent_name, timestamp, ?
+            FROM agent_memory WHERE session_id = ? AND id <= ?
+            """, (archived_at, session_id, last_id)),
+            ("DELETE FROM agent_memory WHERE session_id = ? AND id <= ?", (session_id, last_id)),
+            ("""
+            INSERT INTO agent_memory_summary (session_id, summary, archived_turns, last_archived_id)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                summary = excluded.summary,
+                archived_turns = agent_memory_summary.archived_turns + excluded.archived_turns,
+                last_archived_id = excluded.last_archived_id,
+                updated_at = CURRENT_TIMESTAMP
+            """, (session_id, summary, archived, last_id)),
+        ], durable=True)
+        # ...and anything loaded before the archive committed; reload on next use
+        self.history_cache.invalidate(session_id)
+
+    async def purge_archive(self, before_epoch: int) -> int:
+        """Delete archived turns archived before before_epoch; returns the count."""
+        deleted = await write_queue.execute(
+            "DELETE FROM agent_memory_archive WHERE archived_at < ?", (before_epoch,), durable=True
+        )
+        return deleted or 0
+
+    async def get_session_page(
+        self, session_id: str, limit: int = 50, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of a session's messages, newest first, keyset-paginated on id.
+
+        Returns:
+            (messages, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        keyset, params = keyset_predicate(("id",), cursor)
+        async with read_db() as db:
+            rows_cursor = await db.execute(
+                f"""
+                SELECT id, role, content, agent_name, timestamp
+                FROM agent_memory
+                {where_clause(["session_id = ?", keyset])}
+                ORDER BY id DESC
+                LIMIT ?
+                """,
+                (session_id, *params, limit + 1)
+            )
+            rows = [dict(row) for row in await rows_cursor.fetchall()]
+        return paginate(rows, limit, lambda message: (message["id"],))
 
 memory_repository = MemoryRepository()
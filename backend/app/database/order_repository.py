@@ -2,25 +2,45 @@
 Order repository for CRUD operations on order history database.
 """
 
-import json
-import sqlite3
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-from app.database import get_db
+from typing import List, Dict, Optional, Tuple
+from app.database import order_epoch, pack_payload, read_db, unpack_payload
+from app.database.pagination import keyset_predicate, paginate, where_clause
+from app.database.write_queue import write_queue
 from app.core.logger import logger
 
 
+# order_history columns returned by reads; the raw broker response is kept
+# compressed in order_payloads and only decoded on request
+HISTORY_COLUMNS = """
+    order_id, trading_symbol, quantity, price, order_type, transaction_type,
+    product, status, exchange, order_datetime, order_epoch, created_at, updated_at
+"""
+
+UPSERT_PAYLOAD_SQL = """
+    INSERT OR REPLACE INTO order_payloads (order_id, payload, updated_at)
+    VALUES (?, ?, CURRENT_TIMESTAMP)
+"""
+
+
 class OrderRepository:
     """Repository for order history database operations."""
     
-    async def save_order(self, order_data: Dict) -> bool:
-        """Save order to database."""
+    async def save_order(self, order_data: Dict, durable: bool = False) -> bool:
+        """
+        Save order to database (via the write-behind queue).
+        The raw kotak_response is stored compressed in order_payloads.
+        
+        Args:
+            order_data: Order record
+            durable: Wait until the write is committed
+        """
         try:
-            db = await get_db()
-            await db.execute("""
+            payload = pack_payload(order_data.get('kotak_response'))
+            await write_queue.execute("""
                 INSERT OR REPLACE INTO order_history 
                 (order_id, trading_symbol, quantity, price, order_type, 
-                 transaction_type, product, status, exchange, order_datetime, kotak_response, updated_at)
+                 transaction_type, product, status, exchange, order_datetime, order_epoch, updated_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             """, (
                 order_data.get('order_id'),
@@ -33,10 +53,14 @@ class OrderRepository:
                 order_data.get('status', 'PENDING'),
                 order_data.get('exchange'),
                 order_data.get('order_datetime'),
-                order_data.get('kotak_response')
-            ))
-            await db.commit()
-            logger.info(f"Saved order to DB: {order_data.get('order_id')}")
+                order_epoch(order_data.get('order_datetime'))
+            ), durable=durable and payload is None)
+            if payload is not None:
+                # Queued after the order row, so its commit covers both
+                await write_queue.execute(
+                    UPSERT_PAYLOAD_SQL, (order_data.get('order_id'), payload), durable=durable
+                )
+            logger.info(f"{'Saved' if durable else 'Queued'} order to DB: {order_data.get('order_id')}")
             return True
         except Exception as e:
             logger.error(f"Failed to save order to DB: {e}")
@@ -47,30 +71,18 @@ class OrderRepository:
         Get orders within a date range.
         """
         try:
-            db = await get_db()
-            db.row_factory = sqlite3.Row
-            
-            # Format dates for comparison (assuming ordDtTm format: "08-Jan-2026 14:30:45")
-            cursor = await db.execute("""
-                SELECT * FROM order_history
-                WHERE order_datetime >= ? AND order_datetime <= ?
-                ORDER BY order_datetime DESC
-            """, (
-                start_date.strftime('%d-%b-%Y 00:00:00'),
-                end_date.strftime('%d-%b-%Y 23:59:59')
-            ))
-            
-            rows = await cursor.fetchall()
-            orders = []
+            # Whole days, compared on the indexed epoch column (index range scan)
+            start = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+            end = end_date.replace(hour=23, minute=59, second=59, microsecond=0)
+            async with read_db() as db:
+                cursor = await db.execute(f"""
+                    SELECT {HISTORY_COLUMNS} FROM order_history
+                    WHERE order_epoch BETWEEN ? AND ?
+                    ORDER BY order_epoch DESC
+                """, (int(start.timestamp()), int(end.timestamp())))
+                rows = await cursor.fetchall()
             
-            for row in rows:
-                order = dict(row)
-                if order.get('kotak_response'):
-                    try:
-                        order['kotak_response'] = json.loads(order['kotak_response'])
-                    except:
-                        pass
-                orders.append(order)
+            orders = [dict(row) for row in rows]
             
             logger.info(f"Retrieved {len(orders)} orders from DB between {start_date.date()} and {end_date.date()}")
             return orders
@@ -79,53 +91,164 @@ class OrderRepository:
             logger.error(f"Failed to get orders by date range: {e}")
             return []
     
-    async def update_order_status(self, order_id: str, new_status: str) -> bool:
-        """Update order status."""
+    async def upsert_broker_orders(self, orders: List[Dict]) -> bool:
+        """
+        Write back orders in Kotak order book format (nOrdNo, trdSym, ...).
+        New orders are inserted; existing rows get the broker's latest
+        status, quantity, price and (compressed) raw response in one transaction.
+        """
         try:
-            db = await get_db()
-            await db.execute("""
+            await write_queue.executemany("""
+                INSERT INTO order_history
+                (order_id, trading_symbol, quantity, price, order_type,
+                 transaction_type, product, status, exchange, order_datetime, order_epoch, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(order_id) DO UPDATE SET
+                    status = excluded.status,
+                    quantity = excluded.quantity,
+                    price = excluded.price,
+                    order_epoch = COALESCE(order_history.order_epoch, excluded.order_epoch),
+                    updated_at = CURRENT_TIMESTAMP
+            """, [(
+                order.get('nOrdNo'),
+                order.get('trdSym') or '',
+                order.get('qty') or 0,
+                order.get('prc'),
+                order.get('prcTp'),
+                order.get('trnsTp'),
+                order.get('prod'),
+                order.get('ordSt'),
+                order.get('exSeg'),
+                order.get('ordDtTm') or '',
+                order_epoch(order.get('ordDtTm'))
+            ) for order in orders])
+            await write_queue.executemany(UPSERT_PAYLOAD_SQL, [
+                (order.get('nOrdNo'), pack_payload(order)) for order in orders
+            ])
+            logger.debug(f"Queued upsert of {len(orders)} broker orders")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to upsert broker orders: {e}")
+            return False
+    
+    async def update_order_status(self, order_id: str, new_status: str, durable: bool = False) -> bool:
+        """Update order status (via the write-behind queue; durable=True waits for the commit)."""
+        try:
+            await write_queue.execute("""
                 UPDATE order_history 
                 SET status = ?, updated_at = CURRENT_TIMESTAMP
                 WHERE order_id = ?
-            """, (new_status, order_id))
-            await db.commit()
+            """, (new_status, order_id), durable=durable)
             logger.debug(f"Updated order {order_id} status to {new_status}")
             return True
         except Exception as e:
             logger.error(f"Failed to update order status: {e}")
             return False
     
-    async def get_order_by_id(self, order_id: str) -> Optional[Dict]:
+    async def get_order_by_id(self, order_id: str, include_payload: bool = False,
+                              fresh: bool = False) -> Optional[Dict]:
         """
         Get single order by ID.
         
         Args:
             order_id: Order ID
+            include_payload: Also decode the raw broker response into 'kotak_response'
+            fresh: Wait for queued writes first (read-your-writes after a non-durable save)
         
         Returns:
             Order dictionary or None
         """
         try:
-            async with await get_db() as db:
-                db.row_factory = sqlite3.Row
-                cursor = await db.execute("""
-                    SELECT * FROM order_history WHERE order_id = ?
+            if fresh:
+                await write_queue.barrier()
+            async with read_db() as db:
+                cursor = await db.execute(f"""
+                    SELECT {HISTORY_COLUMNS} FROM order_history WHERE order_id = ?
                 """, (order_id,))
                 row = await cursor.fetchone()
-                
-                if row:
-                    order = dict(row)
-                    if order.get('kotak_response'):
-                        try:
-                            order['kotak_response'] = json.loads(order['kotak_response'])
-                        except:
-                            pass
-                    return order
+            
+            if not row:
                 return None
+            order = dict(row)
+            if include_payload:
+                order['kotak_response'] = await self.get_order_payload(order_id)  # barrier already passed
+            return order
         except Exception as e:
             logger.error(f"Failed to get order by ID: {e}")
             return None
     
+    async def get_order_payload(self, order_id: str, fresh: bool = False) -> Optional[Dict]:
+        """Raw broker response stored for an order (decompressed), or None."""
+        try:
+            if fresh:
+                await write_queue.barrier()
+            async with read_db() as db:
+                cursor = await db.execute(
+                    "SELECT payload FROM order_payloads WHERE order_id = ?", (order_id,)
+                )
+                row = await cursor.fetchone()
+            return unpack_payload(row['payload']) if row else None
+        except Exception as e:
+            logger.error(f"Failed to get order payload: {e}")
+            return None
+    
+    async def get_orders_page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        trading_symbol: Optional[str] = None,
+        product: Optional[str] = None,
+        start_epoch: Optional[int] = None,
+        end_epoch: Optional[int] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of order history, newest first, keyset-paginated on
+        (order_epoch, order_id). Filters are applied in SQL on indexed columns.
+        
+        Args:
+            limit: Page size
+            cursor: next_cursor of the previous page
+            statuses: Only these statuses (case-insensitive)
+            trading_symbol: Only this symbol
+            product: Only this product (CNC, MIS, NRML, ...)
+            start_epoch / end_epoch: Only orders placed in this range (unix seconds)
+        
+        Returns:
+            (orders, next_cursor); next_cursor is None on the last page
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        keyset, params = keyset_predicate(("order_epoch", "order_id"), cursor)
+        predicates = ["order_epoch IS NOT NULL", keyset]
+        if statuses:
+            predicates.append(f"status COLLATE NOCASE IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        if trading_symbol:
+            predicates.append("trading_symbol = ?")
+            params.append(trading_symbol)
+        if product:
+            predicates.append("product = ?")
+            params.append(product)
+        if start_epoch is not None:
+            predicates.append("order_epoch >= ?")
+            params.append(start_epoch)
+        if end_epoch is not None:
+            predicates.append("order_epoch <= ?")
+            params.append(end_epoch)
+        
+        async with read_db() as db:
+            rows_cursor = await db.execute(f"""
+                SELECT {HISTORY_COLUMNS} FROM order_history
+                {where_clause(predicates)}
+                ORDER BY order_epoch DESC, order_id DESC
+                LIMIT ?
+            """, (*params, limit + 1))
+            rows = [dict(row) for row in await rows_cursor.fetchall()]
+        
+        return paginate(rows, limit, lambda order: (order['order_epoch'], order['order_id']))
+    
     async def get_all_orders(self, limit: int = 1000) -> List[Dict]:
         """
         Get all orders with optional limit.
@@ -134,30 +257,20 @@ class OrderRepository:
             limit: Maximum number of orders to return
         
         Returns:
-            List of order dictionaries
+            List of order dictionaries (without raw broker responses; see get_order_payload)
         """
         try:
-            async with await get_db() as db:
-                db.row_factory = sqlite3.Row
-                cursor = await db.execute("""
-                    SELECT * FROM order_history
-                    ORDER BY order_datetime DESC
+            async with read_db() as db:
+                cursor = await db.execute(f"""
+                    SELECT {HISTORY_COLUMNS} FROM order_history
+                    ORDER BY order_epoch DESC
                     LIMIT ?
                 """, (limit,))
-                
                 rows = await cursor.fetchall()
-                orders = [dict(row) for row in rows]
-                
-                # Parse kotak_response
-                for order in orders:
-                    if order.get('kotak_response'):
-                        try:
-                            order['kotak_response'] = json.loads(order['kotak_response'])
-                        except:
-                            pass
-                
-                logger.info(f"Retrieved {len(orders)} orders from DB (limit: {limit})")
-                return orders
+            
+            orders = [dict(row) for row in rows]
+            logger.info(f"Retrieved {len(orders)} orders from DB (limit: {limit})")
+            return orders
         except Exception as e:
             logger.error(f"Failed to get all orders: {e}")
             return []
@@ -0,0 +1,59 @@
+"""
+Keyset (seek) pagination helpers shared by the repositories.
+
+Pages are ordered newest first on a unique key such as (order_epoch,
+order_id). The cursor is the key of the last row returned, and the next
+page is fetched with WHERE (key) < (cursor) ... LIMIT n. Each page is one
+index range scan, however deep into the history it is, unlike OFFSET.
+"""
+
+import base64
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+def encode_cursor(*key: Any) -> str:
+    """Opaque cursor for the key of the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps(list(key), separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Key values of a cursor; raises ValueError if it isn't a cursor of this shape."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return key
+
+
+def keyset_predicate(columns: Sequence[str], cursor: Optional[str]) -> Tuple[Optional[str], List[Any]]:
+    """
+    WHERE predicate selecting rows after the cursor in descending key order.
+
+    Returns:
+        (sql, params), or (None, []) for the first page
+    """
+    if not cursor:
+        return None, []
+    key = decode_cursor(cursor, len(columns))
+    placeholders = ", ".join("?" for _ in columns)
+    return f"({', '.join(columns)}) < ({placeholders})", key
+
+
+def where_clause(predicates: Sequence[Optional[str]]) -> str:
+    predicates = [p for p in predicates if p]
+    return f"WHERE {' AND '.join(predicates)}" if predicates else ""
+
+
+def paginate(rows: List[Dict], limit: int, key: Callable[[Dict], Sequence[Any]]) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Split a LIMIT limit + 1 result into the page and the next cursor.
+
+    Returns:
+        (rows of this page, cursor of the next page or None on the last page)
+    """
+    page = rows[:limit]
+    next_cursor = encode_cursor(*key(page[-1])) if len(rows) > limit else None
+    return page, next_cursor
@@ -0,0 +1,184 @@
+"""
+Group-commit write-behind queue for orders.db.
+
+Repository writes are queued instead of committed one by one. A single
+writer task drains the queue every DB_WRITE_BATCH_MS (or as soon as
+DB_WRITE_BATCH_MAX writes are waiting) and applies the whole batch in one
+transaction, so the number of commits (fsyncs) stays flat as write load
+grows.
+
+Callers that need durability pass durable=True and are resumed once their
+write is committed (errors are raised to them); everyone else returns as
+soon as the write is queued. A write that fails is undone on its own (one
+savepoint per write) while the rest of its batch commits; if the flush
+itself fails, its transaction is rolled back and every waiter of the batch
+gets the error. Reads that must see earlier writes call barrier() first.
+"""
+
+import asyncio
+from typing import Any, List, Optional, Sequence, Tuple
+
+from app.config import get_settings
+from app.core.logger import logger
+
+settings = get_settings()
+
+
+class _Write:
+    __slots__ = ("sql", "params", "many", "future")
+
+    def __init__(self, sql: Any, params: Any, many: bool, future: Optional[asyncio.Future]):
+        self.sql = sql  # None for a barrier marker, a list of (sql, params) for an atomic group
+        self.params = params
+        self.many = many
+        self.future = future
+
+
+class WriteBehindQueue:
+    """Batches queued writes into one transaction per flush."""
+
+    def __init__(self, flush_interval_s: float, max_batch: int):
+        self.flush_interval_s = flush_interval_s
+        self.max_batch = max_batch
+        self._queue: "asyncio.Queue[_Write]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._pending = 0
+        self.stats = {"writes": 0, "batches": 0, "errors": 0, "largest_batch": 0}
+
+    # ---------- Producers ----------
+
+    async def execute(self, sql: str, params: Sequence = (), durable: bool = False) -> Optional[int]:
+        """
+        Queue one statement.
+
+        Returns:
+            None, or the statement's rowcount once committed when durable=True
+        """
+        return await self._submit(sql, params, False, durable)
+
+    async def executemany(self, sql: str, seq_of_params: List[Sequence], durable: bool = False) -> Optional[int]:
+        """Queue one statement for many parameter rows (applied in the same batch)."""
+        return await self._submit(sql, seq_of_params, True, durable)
+
+    async def execute_atomic(self, statements: List[Tuple[str, Sequence]], durable: bool = False) -> Optional[int]:
+        """
+        Queue several statements that commit together or not at all.
+
+        Returns:
+            None, or the last statement's rowcount once committed when durable=True
+        """
+        return await self._submit(list(statements), None, False, durable)
+
+    async def barrier(self):
+        """Wait until every write queued before this call is committed."""
+        if self._pending:
+            await self._submit(None, None, False, True)
+
+    async def _submit(self, sql: Any, params: Any, many: bool, durable: bool) -> Optional[int]:
+        future = asyncio.get_running_loop().create_future() if durable else None
+        self._pending += 1
+        self._queue.put_nowait(_Write(sql, params, many, future))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return await future if future else None
+
+    # ---------- Writer ----------
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent writers one interval to join the batch
+            if self._queue.qsize() + 1 < self.max_batch:
+                await asyncio.sleep(self.flush_interval_s)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._commit(batch)
+            except Exception as e:
+                # Nothing of the batch is known to be committed: fail every waiter
+                logger.error(f"Write-behind flush failed: {e}")
+                await self._rollback()
+                self.stats["errors"] += sum(1 for write in batch if write.sql is not None)
+                for write in batch:
+                    if write.future is not None and not write.future.done():
+                        write.future.set_exception(e)
+            finally:
+                self._pending -= len(batch)
+
+    @staticmethod
+    async def _rollback():
+        """Drop a transaction a failed flush left open, so the next batch can't commit its writes."""
+        from app.database import get_db
+
+        try:
+            db = await get_db()
+            if db.in_transaction:
+                await db.rollback()
+        except Exception as e:
+            logger.error(f"Write-behind rollback failed: {e}")
+
+    async def _commit(self, batch: List[_Write]):
+        from app.database import get_db
+
+        db = await get_db()
+        if not db.in_transaction:
+            await db.execute("BEGIN")
+        results = []
+        for write in batch:
+            if write.sql is None:
+                results.append((write, None, None))
+                continue
+            # Each write runs in its own savepoint, so a failed one (an
+            # executemany may fail midway) leaves none of its rows behind
+            await db.execute("SAVEPOINT queued_write")
+            try:
+                if isinstance(write.sql, list):
+                    for sql, params in write.sql:
+                        cursor = await db.execute(sql, params)
+                elif write.many:
+                    cursor = await db.executemany(write.sql, write.params)
+                else:
+                    cursor = await db.execute(write.sql, write.params)
+                results.append((write, cursor.rowcount, None))
+                await db.execute("RELEASE queued_write")
+            except Exception as e:
+                # Undone on its own; the rest of the batch still commits
+                logger.error(f"Queued write failed: {e}")
+                await db.execute("ROLLBACK TO queued_write")
+                await db.execute("RELEASE queued_write")
+                results.append((write, None, e))
+
+        try:
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Write-behind commit failed: {e}")
+            try:
+                await db.rollback()
+            except Exception:
+                pass
+            results = [(write, None, e) for write, _, _ in results]
+
+        errors = 0
+        for write, rowcount, error in results:
+            errors += error is not None
+            if write.future is not None and not write.future.done():
+                if error is not None:
+                    write.future.set_exception(error)
+                else:
+                    write.future.set_result(rowcount)
+
+        self.stats["writes"] += sum(1 for write in batch if write.sql is not None)
+        self.stats["batches"] += 1
+        self.stats["errors"] += errors
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+    async def close(self):
+        """Flush everything queued and stop the writer (application shutdown)."""
+        await self.barrier()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+write_queue = WriteBehindQueue(settings.DB_WRITE_BATCH_MS / 1000, settings.DB_WRITE_BATCH_MAX)
@@ -0,0 +1,199 @@
+"""
+Local daily candle store.
+
+Daily closes for risk analytics are kept in orders.db (daily_candles) and
+topped up from Yahoo Finance at most twice per trading day per symbol
+(during the session and after the close; today's partial candle is never
+stored): the first sync downloads the whole lookback window, later ones
+only the days since the last stored candle (plus a week of overlap).
+Yahoo's closes are split/dividend adjusted, so when the overlap no longer
+matches the stored closes the symbol's whole window is downloaded again.
+Futures use their underlying's candles; options have none (Yahoo Finance
+doesn't serve them).
+"""
+
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from app.core.logger import logger
+from app.database.candle_repository import candle_repository
+from app.historical.routes import is_option_symbol, to_yahoo_symbol
+from app.utils.market_hours import IST, session_over_today
+
+FUTURES_PATTERN = re.compile(r'^(.+?)\d{2}[A-Z]{3}FUT$')
+# Segment whose close settles the day's candle
+CANDLE_SEGMENT = "NSE_CM"
+# Relative close difference on an already stored day that means a new adjustment basis
+ADJUSTMENT_TOLERANCE = 1e-3
+
+
+def trading_day() -> int:
+    """Today's date in IST as YYYYMMDD."""
+    return int(datetime.now(IST).strftime("%Y%m%d"))
+
+
+def candle_symbol(symbol: str) -> Optional[str]:
+    """Symbol whose candles price an instrument (None if there are none)."""
+    if is_option_symbol(symbol):
+        return None
+    futures = FUTURES_PATTERN.match(symbol)
+    return futures.group(1) if futures else symbol
+
+
+def _window_start(lookback_days: int) -> str:
+    """First calendar day (YYYYMMDD) covering lookback_days sessions, with room for holidays."""
+    return (datetime.now(IST) - timedelta(days=int(lookback_days * 1.5) + 10)).strftime("%Y%m%d")
+
+
+class CandleStore:
+    """Daily closes per symbol, synced from Yahoo Finance into daily_candles."""
+
+    def __init__(self):
+        # symbol -> (trading day, whether its session was over) of its last sync
+        self._synced: Dict[str, Tuple[int, bool]] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _download(yahoo_symbols: List[str], start: str) -> Dict[str, pd.DataFrame]:
+        """One batched yfinance download (runs in a worker thread)."""
+        data = yf.download(
+            yahoo_symbols, start=start, interval="1d", group_by="ticker",
+            auto_adjust=True, progress=False, threads=True,
+        )
+        frames = {}
+        for yahoo_symbol in yahoo_symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if yahoo_symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[yahoo_symbol]
+            else:
+                frame = data
+            frame = frame.dropna(subset=["Close"])
+            if not frame.empty:
+                frames[yahoo_symbol] = frame
+        return frames
+
+    async def _fetch(self, symbols: List[str], start: str) -> Dict[str, List[Tuple]]:
+        """Candle rows (symbol, day, open, high, low, close, volume) per symbol from start (YYYYMMDD)."""
+        yahoo: Dict[str, List[str]] = {}  # several names can share one ticker (NIFTY, NIFTY 50)
+        for symbol in symbols:
+            yahoo.setdefault(to_yahoo_symbol(symbol), []).append(symbol)
+
+        frames = await asyncio.get_running_loop().run_in_executor(
+            None, self._download, list(yahoo), f"{start[:4]}-{start[4:6]}-{start[6:]}"
+        )
+        rows: Dict[str, List[Tuple]] = {symbol: [] for symbol in symbols}
+        for yahoo_symbol, frame in frames.items():
+            for stamp, candle in frame.iterrows():
+                volume = candle.get("Volume")
+                candle_row = (
+                    int(stamp.strftime("%Y%m%d")),
+                    float(candle["Open"]), float(candle["High"]), float(candle["Low"]),
+                    float(candle["Close"]), int(volume) if pd.notna(volume) else None,
+                )
+                for symbol in yahoo[yahoo_symbol]:
+                    rows[symbol].append((symbol, *candle_row))
+        return rows
+
+    @staticmethod
+    def _rebased(stored: List[Tuple[str, int, float]], fetched: Dict[str, List[Tuple]], today: int) -> List[str]:
+        """
+        Symbols whose freshly downloaded closes disagree with the stored ones
+        on completed days: Yahoo's adjusted prices moved (split, dividend),
+        so their stored history is on another basis.
+        """
+        stored_close = {(symbol, day): close for symbol, day, close in stored}
+        rebased = []
+        for symbol, rows in fetched.items():
+            for _, day, _, _, _, close, _ in rows:
+                previous = stored_close.get((symbol, day))
+                if day < today and previous and abs(close / previous - 1) > ADJUSTMENT_TOLERANCE:
+                    rebased.append(symbol)
+                    break
+        return rebased
+
+    async def sync(self, symbols: Sequence[str], lookback_days: int, force: bool = False):
+        """
+        Download candles missing for today's trading day (once per symbol
+        during the session and once after the close, unless force). Today's
+        candle is only stored once the session is over; until then it is a
+        partial day. Symbols already stored are topped up from a week before
+        their last candle; if the overlapping completed days no longer match,
+        their whole window is downloaded again.
+        """
+        today = trading_day()
+        settled = session_over_today(CANDLE_SEGMENT)
+        async with self._lock:
+            pending = [s for s in dict.fromkeys(symbols) if force or self._synced.get(s) != (today, settled)]
+            if not pending:
+                return
+
+            last_days = await candle_repository.get_last_days(pending)
+            stored = [s for s in pending if s in last_days]
+            new = [s for s in pending if s not in last_days]
+            rows: List[Tuple] = []
+            try:
+                if stored:
+                    oldest = datetime.strptime(str(min(last_days[s] for s in stored)), "%Y%m%d")
+                    start = (oldest - timedelta(days=7)).strftime("%Y%m%d")
+                    fetched = await self._fetch(stored, start)
+                    rebased = self._rebased(
+                        await candle_repository.get_closes(stored, int(start)), fetched, today
+                    )
+                    if rebased:
+                        logger.info(f"📈 Adjusted prices changed for {', '.join(rebased)}; reloading their history")
+                        await candle_repository.delete_symbols(rebased)
+                        new.extend(rebased)
+                    rows.extend(row for s in stored if s not in rebased for row in fetched[s])
+                if new:
+                    fetched = await self._fetch(new, _window_start(lookback_days))
+                    rows.extend(row for s in new for row in fetched[s])
+            except Exception as e:
+                logger.warning(f"Candle sync failed for {len(pending)} symbols: {e}")
+                return
+
+            if not settled:
+                rows = [row for row in rows if row[1] < today]
+            await candle_repository.upsert_candles(rows)
+            for symbol in pending:
+                self._synced[symbol] = (today, settled)
+            logger.info(f"📈 Synced {len(rows)} daily candles for {len(pending)} symbols")
+
+    async def closes(self, symbols: Sequence[str], lookback_days: int,
+                     force_sync: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Daily closes of the last lookback_days sessions, aligned on the days
+        any of the symbols traded (force_sync re-syncs symbols already synced today).
+
+        Returns:
+            (days as YYYYMMDD, closes of shape (days, symbols)); a symbol's
+            gaps are forward-filled and NaN before its first candle
+        """
+        symbols = list(symbols)
+        await self.sync(symbols, lookback_days, force=force_sync)
+        rows = await candle_repository.get_closes(symbols, int(_window_start(lookback_days)))
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.full((0, len(symbols)), np.nan)
+
+        column = {symbol: j for j, symbol in enumerate(symbols)}
+        days = np.unique(np.fromiter((day for _, day, _ in rows), dtype=np.int64, count=len(rows)))[-lookback_days - 1:]
+        row_of = {day: i for i, day in enumerate(days.tolist())}
+        matrix = np.full((len(days), len(symbols)), np.nan)
+        for symbol, day, close in rows:
+            i = row_of.get(day)
+            if i is not None:
+                matrix[i, column[symbol]] = close
+        # Forward-fill each column's gaps (holidays of one exchange, missing rows)
+        filled = np.where(np.isnan(matrix), 0, np.arange(len(days))[:, None])
+        np.maximum.accumulate(filled, axis=0, out=filled)
+        matrix = matrix[filled, np.arange(len(symbols))]
+        return days, matrix
+
+
+candle_store = CandleStore()
@@ -51,6 +51,28 @@ SYMBOL_MAP = {
     "BANKNIFTY": "^NSEBANK",
 }
 
+def is_option_symbol(symbol: str) -> bool:
+    """Options contracts (unsupported by Yahoo Finance public API generally)."""
+    return bool(re.search(r'\d{2}[A-Z]{3}\d+[CP]E$', symbol) or re.search(r'\d{2}[A-Z]{3}\d+(?:CE|PE)', symbol))
+
+
+def to_yahoo_symbol(symbol: str) -> str:
+    """Map an internal symbol (trading symbol or index name) to its Yahoo Finance symbol."""
+    yahoo_symbol = SYMBOL_MAP.get(symbol.upper())
+
+    if not yahoo_symbol:
+        # Default fallback logic
+        if '-' in symbol:
+            # e.g. "RELIANCE-EQ" -> "RELIANCE.NS"
+            yahoo_symbol = symbol.split('-')[0] + '.NS'
+        elif not symbol.endswith('.NS') and not symbol.endswith('.BO') and not symbol.startswith('^'):
+            # Append .NS for NSE stocks by default if no suffix
+            yahoo_symbol = f"{symbol}.NS"
+        else:
+            yahoo_symbol = symbol
+    return yahoo_symbol
+
+
 @router.get("/historical/{symbol}")
 async def get_historical_data(symbol: str):
     """
@@ -59,23 +81,12 @@ async def get_historical_data(symbol: str):
     """
     try:
         # 1. Check for Options (unsupported by Yahoo Finance public API generally)
-        if re.search(r'\d{2}[A-Z]{3}\d+[CP]E$', symbol) or re.search(r'\d{2}[A-Z]{3}\d+(?:CE|PE)', symbol):
+        if is_option_symbol(symbol):
             logger.info(f"[Historical] Options contract detected: {symbol}. Skipping API call, returning sample data.")
             return {"candles": generate_sample_candles(), "source": "sample_options"}
 
         # 2. Map Symbol
-        yahoo_symbol = SYMBOL_MAP.get(symbol.upper())
-
-        if not yahoo_symbol:
-            # Default fallback logic
-            if '-' in symbol:
-                # e.g. "RELIANCE-EQ" -> "RELIANCE.NS"
-                yahoo_symbol = symbol.split('-')[0] + '.NS'
-            elif not symbol.endswith('.NS') and not symbol.endswith('.BO') and not symbol.startswith('^'):
-                # Append .NS for NSE stocks by default if no suffix
-                yahoo_symbol = f"{symbol}.NS"
-            else:
-                yahoo_symbol = symbol
+        yahoo_symbol = to_yahoo_symbol(symbol)
 
         logger.info(f"[Historical] Fetching data for {symbol} -> {yahoo_symbol} via yfinance lib")
         
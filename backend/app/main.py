@@ -13,6 +13,8 @@ from app.utils.cache import get_trade_session, get_view_session
 from app.historical.routes import router as historical_router
 from app.scripmaster.service import scrip_master
 from app.strategy.engine import strategy_engine
+from app.core.broker_gateway import broker_gateway
+from app.orders.tracker import order_tracker
 import asyncio
 
 settings = get_settings()
@@ -91,11 +93,31 @@ async def startup_event():
     # Start Strategy Engine
     await strategy_engine.start()
 
+    # Keep agent memory bounded (archive + summarize old turns)
+    from app.agents.memory_compactor import memory_compactor
+    await memory_compactor.start()
+
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down...")
     await strategy_engine.stop()
+    await order_tracker.stop()
+    from app.agents.memory_compactor import memory_compactor
+    await memory_compactor.stop()
+    from app.portfolio.live import live_portfolio
+    await live_portfolio.stop()
+    await broker_gateway.close()
+    from app.database import close_database
+    from app.database.write_queue import write_queue
+    await write_queue.close()
+    await close_database()
 
 @app.get("/")
 async def root():
     return {"message": "Kotak Neo Trading API is running"}
+
+@app.get("/broker/rate-limits")
+async def broker_rate_limits():
+    """Client-side broker rate limiter state and queue wait times per priority."""
+    from app.core.rate_limiter import rate_limiter
+    return rate_limiter.stats()
@@ -1,6 +1,7 @@
 from app.core.logger import logger
 from app.core.exceptions import KotakAPIError
 from app.utils import cache
+from app.core.broker_gateway import broker_gateway, ACCESS
 import httpx
 from typing import List
 
@@ -37,20 +38,18 @@ class MarketService:
         logger.info(f"GET {url}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    url,
-                    headers={
-                        "Authorization": settings.KOTAK_ACCESS_TOKEN,
-                        "Content-Type": "application/json"
-                    }
-                )
-                response.raise_for_status()
+            response = await broker_gateway.get(
+                url,
+                endpoint="quote",
+                auth=ACCESS,
+                headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
                 
-                result = response.json()
-                logger.info(f"Quotes fetch successful: {len(result) if isinstance(result, list) else 1} instruments")
+            result = response.json()
+            logger.info(f"Quotes fetch successful: {len(result) if isinstance(result, list) else 1} instruments")
                 
-                return result
+            return result
                 
         except httpx.HTTPStatusError as e:
             logger.error(f"Quotes fetch failed: Status {e.response.status_code}")
@@ -53,6 +53,46 @@ class GetOrdersInput(BaseModel):
         None,
         description="Filter by order status"
     )
+    symbol: Optional[str] = Field(
+        None,
+        description="Filter by trading symbol"
+    )
+    limit: int = Field(
+        20,
+        ge=1,
+        le=100,
+        description="Orders per page (newest first)"
+    )
+    cursor: Optional[str] = Field(
+        None,
+        description="next_cursor of the previous page"
+    )
+
+
+class GetOptionChainInput(BaseModel):
+    """Input schema for getOptionChain tool."""
+    underlying: str = Field(
+        ...,
+        min_length=1,
+        max_length=50,
+        description="Underlying name (e.g. NIFTY, BANKNIFTY, RELIANCE)"
+    )
+    expiry: Optional[str] = Field(
+        None,
+        pattern=r"^\d{4}-\d{2}-\d{2}$",
+        description="Expiry date YYYY-MM-DD (nearest expiry if omitted)"
+    )
+    spot: Optional[float] = Field(
+        None,
+        gt=0,
+        description="Underlying price used to locate the ATM strike"
+    )
+    strikes: Optional[int] = Field(
+        None,
+        ge=1,
+        le=50,
+        description="Strikes on each side of ATM (requires spot)"
+    )
 
 
 class SearchNewsInput(BaseModel):
@@ -197,6 +237,7 @@ class GetOrdersOutput(BaseModel):
     success: bool
     count: int
     data: List[OrderData]
+    next_cursor: Optional[str] = None
     response_shape: Dict[str, Any] = Field(default_factory=dict)
 
 
@@ -218,6 +259,78 @@ class GetPositionsOutput(BaseModel):
     response_shape: Dict[str, Any] = Field(default_factory=dict)
 
 
+class RiskPositionData(BaseModel):
+    """One of the largest positions by absolute market value."""
+    symbol: str
+    value: Optional[float] = None
+    weight: Optional[float] = None
+
+
+class PortfolioRiskData(BaseModel):
+    """Portfolio risk metrics (values in rupees, 1-day horizon)."""
+    as_of: Optional[int] = None
+    gross_exposure: Optional[float] = None
+    net_exposure: Optional[float] = None
+    long_exposure: Optional[float] = None
+    short_exposure: Optional[float] = None
+    hhi: Optional[float] = None
+    top5_share: Optional[float] = None
+    top_positions: List[RiskPositionData] = Field(default_factory=list)
+    benchmark: Optional[str] = None
+    beta: Optional[float] = None
+    beta_exposure: Optional[float] = None
+    var_95: Optional[float] = None
+    expected_shortfall_95: Optional[float] = None
+    var_99: Optional[float] = None
+    expected_shortfall_99: Optional[float] = None
+    max_drawdown: Optional[float] = None
+    max_drawdown_pct: Optional[float] = None
+    lookback_days: int = 0
+    uncovered: List[str] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class GetPortfolioRiskOutput(BaseModel):
+    """Output schema for getPortfolioRisk tool."""
+    success: bool
+    data: PortfolioRiskData
+    response_shape: Dict[str, Any] = Field(default_factory=dict)
+
+
+class OptionLegData(BaseModel):
+    """Single CE or PE contract in an option chain."""
+    token: str
+    symbol: str
+
+
+class OptionStrikeData(BaseModel):
+    """One strike row of an option chain."""
+    strike: float
+    lot_size: Optional[int] = None
+    ce: Optional[OptionLegData] = None
+    pe: Optional[OptionLegData] = None
+
+
+class OptionChainData(BaseModel):
+    """Option chain data structure."""
+    underlying: str
+    exchange_segment: Optional[str] = None
+    expiry: Optional[str] = None
+    expiries: List[str] = Field(default_factory=list)
+    lot_size: Optional[int] = None
+    atm_strike: Optional[float] = None
+    strikes: List[OptionStrikeData] = Field(default_factory=list)
+    error: Optional[str] = None
+
+
+class GetOptionChainOutput(BaseModel):
+    """Output schema for getOptionChain tool."""
+    success: bool
+    count: int
+    data: OptionChainData
+    response_shape: Dict[str, Any] = Field(default_factory=dict)
+
+
 class WebSocketStatusData(BaseModel):
     """WebSocket status data structure."""
     connected: bool
@@ -35,6 +35,8 @@ class MCPServer:
             "getLimits": (None, self.tools.get_limits),  # No input needed
             "getOrders": (GetOrdersInput, self.tools.get_orders),
             "getPositions": (None, self.tools.get_positions),
+            "getPortfolioRisk": (None, self.tools.get_portfolio_risk),
+            "getOptionChain": (GetOptionChainInput, self.tools.get_option_chain),
             "getWebSocketStatus": (None, self.tools.get_websocket_status),
             "searchNews": (SearchNewsInput, self.tools.search_news),
             "navigateTo": (NavigateToInput, self.tools.navigate_to),
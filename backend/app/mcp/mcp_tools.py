@@ -11,8 +11,11 @@ from app.mcp.mcp_schemas import *
 from app.mcp.mcp_logger import logger
 import yfinance as yf
 from app.market.service import MarketService
-from app.portfolio.service import PortfolioService
+from app.portfolio.service import portfolio_service
+from app.portfolio.live import live_portfolio
+from app.portfolio.risk import risk_engine
 from app.orders.service import OrderService
+from app.scripmaster.service import scrip_master
 from app.core.logger import logger as app_logger
 
 
@@ -24,7 +27,7 @@ class MCPTools:
     
     def __init__(self):
         self.market_service = MarketService()
-        self.portfolio_service = PortfolioService()
+        self.portfolio_service = portfolio_service  # shared response cache
         self.order_service = OrderService()
     
     async def get_quotes(self, input_data: GetQuotesInput) -> GetQuotesOutput:
@@ -309,9 +312,17 @@ class MCPTools:
                 response_shape={}
             )
     
+    # Kotak statuses covered by each getOrders status filter
+    ORDER_STATUS_FILTERS = {
+        "COMPLETE": ["COMPLETE", "TRADED"],
+        "REJECTED": ["REJECTED"],
+        "PENDING": ["PENDING", "OPEN", "OPEN PENDING", "VALIDATION PENDING", "PUT ORDER REQ RECEIVED"],
+        "TRIGGER PENDING": ["TRIGGER PENDING"],
+    }
+    
     async def get_orders(self, input_data: GetOrdersInput) -> GetOrdersOutput:
         """
-        Fetch order history with optional status filter.
+        Fetch order history with optional status/symbol filters, one page at a time.
         
         Wraps: OrderService.get_order_history()
         """
@@ -319,27 +330,26 @@ class MCPTools:
         tool_name = "getOrders"
         
         try:
-            result = await self.order_service.get_order_history()
-            
-            orders = []
-            
-            if result.get("stat") == "Ok" and result.get("data"):
-                for order in result["data"]:
-                    # Apply status filter if provided
-                    order_status = order.get("status", "")
-                    if input_data.status and order_status != input_data.status:
-                        continue
-                    
-                    orders.append(OrderData(
-                        order_id=order.get("orderId", ""),
-                        symbol=order.get("tradingSymbol", ""),
-                        status=order_status,
-                        quantity=order.get("quantity", 0),
-                        price=order.get("price"),
-                        order_type=order.get("orderValidity", ""),
-                        product=order.get("product", ""),
-                        timestamp=order.get("orderTimestamp")
-                    ))
+            result = await self.order_service.get_order_history(
+                limit=input_data.limit,
+                cursor=input_data.cursor,
+                statuses=self.ORDER_STATUS_FILTERS.get(input_data.status) if input_data.status else None,
+                trading_symbol=input_data.symbol,
+            )
+            
+            orders = [
+                OrderData(
+                    order_id=str(order.get("nOrdNo") or ""),
+                    symbol=order.get("trdSym") or "",
+                    status=str(order.get("ordSt") or ""),
+                    quantity=int(order.get("qty") or 0),
+                    price=float(order.get("prc") or 0),
+                    order_type=order.get("prcTp") or "",
+                    product=order.get("prod") or "",
+                    timestamp=order.get("ordDtTm")
+                )
+                for order in result.get("data", [])
+            ]
             
             latency_ms = (time.time() - start_time) * 1000
             
@@ -355,6 +365,7 @@ class MCPTools:
                 success=True,
                 count=len(orders),
                 data=orders,
+                next_cursor=result.get("next_cursor"),
                 response_shape={"count": len(orders)}
             )
             
@@ -378,26 +389,26 @@ class MCPTools:
     
     async def get_positions(self) -> GetPositionsOutput:
         """
-        Fetch current positions.
+        Fetch current positions, valued on live ticks.
         
-        Wraps: PortfolioService.get_positions()
+        Wraps: live_portfolio.get_positions()
         """
         start_time = time.time()
         tool_name = "getPositions"
         
         try:
-            result = await self.portfolio_service.get_positions()
+            result = await live_portfolio.get_positions()
             
             positions = []
             
             if result.get("stat") == "Ok" and result.get("data"):
                 for pos in result["data"]:
                     positions.append(PositionData(
-                        symbol=pos.get("tradingSymbol", ""),
-                        quantity=pos.get("netQty", 0),
-                        average_price=pos.get("avgPrc", 0.0),
+                        symbol=pos.get("trdSym", ""),
+                        quantity=int(pos.get("netQty") or 0),
+                        average_price=pos.get("buyAvg") or pos.get("sellAvg") or 0.0,
                         ltp=pos.get("ltp"),
-                        pnl=pos.get("unrealisedMTM"),
+                        pnl=pos.get("urmtom"),
                         product=pos.get("prod", "")
                     ))
             
@@ -436,6 +447,153 @@ class MCPTools:
                 response_shape={}
             )
     
+    async def get_portfolio_risk(self) -> GetPortfolioRiskOutput:
+        """
+        Fetch risk metrics of the whole book (exposure, concentration, beta,
+        historical VaR, drawdown).
+        
+        Wraps: risk_engine.get_risk()
+        """
+        start_time = time.time()
+        tool_name = "getPortfolioRisk"
+        
+        try:
+            result = await risk_engine.get_risk()
+            risk = result["data"]
+            var = risk["var"]
+            
+            data = PortfolioRiskData(
+                as_of=result.get("asOf"),
+                gross_exposure=risk["exposure"]["gross"],
+                net_exposure=risk["exposure"]["net"],
+                long_exposure=risk["exposure"]["long"],
+                short_exposure=risk["exposure"]["short"],
+                hhi=risk["concentration"]["hhi"],
+                top5_share=risk["concentration"]["top5Share"],
+                top_positions=[RiskPositionData(**p) for p in risk["concentration"]["top"]],
+                benchmark=risk["beta"]["benchmark"],
+                beta=risk["beta"]["portfolio"],
+                beta_exposure=risk["beta"]["betaExposure"],
+                var_95=var.get("95", {}).get("var"),
+                expected_shortfall_95=var.get("95", {}).get("expectedShortfall"),
+                var_99=var.get("99", {}).get("var"),
+                expected_shortfall_99=var.get("99", {}).get("expectedShortfall"),
+                max_drawdown=risk["drawdown"]["max"],
+                max_drawdown_pct=risk["drawdown"]["maxPct"],
+                lookback_days=risk["coverage"]["lookbackDays"],
+                uncovered=[u["symbol"] for u in risk["coverage"]["uncovered"]],
+            )
+            
+            latency_ms = (time.time() - start_time) * 1000
+            shape = {"mode": result.get("mode"), "lookback_days": data.lookback_days}
+            
+            logger.log_tool_call(
+                tool_name=tool_name,
+                arguments={},
+                success=True,
+                response_shape=shape,
+                latency_ms=latency_ms
+            )
+            
+            return GetPortfolioRiskOutput(
+                success=True,
+                data=data,
+                response_shape=shape
+            )
+            
+        except Exception as e:
+            latency_ms = (time.time() - start_time) * 1000
+            logger.log_tool_call(
+                tool_name=tool_name,
+                arguments={},
+                success=False,
+                response_shape={},
+                latency_ms=latency_ms,
+                error=str(e)
+            )
+            
+            return GetPortfolioRiskOutput(
+                success=False,
+                data=PortfolioRiskData(error=str(e)),
+                response_shape={}
+            )
+    
+    async def get_option_chain(self, input_data: GetOptionChainInput) -> GetOptionChainOutput:
+        """
+        Fetch an option chain (or ATM strike window) in a single lookup.
+        
+        Wraps: ScripMasterService.get_option_chain()
+        """
+        start_time = time.time()
+        tool_name = "getOptionChain"
+        
+        try:
+            chain = await scrip_master.get_option_chain_async(
+                input_data.underlying,
+                expiry=input_data.expiry,
+                spot=input_data.spot,
+                strikes=input_data.strikes
+            )
+            
+            if chain:
+                chain_data = OptionChainData(
+                    underlying=chain["underlying"],
+                    exchange_segment=chain["exchangeSegment"],
+                    expiry=chain["expiry"],
+                    expiries=chain["expiries"],
+                    lot_size=chain["lotSize"],
+                    atm_strike=chain["atmStrike"],
+                    strikes=[
+                        OptionStrikeData(
+                            strike=row["strike"],
+                            lot_size=row["lotSize"],
+                            ce=OptionLegData(**row["CE"]) if row["CE"] else None,
+                            pe=OptionLegData(**row["PE"]) if row["PE"] else None
+                        )
+                        for row in chain["strikes"]
+                    ]
+                )
+            else:
+                chain_data = OptionChainData(
+                    underlying=input_data.underlying.upper(),
+                    error="Option chain not found"
+                )
+            
+            latency_ms = (time.time() - start_time) * 1000
+            
+            logger.log_tool_call(
+                tool_name=tool_name,
+                arguments=input_data.model_dump(),
+                success=True,
+                response_shape={"count": len(chain_data.strikes), "expiry": chain_data.expiry},
+                latency_ms=latency_ms
+            )
+            
+            return GetOptionChainOutput(
+                success=chain is not None,
+                count=len(chain_data.strikes),
+                data=chain_data,
+                response_shape={"count": len(chain_data.strikes)}
+            )
+            
+        except Exception as e:
+            latency_ms = (time.time() - start_time) * 1000
+            logger.log_tool_call(
+                tool_name=tool_name,
+                arguments=input_data.model_dump(),
+                success=False,
+                response_shape={},
+                latency_ms=latency_ms,
+                error=str(e)
+            )
+            
+            return GetOptionChainOutput(
+                success=False,
+                count=0,
+                data=OptionChainData(underlying=input_data.underlying.upper(), error=str(e)),
+                response_shape={}
+            )
+    
     async def get_websocket_status(self) -> GetWebSocketStatusOutput:
         """
         Check WebSocket connection health.
@@ -0,0 +1,226 @@
+"""
+Local trade book.
+
+Fills from /quick/user/trades are copied into the trade_fills table of
+orders.db. The broker only returns the whole day's trade book, so the sync
+is incremental on our side: fill ids already stored today are skipped and
+only new fills are written. The trade book, realized P&L and per-symbol
+fill stats are then served from the local table with keyset pagination.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from app.config import get_settings
+from app.core.logger import logger
+
+settings = get_settings()
+
+FILL_TIME_FORMAT = "%d-%b-%Y %H:%M:%S"
+
+
+def _fill_epoch(trade: dict) -> Optional[int]:
+    """Fill time from flDt / flTm (None if it doesn't parse)."""
+    try:
+        filled_at = datetime.strptime(f"{trade.get('flDt')} {trade.get('flTm')}", FILL_TIME_FORMAT)
+        return int(filled_at.timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def fill_from_broker(trade: dict) -> Optional[dict]:
+    """Map a Kotak trade book row onto a trade_fills record (None if unusable)."""
+    order_id = trade.get("nOrdNo")
+    if not order_id:
+        return None
+    epoch = _fill_epoch(trade)
+    if epoch is None:
+        # Without the broker's fill time there is no stable key or timestamp
+        logger.warning(f"Skipping fill of order {order_id} with unparseable time: {trade.get('flDt')} {trade.get('flTm')}")
+        return None
+    try:
+        quantity = int(float(trade.get("fldQty") or 0))
+        price = float(trade.get("avgPrc") or 0)
+    except (TypeError, ValueError):
+        return None
+    transaction_type = str(trade.get("trnsTp") or "").upper()[:1]
+    return {
+        # flId is unique per fill; fall back to a key built only from broker fields
+        "fill_id": str(trade.get("flId") or f"{order_id}-{trade.get('flDt')}-{trade.get('flTm')}-{quantity}-{price}"),
+        "order_id": str(order_id),
+        "trading_symbol": trade.get("trdSym") or "",
+        "exchange": trade.get("exSeg"),
+        "product": trade.get("prod"),
+        "transaction_type": transaction_type,
+        "quantity": quantity,
+        "price": price,
+        "fill_epoch": epoch,
+        "kotak_response": trade,
+    }
+
+
+class FillStore:
+    """Keeps trade_fills in step with the broker trade book."""
+
+    def __init__(self):
+        # Fill ids already stored for the current day
+        self._known: Set[str] = set()
+        self._known_day: Optional[str] = None
+        self._stale = True
+        self._synced_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def mark_stale(self):
+        """Force the next read to sync (call when an order fills)."""
+        self._stale = True
+
+    def _is_fresh(self) -> bool:
+        return not self._stale and time.monotonic() - self._synced_at < settings.FILLS_SYNC_MAX_AGE
+
+    async def sync(self, force: bool = False) -> int:
+        """
+        Store fills not seen yet. Concurrent callers share one sync and
+        repeated calls are skipped while the local copy is fresh.
+
+        Returns:
+            Number of new fills stored
+        """
+        if not force and self._is_fresh():
+            return 0
+        async with self._lock:
+            if not force and self._is_fresh():
+                return 0
+
+            from app.database.fill_repository import fill_repository
+            from app.orders.service import order_service
+
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            if self._known_day != today.date().isoformat():
+                self._known = await fill_repository.get_fill_ids_since(int(today.timestamp()))
+                self._known_day = today.date().isoformat()
+
+            self._stale = False
+            try:
+                result = await order_service.get_trade_book()
+            except Exception:
+                self._stale = True
+                raise
+            self._synced_at = time.monotonic()
+
+            trades = result.get("data") if isinstance(result, dict) else None
+            fills = [fill_from_broker(t) for t in trades or [] if isinstance(t, dict)]
+            new_fills = [f for f in fills if f and f["fill_id"] not in self._known]
+            if not new_fills:
+                return 0
+            try:
+                inserted = await fill_repository.insert_fills(new_fills)
+            except Exception:
+                # Not stored: retry them on the next read
+                self._stale = True
+                raise
+            self._known.update(f["fill_id"] for f in new_fills)
+
+        logger.info(f"Trade book sync: {inserted} new fill(s)")
+        return inserted
+
+    async def _sync_for_read(self) -> bool:
+        """Sync before a read; on broker errors the local data is served as is."""
+        try:
+            await self.sync()
+            return True
+        except Exception as e:
+            logger.warning(f"Trade book sync failed, serving local fills: {e}")
+            return False
+
+    async def trade_book(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        trading_symbol: Optional[str] = None,
+        order_id: Optional[str] = None,
+        product: Optional[str] = None,
+    ) -> dict:
+        """
+        One page of fills (Kotak trade book format), newest first.
+
+        Args:
+            limit: Page size (capped at FILLS_PAGE_MAX)
+            cursor: next_cursor from the previous page
+            trading_symbol: Only fills for this symbol
+            order_id: Only fills of this order
+            product: Only fills for this product
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        from app.database.fill_repository import fill_repository
+
+        limit = max(1, min(limit, settings.FILLS_PAGE_MAX))
+        synced = await self._sync_for_read()
+
+        page, next_cursor = await fill_repository.get_fills_page(
+            limit, cursor=cursor, trading_symbol=trading_symbol, order_id=order_id, product=product
+        )
+        return {
+            "stat": "Ok",
+            "data": [fill["kotak_response"] for fill in page],
+            "next_cursor": next_cursor,
+            "synced": synced,
+        }
+
+    async def fill_stats(self, days: int = 30, trading_symbol: Optional[str] = None) -> dict:
+        """
+        Per-symbol fill stats and realized P&L.
+
+        Realized P&L uses average prices: the quantity both bought and sold
+        within the window is closed at (avg sell - avg buy).
+
+        Args:
+            days: Window in days (0 or negative for all fills)
+            trading_symbol: Only this symbol
+        """
+        from app.database.fill_repository import fill_repository
+
+        since = None
+        if days > 0:
+            since = int((datetime.now() - timedelta(days=days)).replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ).timestamp())
+        synced = await self._sync_for_read()
+
+        data: List[Dict] = []
+        total_realized = 0.0
+        for row in await fill_repository.get_symbol_stats(since, trading_symbol):
+            buy_qty, sell_qty = row["buy_qty"] or 0, row["sell_qty"] or 0
+            avg_buy = row["buy_value"] / buy_qty if buy_qty else 0.0
+            avg_sell = row["sell_value"] / sell_qty if sell_qty else 0.0
+            closed_qty = min(buy_qty, sell_qty)
+            realized = closed_qty * (avg_sell - avg_buy)
+            total_realized += realized
+            data.append({
+                "trading_symbol": row["trading_symbol"],
+                "fills": row["fills"],
+                "buy_qty": buy_qty,
+                "sell_qty": sell_qty,
+                "net_qty": buy_qty - sell_qty,
+                "avg_buy_price": round(avg_buy, 4),
+                "avg_sell_price": round(avg_sell, 4),
+                "turnover": round((row["buy_value"] or 0) + (row["sell_value"] or 0), 2),
+                "closed_qty": closed_qty,
+                "realized_pnl": round(realized, 2) or 0.0,
+                "first_fill": datetime.fromtimestamp(row["first_fill_epoch"]).isoformat(),
+                "last_fill": datetime.fromtimestamp(row["last_fill_epoch"]).isoformat(),
+            })
+
+        return {
+            "stat": "Ok",
+            "days": days,
+            "realized_pnl": round(total_realized, 2),
+            "data": data,
+            "synced": synced,
+        }
+
+
+fill_store = FillStore()
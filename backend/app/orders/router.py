@@ -1,59 +1,180 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from datetime import date
+from typing import Optional
 from app.orders.service import order_service
-from app.orders.schemas import PlaceOrderRequest, ModifyOrderRequest, OrderResponse
+from app.orders.tracker import order_tracker
+from app.orders.fills import fill_store
+from app.core.latency import latency_recorder
+from app.core.exceptions import OrderValidationError
+from app.orders.schemas import PlaceOrderRequest, ModifyOrderRequest, OrderResponse, BasketOrderRequest
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 @router.post("/place")
-async def place_order(order: PlaceOrderRequest):
+async def place_order(order: PlaceOrderRequest, debug: bool = False):
     try:
-        # Returns actual Kotak API response
-        result = await order_service.place_order(order)
+        # Returns actual Kotak API response (plus per-stage latency when debug=true)
+        result = await order_service.place_order(order, debug=debug)
         return result
+    except OrderValidationError as e:
+        # Structured reasons so the UI can point at the offending field
+        raise HTTPException(status_code=422, detail={"message": str(e), "reasons": e.reasons})
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/basket")
+async def place_basket(request: BasketOrderRequest):
+    """
+    Place several orders at once. Legs are validated up front, then sent
+    concurrently; returns per-leg results and a latency breakdown.
+    """
+    try:
+        return await order_service.place_basket(request.orders)
+    except OrderValidationError as e:
+        # Structured reasons so the UI can point at the offending field
+        raise HTTPException(status_code=422, detail={"message": str(e), "reasons": e.reasons})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/order-book")
-async def get_order_book(days: int = 3):
+async def get_order_book(request: Request, response: Response, days: int = 3, since_version: Optional[int] = None):
     """
     Fetch orders from order book.
     
     Args:
         days: Number of days to fetch orders for (default: 3)
               Use 0 or negative for all orders
+        since_version: Return only orders changed after this version
+                       (the "version" field of a previous response); a
+                       version from before a backend restart gets the full book
+    
+    Full responses carry an ETag; polls sending it back in If-None-Match
+    get 304 Not Modified while nothing has changed.
     
     Per official documentation: GET /quick/user/orders
     """
     try:
-        result = await order_service.get_order_book(days=days)
-        return result
+        result = await order_service.get_order_book(days=days, since_version=since_version)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The day is part of the tag: the days window moves at midnight; the boot
+    # keeps tags of a previous process from matching after a restart
+    etag = f'W/"{result["boot"]}-{result["version"]}-{days}-{date.today().isoformat()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if since_version is None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return result
+
+@router.get("/history")
+async def get_order_history(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    symbol: Optional[str] = None,
+    product: Optional[str] = None,
+    days: int = 0,
+):
+    """
+    Order history, newest first, one page at a time.
+    
+    Args:
+        limit: Page size (max HISTORY_PAGE_MAX)
+        cursor: "next_cursor" of the previous page
+        status: Comma-separated statuses (e.g. "complete,rejected")
+        symbol: Only this trading symbol
+        product: Only this product (CNC, MIS, NRML, ...)
+        days: Only the last N days (0 for all)
+    """
+    statuses = [s.strip() for s in status.split(",") if s.strip()] if status else None
+    try:
+        return await order_service.get_order_history(
+            limit=limit, cursor=cursor, statuses=statuses,
+            trading_symbol=symbol, product=product, days=days
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/tracking/{order_id}")
+async def get_tracked_order(order_id: str):
+    """
+    Latest status of an order placed in this session, as seen by the
+    background tracker (the same data is pushed as websocket order_update).
+    """
+    state = order_tracker.get_state(order_id)
+    if not state:
+        raise HTTPException(status_code=404, detail=f"Order {order_id} is not being tracked")
+    return state
+
+@router.get("/latency")
+async def get_latency(operation: Optional[str] = None, window_s: Optional[float] = None):
+    """
+    Per-stage latency percentiles (p50/p95/p99/max, ms) for the order path
+    over a rolling window (LATENCY_WINDOW_S unless window_s is given).
+    
+    Operations: place_order, place_order_leg, modify_order, cancel_order,
+    order_tracking (background DB save, confirmation, status updates).
+    """
+    return latency_recorder.summary(operation=operation, window_s=window_s)
+
 @router.get("/trade-book")
-async def get_trade_book():
+async def get_trade_book(
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    symbol: Optional[str] = None,
+    order_id: Optional[str] = None,
+    product: Optional[str] = None,
+):
+    """
+    Executed trades, newest first, served from the local fills table
+    (synced incrementally with GET /quick/user/trades).
+    
+    Args:
+        limit: Page size (max FILLS_PAGE_MAX)
+        cursor: "next_cursor" of the previous page
+        symbol: Only fills for this trading symbol
+        order_id: Only fills of this order
+        product: Only fills for this product
+    """
+    try:
+        return await fill_store.trade_book(
+            limit=limit, cursor=cursor, trading_symbol=symbol, order_id=order_id, product=product
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/fills/stats")
+async def get_fill_stats(days: int = 30, symbol: Optional[str] = None):
     """
-    Fetch all executed trades.
-    Per official documentation: GET /quick/user/trades
+    Per-symbol fill stats (quantities, average prices, turnover) and
+    realized P&L over the last N days (0 or negative for all fills).
     """
     try:
-        result = await order_service.get_trade_book()
-        return result
+        return await fill_store.fill_stats(days=days, trading_symbol=symbol)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/modify")
-async def modify_order(request: ModifyOrderRequest):
+async def modify_order(request: ModifyOrderRequest, debug: bool = False):
     try:
-        await order_service.modify_order(request)
+        result = await order_service.modify_order(request, debug=debug)
+        if debug:
+            return {"message": "Order modified", "debug": result.get("debug")}
         return {"message": "Order modified"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{order_id}")
-async def cancel_order(order_id: str):
+async def cancel_order(order_id: str, debug: bool = False):
     try:
-        await order_service.cancel_order(order_id)
+        result = await order_service.cancel_order(order_id, debug=debug)
+        if debug:
+            return {"message": "Order cancelled", "debug": result.get("debug")}
         return {"message": "Order cancelled"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 class PlaceOrderRequest(BaseModel):
     """
@@ -37,6 +37,25 @@ class PlaceOrderRequest(BaseModel):
             }
         }
 
+class BasketOrderRequest(BaseModel):
+    """
+    Basket of orders placed together (e.g. multi-leg options strategy).
+    All legs are validated before any is sent.
+    """
+    orders: List[PlaceOrderRequest] = Field(min_length=1, max_length=20, description="Order legs")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "orders": [
+                    {"trading_symbol": "BEL-EQ", "transaction_type": "BUY", "order_type": "MARKET",
+                     "product_type": "CNC", "quantity": 1},
+                    {"trading_symbol": "ITC-EQ", "transaction_type": "BUY", "order_type": "MARKET",
+                     "product_type": "CNC", "quantity": 1}
+                ]
+            }
+        }
+
 class OrderResponse(BaseModel):
     order_number: str
     status: str
@@ -1,13 +1,20 @@
-from app.core.http_client import http_client
+from app.core.broker_gateway import broker_gateway
+from app.core.latency import LatencyTrace, latency_recorder
 from app.core.logger import logger
 from app.orders.schemas import PlaceOrderRequest, ModifyOrderRequest
-from app.core.exceptions import OrderError, KotakAPIError
+from app.core.exceptions import OrderError, OrderValidationError, KotakAPIError
+from app.orders.validation import session_warnings, validate_order
 from app.scripmaster.service import scrip_master
 from app.utils import cache
 import httpx
 import json
 import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+from app.config import get_settings
+
+settings = get_settings()
 
 class OrderService:
     # Exchange segment mapping
@@ -35,14 +42,72 @@ class OrderService:
         "SELL": "S"
     }
     
-    async def get_order_book(self, days: int = 3):
+    def __init__(self):
+        # Short-TTL cache of today's Kotak order book: (fetched_at, result, nOrdNo index).
+        # Concurrent callers share one in-flight fetch; writes bump the epoch so
+        # a fetch started before a place/modify/cancel is never cached after it.
+        self._book: Optional[Tuple[float, dict, Dict[str, dict]]] = None
+        self._book_task: Optional[asyncio.Task] = None
+        self._book_epoch = 0
+    
+    def invalidate_order_book(self):
+        """Drop the cached order book (call after any order write)."""
+        self._book = None
+        self._book_task = None
+        self._book_epoch += 1
+        from app.orders.state_store import order_state_store
+        order_state_store.mark_stale()
+        # Margins (and positions, once filled) change with our orders
+        from app.portfolio.service import portfolio_service
+        portfolio_service.invalidate()
+    
+    async def cached_order_book(self) -> Tuple[dict, Dict[str, dict]]:
+        """
+        Today's Kotak order book and its nOrdNo -> order index.
+        
+        The returned objects are shared between callers and must not be mutated.
+        """
+        book = self._book
+        if book and time.monotonic() - book[0] < settings.ORDER_BOOK_CACHE_TTL:
+            return book[1], book[2]
+        
+        if self._book_task is None:
+            task = asyncio.ensure_future(self._download_order_book(self._book_epoch))
+            task.add_done_callback(lambda t: setattr(self, "_book_task", None) if self._book_task is t else None)
+            self._book_task = task
+        # shield: one caller being cancelled must not cancel the shared fetch
+        return await asyncio.shield(self._book_task)
+    
+    async def _download_order_book(self, epoch: int) -> Tuple[dict, Dict[str, dict]]:
+        _, _, base_url, _ = cache.get_trade_session()
+        response = await broker_gateway.get(
+            f"{base_url}/quick/user/orders",
+            endpoint="book"
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        orders = result.get("data")
+        index = {o["nOrdNo"]: o for o in orders if o.get("nOrdNo")} if isinstance(orders, list) else {}
+        if epoch == self._book_epoch:
+            self._book = (time.monotonic(), result, index)
+        return result, index
+    
+    async def find_order(self, order_id: str) -> Optional[dict]:
+        """Look up one of today's orders by nOrdNo."""
+        _, index = await self.cached_order_book()
+        return index.get(order_id)
+    
+    async def get_order_book(self, days: int = 3, since_version: Optional[int] = None):
         """
         Fetch orders from order book with date filtering.
-        Merges today's Kotak orders with historical orders from local database.
+        Served from the order state store: today's Kotak orders merged with
+        historical orders from the local database, synced incrementally.
         
         Args:
             days: Number of days to fetch orders for (default: 3)
                   Use 0 or negative for all orders
+            since_version: Only return orders changed after this store version
         
         Per official documentation: GET /quick/user/orders (only returns today's orders)
         """
@@ -51,90 +116,77 @@ class OrderService:
         if not trade_token or not trade_sid or not base_url:
             raise OrderError("Not authenticated. Please complete TOTP + MPIN login first.")
         
-        url = f"{base_url}/quick/user/orders"
-        
-        logger.info(f"GET {url} (fetching today + DB historical for last {days} days)")
+        from app.orders.state_store import order_state_store
         
         try:
-            # STEP 1: Get TODAY's orders from Kotak API (live, current status)
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    url,
-                    headers={
-                        "Auth": trade_token,
-                        "sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
-                )
-                response.raise_for_status()
-                
-                kotak_result = response.json()
-                logger.info(f"Kotak order book status: {kotak_result.get('stat')}")
-                
-                kotak_orders = kotak_result.get('data', [])
-                kotak_order_ids = {order.get('nOrdNo') for order in kotak_orders if order.get('nOrdNo')}
-                
-                logger.info(f"Kotak returned {len(kotak_orders)} orders (today)")
-            
-            # STEP 2: Get HISTORICAL orders from local database (if days > 0)
-            db_orders = []
-            if days > 0:
-                try:
-                    from app.database.order_repository import order_repository
-                    cutoff_date = datetime.now() - timedelta(days=days)
-                    db_orders = await order_repository.get_orders_by_date_range(
-                        cutoff_date,
-                        datetime.now()
-                    )
-                    logger.info(f"Database returned {len(db_orders)} historical orders")
-                except Exception as db_error:
-                    logger.warning(f"Failed to fetch historical orders from DB: {db_error}")
-            
-            # STEP 3: MERGE orders (Kotak takes precedence for today, DB fills historical)
-            merged_orders = []
-            
-            # Add all Kotak orders (today's data with live status)
-            merged_orders.extend(kotak_orders)
-            
-            # Add DB orders that are NOT in Kotak (historical orders)
-            for db_order in db_orders:
-                order_id = db_order.get('order_id')
-                if order_id and order_id not in kotak_order_ids:
-                    # Convert DB format to Kotak API format
-                    merged_orders.append({
-                        'nOrdNo': db_order.get('order_id'),
-                        'trdSym': db_order.get('trading_symbol'),
-                        'qty': db_order.get('quantity'),
-                        'prc': str(db_order.get('price', 0)),
-                        'ordSt': db_order.get('status', 'UNKNOWN'),
-                        'trnsTp': db_order.get('transaction_type'),
-                        'prcTp': db_order.get('order_type'),
-                        'prod': db_order.get('product'),
-                        'ordDtTm': db_order.get('order_datetime'),
-                        'exSeg': db_order.get('exchange'),
-                        '_source': 'database'  # Mark as DB source for debugging
-                    })
-            
-            logger.info(f"Merged result: {len(kotak_orders)} Kotak + {len(merged_orders) - len(kotak_orders)} DB = {len(merged_orders)} total")
-            
-            # Return in Kotak API format
-            return {
-                "stat": kotak_result.get("stat", "Ok"),
-                "data": merged_orders
-            }
-                
+            await order_state_store.sync()
         except httpx.HTTPStatusError as e:
             logger.error(f"Order book fetch failed: Status {e.response.status_code}")
             logger.error(f"Full response: {e.response.text}")
             
-            # TEMPORARY: Return Empty List on failure
-            if e.response.status_code == 424 or "bridge API error" in e.response.text:
-                 return { "stat": "Ok", "data": [] }
-                 
-            raise OrderError(f"Failed to fetch order book: {e.response.text}")
+            # Bridge errors: serve the last known state instead of failing the poll
+            if not (e.response.status_code == 424 or "bridge API error" in e.response.text):
+                raise OrderError(f"Failed to fetch order book: {e.response.text}")
         except Exception as e:
             logger.error(f"Order book fetch failed: {str(e)}")
             raise OrderError(str(e))
+        
+        return order_state_store.snapshot(days=days, since_version=since_version)
+    
+    async def get_order_history(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        statuses: Optional[List[str]] = None,
+        trading_symbol: Optional[str] = None,
+        product: Optional[str] = None,
+        days: int = 0,
+    ) -> dict:
+        """
+        One page of order history (Kotak order book format), newest first.
+        
+        Served from order_history with keyset pagination, so response size and
+        latency don't depend on how much history the account has.
+        
+        Args:
+            limit: Page size (capped at HISTORY_PAGE_MAX)
+            cursor: next_cursor of the previous page
+            statuses: Only these statuses (case-insensitive)
+            trading_symbol / product: Only this symbol / product
+            days: Only the last N days (0 or negative for all)
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        from app.database.order_repository import order_repository
+        from app.orders.state_store import db_to_broker_format, order_state_store
+        
+        # Best effort: persist today's broker orders first (cheap while the store is fresh)
+        if cache.get_trade_session()[0]:
+            try:
+                await order_state_store.sync()
+            except Exception as e:
+                logger.warning(f"Order history: broker sync skipped: {e}")
+        
+        start_epoch = None
+        if days > 0:
+            start_epoch = int((datetime.now() - timedelta(days=days)).replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ).timestamp())
+        
+        orders, next_cursor = await order_repository.get_orders_page(
+            limit=max(1, min(limit, settings.HISTORY_PAGE_MAX)),
+            cursor=cursor,
+            statuses=statuses,
+            trading_symbol=trading_symbol,
+            product=product,
+            start_epoch=start_epoch,
+        )
+        return {
+            "stat": "Ok",
+            "data": [db_to_broker_format(order) for order in orders],
+            "next_cursor": next_cursor,
+        }
     
     async def get_trade_book(self):
         """
@@ -151,21 +203,16 @@ class OrderService:
         logger.info(f"GET {url}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    url,
-                    headers={
-                        "Auth": trade_token,
-                        "sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
-                )
-                response.raise_for_status()
+            response = await broker_gateway.get(
+                url,
+                endpoint="book"
+            )
+            response.raise_for_status()
                 
-                result = response.json()
-                logger.info(f"Trade book status: {result.get('stat')}")
+            result = response.json()
+            logger.info(f"Trade book status: {result.get('stat')}")
                 
-                return result
+            return result
                 
         except httpx.HTTPStatusError as e:
             logger.error(f"Trade book fetch failed: Status {e.response.status_code}")
@@ -175,53 +222,47 @@ class OrderService:
             logger.error(f"Trade book fetch failed: {str(e)}")
             raise OrderError(str(e))
     
-    async def _verify_order_in_orderbook(self, order_number: str, base_url: str, trade_token: str, trade_sid: str, max_retries: int = 3) -> dict:
-        """Verify order in order book with retry logic."""
-        url = f"{base_url}/quick/user/orders"
-        
-        for attempt in range(max_retries):
-            try:
-                logger.info(f"Checking order book (attempt {attempt + 1}/{max_retries})")
-                
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(
-                        url,
-                        headers={
-                            "Auth": trade_token,
-                            "sid": trade_sid,
-                            "neo-fin-key": "neotradeapi"
-                        }
-                    )
-                    response.raise_for_status()
-                    
-                    order_book = response.json()
-                    
-                    # Search for order in order book
-                    if "data" in order_book and isinstance(order_book["data"], list):
-                        for order in order_book["data"]:
-                            if order.get("nOrdNo") == order_number:
-                                return {
-                                    "found": True,
-                                    "status": order.get("ordSt", "UNKNOWN"),
-                                    "message": order.get("rejRsn", "")
-                                }
-                
-                # Order not found, retry after delay (except last attempt)
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2)
-                    
-            except Exception as e:
-                logger.error(f"Order book check failed: {str(e)}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2)
+    async def place_order(self, order: PlaceOrderRequest, debug: bool = False) -> dict:
+        """
+        Places an order and returns once the OMS accepts it (status is tracked in the background).
         
-        return {"found": False, "status": None, "message": "Order not found in order book"}
-    
-    async def place_order(self, order: PlaceOrderRequest) -> dict:
-        """Places an order and verifies via order book."""
+        Each stage is timed into the latency recorder; with debug=True the
+        per-stage breakdown is also returned under result["debug"].
+        """
         logger.info(f"Placing order: {order.trading_symbol}")
+        trace = latency_recorder.trace("place_order")
         
-        # Get trade session from cache
+        try:
+            base_url = self._require_trade_session()
+        
+            # Get scrip details
+            with trace.span("scrip_lookup"):
+                scrip = await scrip_master.get_scrip_async(order.trading_symbol)
+            if not scrip:
+                raise OrderError(f"Symbol not found in scrip master: {order.trading_symbol}")
+        
+            # Pre-trade validation: reject locally what the OMS would reject
+            with trace.span("validation"):
+                reasons = validate_order(order, scrip)
+                warnings = session_warnings(order, scrip)
+            if reasons:
+                raise OrderValidationError(reasons)
+            for warning in warnings:
+                logger.warning(f"⚠️ {order.trading_symbol}: {warning['message']}")
+        
+            result = await self._submit_order(base_url, order, scrip, trace)
+            if warnings:
+                result["warnings"] = warnings
+        finally:
+            trace.finish()
+        
+        logger.info(f"⏱️ place_order {order.trading_symbol}: {trace.total_ms:.1f}ms {trace.as_dict()['stages_ms']}")
+        if debug:
+            result["debug"] = {"latency": trace.as_dict()}
+        return result
+    
+    def _require_trade_session(self) -> str:
+        """Return the trade session base URL, or raise if not logged in."""
         trade_token, trade_sid, base_url, _ = cache.get_trade_session()
         
         if not trade_token or not trade_sid:
@@ -230,15 +271,10 @@ class OrderService:
         if not base_url:
             raise OrderError("Base URL not available. Please re-authenticate.")
         
-        # Validate order
-        if order.quantity <= 0:
-            raise OrderError("Quantity must be greater than 0")
-        
-        # Get scrip details
-        scrip = scrip_master.get_scrip(order.trading_symbol)
-        if not scrip:
-            raise OrderError(f"Symbol not found in scrip master: {order.trading_symbol}")
-        
+        return base_url
+    
+    def _build_order_payload(self, order: PlaceOrderRequest, scrip: dict) -> Tuple[dict, str]:
+        """Map an order onto the OMS jData payload. Returns (payload, exchange)."""
         instrument_token = scrip.get("instrumentToken", "")
         raw_segment = scrip.get("exchangeSegment", "nse_cm")
         
@@ -258,9 +294,6 @@ class OrderService:
             if order.product_type == "NRML":
                 product_code = "CNC"
         
-        # Build OMS endpoint
-        url = f"{base_url}/quick/order/rule/ms/place"
-        
         # Build OMS jData payload - EXACT format from Kotak documentation
         payload = {
             "am": "YES" if order.amo else "NO",
@@ -299,6 +332,18 @@ class OrderService:
             # product_code for BO in Kotak Neo is usually "B"
             payload["pc"] = "B"
         
+        return payload, exchange_segment
+    
+    async def _submit_order(self, base_url: str, order: PlaceOrderRequest, scrip: dict,
+                            trace: Optional[LatencyTrace] = None) -> dict:
+        """Send one validated order to the OMS and hand it to the tracker."""
+        trace = trace or latency_recorder.trace("submit_order")
+        with trace.span("payload_build"):
+            payload, exchange_segment = self._build_order_payload(order, scrip)
+        
+        # Build OMS endpoint
+        url = f"{base_url}/quick/order/rule/ms/place"
+        
         logger.info(f"POST {url}")
         logger.info(f"OMS jData: {json.dumps(payload)}")
         
@@ -306,95 +351,51 @@ class OrderService:
         form_data = {"jData": json.dumps(payload, separators=(',', ':'))}
         
         try:
-            # STEP 1: Place order using fresh client with form-encoded jData
-            async with httpx.AsyncClient(timeout=30.0) as oms_client:
-                response = await oms_client.post(
+            # STEP 1: Place order over the pooled gateway client with form-encoded jData
+            with trace.span("oms_post"):
+                response = await broker_gateway.post(
                     url,
                     data=form_data,  # Form-encoded, not JSON
-                    headers={
-                        "Auth": trade_token,
-                        "sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
+                    endpoint="order"
                 )
-                response.raise_for_status()
-                response.raise_for_status()
+            self.invalidate_order_book()
+            response.raise_for_status()
                 
-                oms_response = response.json()
-                logger.info(f"OMS response status: {oms_response.get('stat')}")
-                logger.info(f"OMS response status: {oms_response.get('stat')}")
+            oms_response = response.json()
+            logger.info(f"OMS response status: {oms_response.get('stat')}")
                 
-                # Check if order was accepted
-                if oms_response.get("stat") == "Ok" and "nOrdNo" in oms_response:
-                    order_number = oms_response["nOrdNo"]
-                    logger.info(f"Order accepted by OMS: {order_number}")
-                    
-                    # STEP 2: Verify in order book
-                    verification = await self._verify_order_in_orderbook(
-                        order_number, base_url, trade_token, trade_sid
-                    )
-                    
-                    # STEP 2.5: Save order to local database
-                    try:
-                        from app.database.order_repository import order_repository
-                        await order_repository.save_order({
-                            'order_id': order_number,
-                            'trading_symbol': order.trading_symbol,
-                            'quantity': order.quantity,
-                            'price': order.price if order.price else 0,
-                            'order_type': order.order_type,
-                            'transaction_type': order.transaction_type,
-                            'product': order.product_type,
-                            'status': verification.get("status", "PENDING"),
-                            'exchange': exchange_segment,
-                            'order_datetime': datetime.now().strftime('%d-%b-%Y %H:%M:%S'),
-                            'kotak_response': json.dumps(oms_response)
-                        })
-                    except Exception as db_error:
-                        logger.error(f"Failed to save order to database: {db_error}")
-                        # Don't fail the order placement if DB save fails
+            # Check if order was accepted
+            if oms_response.get("stat") == "Ok" and "nOrdNo" in oms_response:
+                order_number = oms_response["nOrdNo"]
+                logger.info(f"Order accepted by OMS: {order_number}")
                     
-                    # STEP 3: Determine final status
-                    if verification["found"]:
-                        oms_status = verification["status"]
-                        
-                        # SUCCESS cases
-                        if oms_status in ["OPEN", "AMO", "PENDING", "TRIGGER PENDING"]:
-                            return {
-                                "order_number": order_number,
-                                "oms_status": oms_status,
-                                "final_result": "SUCCESS",
-                                "message": f"Order placed successfully with status: {oms_status}"
-                            }
-                        
-                        # FAILURE cases
-                        elif oms_status in ["REJECTED", "CANCELLED"]:
-                            return {
-                                "order_number": order_number,
-                                "oms_status": oms_status,
-                                "final_result": "FAILURE",
-                                "message": verification["message"] or f"Order {oms_status.lower()}"
-                            }
-                        
-                        # Unknown status
-                        else:
-                            return {
-                                "order_number": order_number,
-                                "oms_status": oms_status,
-                                "final_result": "UNKNOWN",
-                                "message": f"Order in unexpected status: {oms_status}"
-                            }
-                    else:
-                        # Order not found in order book
-                        return {
-                            "order_number": order_number,
-                            "oms_status": "NOT_FOUND",
-                            "final_result": "FAILURE",
-                            "message": "OMS did not persist order (not found in order book)"
-                        }
-                else:
-                    # Order rejected by OMS
-                    raise OrderError(f"Order rejected: {json.dumps(oms_response)}")
+                # STEP 2: Hand off persistence and status confirmation to the
+                # background tracker; updates reach the frontend over websocket
+                from app.orders.tracker import order_tracker
+                with trace.span("tracker_handoff"):
+                    order_tracker.track(order_number, {
+                        'order_id': order_number,
+                        'trading_symbol': order.trading_symbol,
+                        'quantity': order.quantity,
+                        'price': order.price if order.price else 0,
+                        'order_type': order.order_type,
+                        'transaction_type': order.transaction_type,
+                        'product': order.product_type,
+                        'status': "PENDING",
+                        'exchange': exchange_segment,
+                        'order_datetime': datetime.now().strftime('%d-%b-%Y %H:%M:%S'),
+                        'kotak_response': json.dumps(oms_response)
+                    })
+                
+                return {
+                    "order_number": order_number,
+                    "oms_status": "PENDING",
+                    "final_result": "ACCEPTED",
+                    "message": "Order accepted by OMS; status updates follow over websocket"
+                }
+            else:
+                # Order rejected by OMS
+                raise OrderError(f"Order rejected: {json.dumps(oms_response)}")
             
         except httpx.HTTPStatusError as e:
             logger.error(f"Order placement failed: Status {e.response.status_code}")
@@ -406,12 +407,108 @@ class OrderService:
             logger.error(f"Order placement failed: {str(e)}")
             raise OrderError(str(e))
     
-    async def modify_order(self, request: ModifyOrderRequest):
+    async def place_basket(self, orders: List[PlaceOrderRequest]) -> dict:
+        """
+        Place a basket of orders (multi-leg strategy, rebalance) in one call.
+        
+        All legs pass pre-trade validation against the in-memory scrip data; if
+        any leg is invalid nothing is sent. Valid baskets are submitted
+        concurrently (BASKET_MAX_CONCURRENCY in flight, paced to
+        BASKET_RATE_PER_SEC) so the legs reach the OMS milliseconds apart.
+        
+        Returns:
+            Per-leg results plus a basket-level latency breakdown (ms)
+        """
+        started = time.perf_counter()
+        base_url = self._require_trade_session()
+        
+        # STEP 1: Validate every leg before sending any
+        scrips = await scrip_master.get_scrips_by_symbols_async([o.trading_symbol for o in orders])
+        reasons, warnings = [], []
+        for i, (order, scrip) in enumerate(zip(orders, scrips)):
+            if not scrip:
+                leg_reasons = [{"code": "UNKNOWN_SYMBOL", "field": "trading_symbol",
+                                "message": "Symbol not found in scrip master"}]
+            else:
+                leg_reasons = validate_order(order, scrip)
+                for warning in session_warnings(order, scrip):
+                    warnings.append({**warning, "leg": i, "message": f"leg {i} ({order.trading_symbol}): {warning['message']}"})
+            for reason in leg_reasons:
+                reasons.append({**reason, "leg": i, "message": f"leg {i} ({order.trading_symbol}): {reason['message']}"})
+        if reasons:
+            raise OrderValidationError(reasons)
+        validated = time.perf_counter()
+        
+        # STEP 2: Submit concurrently under the concurrency cap and rate limit
+        # Token-bucket pacing: one second's worth of legs goes out as a burst,
+        # later legs are spaced at the configured rate
+        semaphore = asyncio.Semaphore(settings.BASKET_MAX_CONCURRENCY)
+        rate = settings.BASKET_RATE_PER_SEC
+        burst = max(1, int(rate))
+        spacing = 1.0 / rate if rate > 0 else 0.0
+        
+        async def submit_leg(i: int, order: PlaceOrderRequest, scrip: dict) -> dict:
+            delay = validated + max(0, i - burst + 1) * spacing - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with semaphore:
+                sent_at = time.perf_counter()
+                leg = {
+                    "leg": i,
+                    "trading_symbol": order.trading_symbol,
+                    "sent_at_ms": round((sent_at - validated) * 1000, 2),
+                }
+                trace = latency_recorder.trace("place_order_leg")
+                try:
+                    leg.update(await self._submit_order(base_url, order, scrip, trace))
+                except Exception as e:
+                    leg.update({"final_result": "FAILURE", "message": str(e)})
+                finally:
+                    trace.finish()
+                leg["latency_ms"] = round((time.perf_counter() - sent_at) * 1000, 2)
+                return leg
+        
+        legs = await asyncio.gather(*[
+            submit_leg(i, order, scrip) for i, (order, scrip) in enumerate(zip(orders, scrips))
+        ])
+        finished = time.perf_counter()
+        
+        accepted = sum(1 for leg in legs if leg.get("final_result") == "ACCEPTED")
+        sent_offsets = [leg["sent_at_ms"] for leg in legs]
+        logger.info(f"Basket of {len(legs)} legs: {accepted} accepted in {(finished - started) * 1000:.1f}ms")
+        
+        return {
+            "total_legs": len(legs),
+            "accepted": accepted,
+            "failed": len(legs) - accepted,
+            "legs": legs,
+            "warnings": warnings,
+            "latency_ms": {
+                "validation": round((validated - started) * 1000, 2),
+                "submission": round((finished - validated) * 1000, 2),
+                "leg_spread": round(max(sent_offsets) - min(sent_offsets), 2),
+                "slowest_leg": max(leg["latency_ms"] for leg in legs),
+                "total": round((finished - started) * 1000, 2),
+            },
+        }
+    
+    async def modify_order(self, request: ModifyOrderRequest, debug: bool = False):
         """
         Modify an existing order.
         Per official documentation: POST /quick/order/vr/modify
         Requires fetching original order details from order book first.
+        With debug=True the per-stage latency breakdown is returned under "debug".
         """
+        trace = latency_recorder.trace("modify_order")
+        try:
+            result = await self._modify_order(request, trace)
+        finally:
+            trace.finish()
+        if debug:
+            result = {**result, "debug": {"latency": trace.as_dict()}}
+        return result
+    
+    async def _modify_order(self, request: ModifyOrderRequest, trace: LatencyTrace):
         trade_token, trade_sid, base_url, _ = cache.get_trade_session()
         
         if not trade_token or not trade_sid or not base_url:
@@ -421,31 +518,13 @@ class OrderService:
         
         # STEP 1: Fetch original order details from order book
         try:
-            order_book_url = f"{base_url}/quick/user/orders"
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                ob_response = await client.get(
-                    order_book_url,
-                    headers={
-                        "Auth": trade_token,
-                        "sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
-                )
-                ob_response.raise_for_status()
-                order_book = ob_response.json()
+            with trace.span("order_lookup"):
+                original_order = await self.find_order(request.order_id)
                 
-                # Find the order
-                original_order = None
-                if "data" in order_book and isinstance(order_book["data"], list):
-                    for order in order_book["data"]:
-                        if order.get("nOrdNo") == request.order_id:
-                            original_order = order
-                            break
+            if not original_order:
+                raise OrderError(f"Order {request.order_id} not found in order book")
                 
-                if not original_order:
-                    raise OrderError(f"Order {request.order_id} not found in order book")
-                
-                logger.info(f"Original order status: {original_order.get('ordSt')}")
+            logger.info(f"Original order status: {original_order.get('ordSt')}")
                 
         except Exception as e:
             raise OrderError(f"Failed to fetch order details: {str(e)}")
@@ -480,22 +559,19 @@ class OrderService:
         logger.info(f"Modify jData: {json.dumps(payload)}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
+            with trace.span("oms_post"):
+                response = await broker_gateway.post(
                     url,
                     data=form_data,
-                    headers={
-                        "Auth": trade_token,
-                        "sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
+                    endpoint="order"
                 )
-                response.raise_for_status()
+            self.invalidate_order_book()
+            response.raise_for_status()
                 
-                result = response.json()
-                logger.info(f"Modify response: {result.get('stat')}")
+            result = response.json()
+            logger.info(f"Modify response: {result.get('stat')}")
                 
-                return result
+            return result
                 
         except httpx.HTTPStatusError as e:
             logger.error(f"Order modification failed: Status {e.response.status_code}")
@@ -505,12 +581,23 @@ class OrderService:
             logger.error(f"Order modification failed: {str(e)}")
             raise OrderError(str(e))
     
-    async def cancel_order(self, order_id: str):
+    async def cancel_order(self, order_id: str, debug: bool = False):
         """
         Cancel an existing order.
         Per official documentation: POST /quick/order/cancel
         For AMO orders, trading symbol (ts) is required.
+        With debug=True the per-stage latency breakdown is returned under "debug".
         """
+        trace = latency_recorder.trace("cancel_order")
+        try:
+            result = await self._cancel_order(order_id, trace)
+        finally:
+            trace.finish()
+        if debug:
+            result = {**result, "debug": {"latency": trace.as_dict()}}
+        return result
+    
+    async def _cancel_order(self, order_id: str, trace: LatencyTrace):
         trade_token, trade_sid, base_url, _ = cache.get_trade_session()
         
         if not trade_token or not trade_sid or not base_url:
@@ -520,30 +607,12 @@ class OrderService:
         
         # STEP 1: Fetch order details to check if AMO
         try:
-            order_book_url = f"{base_url}/quick/user/orders"
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                ob_response = await client.get(
-                    order_book_url,
-                    headers={
-                        "Auth": trade_token,
-                        "sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
-                )
-                ob_response.raise_for_status()
-                order_book = ob_response.json()
-                
-                # Find the order
-                is_amo = False
-                trading_symbol = ""
-                if "data" in order_book and isinstance(order_book["data"], list):
-                    for order in order_book["data"]:
-                        if order.get("nOrdNo") == order_id:
-                            is_amo = (order.get("ordGenTp") == "AMO")
-                            trading_symbol = order.get("trdSym", "")
-                            break
+            with trace.span("order_lookup"):
+                order = await self.find_order(order_id) or {}
+            is_amo = (order.get("ordGenTp") == "AMO")
+            trading_symbol = order.get("trdSym", "")
                 
-                logger.info(f"Order is AMO: {is_amo}, symbol: {trading_symbol}")
+            logger.info(f"Order is AMO: {is_amo}, symbol: {trading_symbol}")
                 
         except Exception as e:
             logger.warning(f"Could not fetch order details: {str(e)}, will try cancel anyway")
@@ -568,22 +637,19 @@ class OrderService:
         logger.info(f"Cancel jData: {json.dumps(payload)}")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
+            with trace.span("oms_post"):
+                response = await broker_gateway.post(
                     url,
                     data=form_data,
-                    headers={
-                        "Auth": trade_token,
-                        "sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
+                    endpoint="order"
                 )
-                response.raise_for_status()
+            self.invalidate_order_book()
+            response.raise_for_status()
                 
-                result = response.json()
-                logger.info(f"Cancel response: {result.get('stat')}")
+            result = response.json()
+            logger.info(f"Cancel response: {result.get('stat')}")
                 
-                return result
+            return result
                 
         except httpx.HTTPStatusError as e:
             logger.error(f"Order cancellation failed: Status {e.response.status_code}")
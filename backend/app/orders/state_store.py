@@ -0,0 +1,184 @@
+"""
+In-memory order state store behind /orders/order-book.
+
+Holds every known order (today's broker order book plus recent history
+from order_history) keyed by order id. Each change bumps a global
+version and stamps the changed order with it, so the endpoint can answer
+an unchanged poll with 304 (ETag) or return only the orders changed
+since a client's last version. Versions (and ETags) carry the boot, so
+clients never match state from before a backend restart.
+
+The store is updated incrementally: background syncs against the shared
+order book cache, tracker status transitions and order writes (which
+mark the store stale). Orders whose broker state changed are written
+back through OrderRepository.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+from app.core.logger import logger
+
+settings = get_settings()
+
+ORDER_TIME_FORMAT = "%d-%b-%Y %H:%M:%S"
+
+
+def _order_timestamp(order: dict) -> Optional[float]:
+    try:
+        return datetime.strptime(str(order.get("ordDtTm")), ORDER_TIME_FORMAT).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def db_to_broker_format(db_order: dict) -> dict:
+    """Convert an order_history row to the Kotak order book format."""
+    return {
+        'nOrdNo': db_order.get('order_id'),
+        'trdSym': db_order.get('trading_symbol'),
+        'qty': db_order.get('quantity'),
+        'prc': str(db_order.get('price') or 0),
+        'ordSt': db_order.get('status', 'UNKNOWN'),
+        'trnsTp': db_order.get('transaction_type'),
+        'prcTp': db_order.get('order_type'),
+        'prod': db_order.get('product'),
+        'ordDtTm': db_order.get('order_datetime'),
+        'exSeg': db_order.get('exchange'),
+        '_source': 'database'  # Mark as DB source for debugging
+    }
+
+
+class OrderStateStore:
+    """Versioned order state keyed by nOrdNo."""
+
+    def __init__(self):
+        self._orders: Dict[str, dict] = {}
+        self._timestamps: Dict[str, Optional[float]] = {}
+        # Versions start at the boot time in microseconds, so those of another
+        # process (before a restart) never match or fall inside this one's range
+        self.boot_id = time.time_ns() // 1000
+        self.version = self.boot_id
+        self.stat = "Ok"
+        self._hydrated = False
+        self._stale = True
+        self._synced_at = 0.0
+        self._lock = asyncio.Lock()
+
+    # ---------- Updates ----------
+
+    def _put(self, order_id: str, order: dict) -> bool:
+        """Insert or replace an order; returns True (and bumps the version) if it changed."""
+        current = self._orders.get(order_id)
+        if current is not None:
+            if {k: v for k, v in current.items() if k != "_version"} == order:
+                return False
+        self.version += 1
+        self._orders[order_id] = {**order, "_version": self.version}
+        self._timestamps[order_id] = _order_timestamp(order)
+        return True
+
+    def apply_broker_order(self, order: dict) -> bool:
+        """Apply one order from a broker response (order book row)."""
+        order_id = order.get("nOrdNo")
+        return bool(order_id) and self._put(order_id, order)
+
+    def mark_stale(self):
+        """Force the next read to sync with the broker (call after order writes)."""
+        self._stale = True
+
+    async def _hydrate(self):
+        """Load recent history from order_history once."""
+        from app.database.order_repository import order_repository
+
+        try:
+            now = datetime.now()
+            db_orders = await order_repository.get_orders_by_date_range(
+                now - timedelta(days=settings.ORDER_STATE_HISTORY_DAYS), now
+            )
+        except Exception as db_error:
+            logger.warning(f"Failed to load historical orders from DB: {db_error}")
+            return
+        for db_order in db_orders:
+            order_id = db_order.get("order_id")
+            if order_id and order_id not in self._orders:
+                self._put(order_id, db_to_broker_format(db_order))
+        self._hydrated = True
+        logger.info(f"Order state store hydrated with {len(db_orders)} historical orders")
+
+    def _is_fresh(self) -> bool:
+        return not self._stale and time.monotonic() - self._synced_at < settings.ORDER_STATE_MAX_AGE
+
+    async def sync(self, force: bool = False):
+        """
+        Bring the store up to date with today's broker order book.
+
+        Cheap when called repeatedly: skipped while the store is fresh, and
+        concurrent callers share one sync (which itself reads the shared
+        order book cache).
+        """
+        if not force and self._is_fresh():
+            return
+        async with self._lock:
+            if not force and self._is_fresh():
+                return
+            if not self._hydrated:
+                await self._hydrate()
+
+            from app.orders.service import order_service
+            self._stale = False
+            try:
+                result, _ = await order_service.cached_order_book()
+            except Exception:
+                self._stale = True
+                raise
+            self._synced_at = time.monotonic()
+            self.stat = result.get("stat", "Ok")
+
+            orders = result.get("data") or []
+            changed = [order for order in orders if isinstance(order, dict) and self.apply_broker_order(order)]
+
+        if changed:
+            logger.info(f"Order state store: {len(changed)} order(s) changed -> version {self.version}")
+            from app.database.order_repository import order_repository
+            await order_repository.upsert_broker_orders(changed)
+
+    # ---------- Reads ----------
+
+    def snapshot(self, days: int = 3, since_version: Optional[int] = None) -> dict:
+        """
+        Orders in Kotak order book format, newest first.
+
+        Args:
+            days: Only orders from the last N days (0 or negative for all)
+            since_version: Only orders changed after this store version
+                (one from another boot gets the full book)
+        """
+        if since_version is not None and not self.boot_id <= since_version <= self.version:
+            since_version = None
+        cutoff = (datetime.now() - timedelta(days=days)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ).timestamp() if days > 0 else None
+
+        selected: List[tuple] = []
+        for order_id, order in self._orders.items():
+            if since_version is not None and order["_version"] <= since_version:
+                continue
+            ts = self._timestamps.get(order_id)
+            if cutoff is not None and ts is not None and ts < cutoff:
+                continue
+            selected.append((ts or 0.0, order))
+        selected.sort(key=lambda item: item[0], reverse=True)
+
+        return {
+            "stat": self.stat,
+            "data": [order for _, order in selected],
+            "version": self.version,
+            "boot": self.boot_id,
+            "full": since_version is None,
+        }
+
+
+order_state_store = OrderStateStore()
@@ -0,0 +1,152 @@
+"""
+Background order tracker.
+
+`place_order` acknowledges as soon as the OMS accepts an order; the tracker
+then persists it, follows its status in the (cached, shared) order book,
+records every transition in order_history and pushes it to frontend
+websocket clients as {"type": "order_update", "data": {...}}.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.config import get_settings
+from app.core.latency import latency_recorder
+from app.core.logger import logger
+
+settings = get_settings()
+
+# Kotak order statuses after which nothing changes
+TERMINAL_STATUSES = {"COMPLETE", "REJECTED", "CANCELLED"}
+
+
+class OrderTracker:
+    """Follows recently placed orders until they settle or tracking times out."""
+
+    POLL_INITIAL = 0.5  # seconds; doubles up to POLL_MAX
+    POLL_MAX = 5.0
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # order_number -> latest known state; dropped ORDER_TRACK_RETENTION after tracking ends
+        self.states: Dict[str, dict] = {}
+        self._expiry: Dict[str, asyncio.TimerHandle] = {}
+
+    def track(self, order_number: str, order_record: dict):
+        """Start tracking an order accepted by the OMS (non-blocking)."""
+        if order_number in self._tasks:
+            return
+        expiry = self._expiry.pop(order_number, None)
+        if expiry is not None:
+            expiry.cancel()
+        self.states[order_number] = {
+            "order_number": order_number,
+            "trading_symbol": order_record.get("trading_symbol"),
+            "status": order_record.get("status", "PENDING"),
+            "message": "",
+            "updated_at": datetime.now().isoformat(),
+        }
+        task = asyncio.create_task(self._run(order_number, order_record))
+        self._tasks[order_number] = task
+        task.add_done_callback(lambda _: self._finished(order_number))
+
+    def _finished(self, order_number: str):
+        """Tracking ended (settled or timed out): keep the state queryable for a while."""
+        self._tasks.pop(order_number, None)
+        self._expiry[order_number] = asyncio.get_running_loop().call_later(
+            settings.ORDER_TRACK_RETENTION, self._expire, order_number
+        )
+
+    def _expire(self, order_number: str):
+        self._expiry.pop(order_number, None)
+        self.states.pop(order_number, None)
+
+    def get_state(self, order_number: str) -> Optional[dict]:
+        return self.states.get(order_number)
+
+    async def _run(self, order_number: str, order_record: dict):
+        from app.database.order_repository import order_repository
+        from app.orders.service import order_service
+
+        started = time.perf_counter()
+        try:
+            await order_repository.save_order(order_record)
+        except Exception as db_error:
+            logger.error(f"Failed to save order to database: {db_error}")
+        latency_recorder.record("order_tracking", "db_save", (time.perf_counter() - started) * 1000)
+
+        deadline = time.monotonic() + settings.ORDER_TRACK_TIMEOUT
+        delay = self.POLL_INITIAL
+        last_status = order_record.get("status", "PENDING")
+        seen = False
+
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.POLL_MAX)
+            try:
+                order = await order_service.find_order(order_number)
+            except Exception as e:
+                logger.warning(f"Order tracker: order book check failed for {order_number}: {e}")
+                continue
+            if not order:
+                continue
+
+            if not seen:
+                # Acceptance -> first sighting in the order book (verification polling)
+                latency_recorder.record("order_tracking", "confirmation", (time.perf_counter() - started) * 1000)
+            seen = True
+            status = str(order.get("ordSt", "UNKNOWN")).upper()
+            if status != last_status:
+                last_status = status
+                await self._publish(order_number, status, order.get("rejRsn", ""), order)
+            if status in TERMINAL_STATUSES:
+                break
+
+        if not seen:
+            logger.warning(f"Order tracker: {order_number} never appeared in the order book")
+            await self._publish(order_number, "NOT_FOUND", "OMS did not persist order (not found in order book)")
+
+    async def _publish(self, order_number: str, status: str, message: str = "", order: Optional[dict] = None):
+        from app.database.order_repository import order_repository
+        from app.websocket.router import manager
+
+        state = self.states.setdefault(order_number, {"order_number": order_number})
+        state.update({
+            "status": status,
+            "message": message,
+            "updated_at": datetime.now().isoformat(),
+        })
+        if order:
+            state["filled_quantity"] = order.get("fldQty")
+            state["average_price"] = order.get("avgPrc")
+
+        logger.info(f"📬 Order {order_number} -> {status}")
+        if order:
+            from app.orders.state_store import order_state_store
+            order_state_store.apply_broker_order(order)
+        # A transition may come with new fills; pick them up on the next trade book read
+        from app.orders.fills import fill_store
+        fill_store.mark_stale()
+        # ... and may change positions, holdings and margins
+        from app.portfolio.service import portfolio_service
+        from app.portfolio.live import live_portfolio
+        portfolio_service.invalidate()
+        live_portfolio.mark_stale()
+        started = time.perf_counter()
+        await order_repository.update_order_status(order_number, status)
+        latency_recorder.record("order_tracking", "status_update", (time.perf_counter() - started) * 1000)
+        await manager.broadcast_all({"type": "order_update", "data": dict(state)})
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for expiry in self._expiry.values():
+            expiry.cancel()
+        self._expiry.clear()
+
+
+order_tracker = OrderTracker()
@@ -0,0 +1,116 @@
+"""
+Local pre-trade validation.
+
+Checks an order against its scrip master record (lot size, tick size,
+freeze quantity, expiry) before it is sent, so orders the OMS would reject
+fail in microseconds instead of after a broker round trip. Every failed
+check is reported, not just the first. Market-hours / AMO mismatches are
+only warnings (session_warnings): holidays aren't known locally.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from app.config import get_settings
+from app.orders.schemas import PlaceOrderRequest
+from app.utils.market_hours import IST, get_market_session_info
+
+settings = get_settings()
+
+PRICED_ORDER_TYPES = {"LIMIT", "SL", "SL-LMT"}
+TRIGGER_ORDER_TYPES = {"SL", "SL-LMT", "SL-M", "SL-MKT"}
+
+
+def _reason(code: str, field: str, message: str) -> dict:
+    return {"code": code, "field": field, "message": message}
+
+
+def _off_tick(value: float, tick: float) -> bool:
+    # Decimal avoids float artefacts like 101.15 % 0.05 != 0
+    return Decimal(str(value)) % Decimal(str(tick)) != 0
+
+
+def validate_order(order: PlaceOrderRequest, scrip: dict) -> List[dict]:
+    """
+    Validate an order against scrip master data.
+
+    Args:
+        order: Order to check
+        scrip: Scrip master record for order.trading_symbol
+
+    Returns:
+        List of structured reasons; empty when the order passes
+    """
+    reasons = []
+    quantity = order.quantity
+    lot_size = scrip.get("lotSize") or 1
+    tick = scrip.get("tickSize") or 0
+    freeze_qty = scrip.get("freezeQty") or 0
+
+    # Quantity: positive, whole lots, below the exchange freeze limit
+    if quantity <= 0:
+        reasons.append(_reason("QTY_NOT_POSITIVE", "quantity", "Quantity must be greater than 0"))
+    elif lot_size > 1 and quantity % lot_size:
+        reasons.append(_reason(
+            "QTY_NOT_LOT_MULTIPLE", "quantity",
+            f"Quantity {quantity} is not a multiple of lot size {lot_size}"
+        ))
+    if freeze_qty > 0 and quantity > freeze_qty:
+        reasons.append(_reason(
+            "QTY_ABOVE_FREEZE", "quantity",
+            f"Quantity {quantity} exceeds freeze quantity {freeze_qty}"
+        ))
+
+    # Prices: present where the order type needs them and on the tick grid
+    price = order.price or 0
+    trigger = order.trigger_price or 0
+    if order.order_type in PRICED_ORDER_TYPES and price <= 0:
+        reasons.append(_reason("PRICE_REQUIRED", "price", f"{order.order_type} orders need a price"))
+    if order.order_type in TRIGGER_ORDER_TYPES and trigger <= 0:
+        reasons.append(_reason("TRIGGER_REQUIRED", "trigger_price", f"{order.order_type} orders need a trigger price"))
+    if tick > 0:
+        if price > 0 and _off_tick(price, tick):
+            reasons.append(_reason("PRICE_OFF_TICK", "price", f"Price {price} is not a multiple of tick size {tick}"))
+        if trigger > 0 and _off_tick(trigger, tick):
+            reasons.append(_reason(
+                "TRIGGER_OFF_TICK", "trigger_price",
+                f"Trigger price {trigger} is not a multiple of tick size {tick}"
+            ))
+    if order.order_type in {"SL", "SL-LMT"} and price > 0 and trigger > 0:
+        if order.transaction_type == "BUY" and trigger > price:
+            reasons.append(_reason("TRIGGER_SIDE", "trigger_price", "Buy stop-loss trigger must not be above the limit price"))
+        elif order.transaction_type == "SELL" and trigger < price:
+            reasons.append(_reason("TRIGGER_SIDE", "trigger_price", "Sell stop-loss trigger must not be below the limit price"))
+
+    # Contract still live
+    expiry = scrip.get("expiryDateISO")
+    if expiry and (scrip.get("expiryEpoch") or 0) > 0:
+        today = datetime.now(IST).strftime("%Y-%m-%d")
+        if expiry < today:
+            reasons.append(_reason("CONTRACT_EXPIRED", "trading_symbol", f"Contract expired on {expiry}"))
+
+    return reasons
+
+
+def session_warnings(order: PlaceOrderRequest, scrip: dict, session: Optional[dict] = None) -> List[dict]:
+    """
+    Session / AMO consistency of an order.
+
+    Reported as warnings rather than rejections: the local session table
+    knows segment hours but not exchange holidays or special sessions, so
+    the OMS has the final say.
+
+    Returns:
+        List of structured warnings; empty when the order looks consistent
+    """
+    warnings = []
+    if not settings.ORDER_VALIDATE_MARKET_HOURS:
+        return warnings
+    segment = str(scrip.get("exchangeSegment") or "nse_cm")
+    session = session or get_market_session_info(segment)
+    if session["status"] == "CLOSED" and not order.amo:
+        warnings.append(_reason("MARKET_CLOSED", "amo", f"{segment} market looks closed; consider placing it as an AMO"))
+    elif session["status"] == "OPEN" and order.amo:
+        warnings.append(_reason("AMO_DURING_MARKET", "amo", f"{segment} market looks open; the OMS may reject an AMO"))
+    return warnings
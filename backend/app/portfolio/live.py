@@ -0,0 +1,509 @@
+"""
+Live portfolio valuation.
+
+Positions and holdings are loaded from the broker once (and again after our
+own fills or every PORTFOLIO_RESYNC_S), their instruments are streamed from
+the HSM feed, and every tick revalues only the rows of its instrument.
+Positions and holdings load independently: one failing keeps its last
+records (flagged "_fallback") and is retried after PORTFOLIO_RETRY_S.
+
+State is kept column-wise in numpy arrays, one row per position / holding:
+
+    qty       net quantity (negative when short)
+    avg       average price of the open quantity
+    factor    price -> value multiplier (lot multiplier x gen/prc ratios)
+    close     previous close (day change reference)
+    ltp       last traded price
+    realized  booked P&L of the row (constant until the next broker load)
+
+Per-row unrealized P&L, day change, exposure and market value follow from
+those columns, and per-kind totals are kept up to date by adding each tick's
+deltas. Changed rows are pushed to frontend websocket clients as
+{"type": "portfolio_update", "data": {...}} at most every
+PORTFOLIO_PUSH_INTERVAL_S.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.core.exceptions import KotakAPIError
+from app.core.logger import logger
+from app.portfolio.service import portfolio_service
+
+settings = get_settings()
+
+POSITION, HOLDING = 0, 1
+KIND_NAMES = ("position", "holding")
+
+
+def _num(record: dict, *keys: str) -> float:
+    """First present numeric field of a broker record (0.0 if none)."""
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                continue
+    return 0.0
+
+
+def _position_row(position: dict) -> Tuple[float, float, float, float]:
+    """
+    (qty, avg, factor, realized) of a Kotak position.
+    Total P&L = (sell amount - buy amount) + netQty * ltp * factor, split
+    into the booked part and the open quantity's part against its average.
+    """
+    factor = (
+        (_num(position, "multiplier") or 1.0)
+        * (_num(position, "genNum") or 1.0) / (_num(position, "genDen") or 1.0)
+        * (_num(position, "prcNum") or 1.0) / (_num(position, "prcDen") or 1.0)
+    )
+    if "flBuyQty" not in position and "netQty" in position:
+        # Already in net form (netQty / buyAvg / sellAvg)
+        qty = _num(position, "netQty")
+        avg = _num(position, "buyAvg") if qty >= 0 else _num(position, "sellAvg")
+        return qty, avg, factor, _num(position, "rpnl")
+
+    buy_qty = _num(position, "flBuyQty") + _num(position, "cfBuyQty")
+    sell_qty = _num(position, "flSellQty") + _num(position, "cfSellQty")
+    buy_amt = _num(position, "buyAmt") + _num(position, "cfBuyAmt")
+    sell_amt = _num(position, "sellAmt") + _num(position, "cfSellAmt")
+    qty = buy_qty - sell_qty
+    buy_avg = buy_amt / (buy_qty * factor) if buy_qty else 0.0
+    sell_avg = sell_amt / (sell_qty * factor) if sell_qty else 0.0
+    avg = buy_avg if qty > 0 else sell_avg if qty < 0 else 0.0
+    return qty, avg, factor, sell_amt - buy_amt + qty * avg * factor
+
+
+class LivePortfolio:
+    """Tick-driven valuation of the loaded positions and holdings."""
+
+    def __init__(self):
+        self._records: List[dict] = []
+        self._keys: List[str] = []  # rowId of each row
+        self._symbol_rows: Dict[str, np.ndarray] = {}
+        self._instrument_rows: Dict[Tuple[str, str], np.ndarray] = {}
+        self._feed: Dict[str, str] = {}  # tick symbol -> HSM subscription string
+        self._book_symbols: List[str] = []  # tick symbols, in instrument index order
+        self._row_instrument = np.zeros(0, dtype=np.intp)  # row -> instrument index
+        self.kind = np.zeros(0, dtype=np.int8)
+        self.qty = np.zeros(0)
+        self.avg = np.zeros(0)
+        self.factor = np.zeros(0)
+        self.close = np.zeros(0)
+        self.ltp = np.zeros(0)
+        self.realized = np.zeros(0)
+        # Per-row metrics and their per-kind totals (index POSITION / HOLDING)
+        self.unrealized = np.zeros(0)
+        self.day_change = np.zeros(0)
+        self.exposure = np.zeros(0)
+        self.value = np.zeros(0)
+        self.totals: Dict[str, np.ndarray] = {}
+        self._reset_totals()
+
+        self.loaded_at: Optional[float] = None  # last complete load
+        # Broker records per kind (None until that kind first loads) and the
+        # error of its last failed load
+        self._sources: List[Optional[List[dict]]] = [None, None]
+        self._errors: Dict[int, str] = {}
+        self._attempts = 0
+        self._next_load_at = 0.0
+        self.last_tick_at: Optional[float] = None
+        self.ticks = 0
+        # Order events since start / as of the last load
+        self._changes = 0
+        self._loaded_changes = 0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._load_task: Optional[asyncio.Task] = None
+        self._push_task: Optional[asyncio.Task] = None
+        self._dirty: set = set()
+        self._feed_attached = False
+
+    # ---------- Valuation ----------
+
+    def _reset_totals(self):
+        self.totals = {name: np.zeros(2) for name in ("unrealized", "day_change", "exposure", "value")}
+
+    def _metrics(self, rows) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(unrealized, day change, exposure, value) of the given rows."""
+        qty, factor, ltp, close = self.qty[rows], self.factor[rows], self.ltp[rows], self.close[rows]
+        priced = ltp > 0
+        price = np.where(priced, ltp, self.avg[rows])
+        unrealized = qty * (price - self.avg[rows]) * factor
+        day_change = np.where(priced & (close > 0), qty * (ltp - close) * factor, 0.0)
+        value = qty * price * factor
+        return unrealized, day_change, np.abs(value), value
+
+    def _revalue_all(self):
+        self.unrealized, self.day_change, self.exposure, self.value = self._metrics(slice(None))
+        for name in self.totals:
+            self.totals[name] = np.bincount(self.kind, weights=getattr(self, name), minlength=2)
+
+    def on_tick(self, tick: dict):
+        """HSM tick callback: revalue the rows of the ticking instrument."""
+        rows = self._symbol_rows.get(tick.get("symbol"))
+        if rows is None:
+            return
+        ltp = float(tick.get("ltp") or 0)
+        if ltp <= 0:
+            return
+        self.ltp[rows] = ltp
+        close = float(tick.get("close") or 0)
+        if close > 0:
+            self.close[rows] = close
+
+        kinds = self.kind[rows]
+        for name, new in zip(("unrealized", "day_change", "exposure", "value"), self._metrics(rows)):
+            column = getattr(self, name)
+            np.add.at(self.totals[name], kinds, new - column[rows])
+            column[rows] = new
+
+        self.ticks += 1
+        self.last_tick_at = time.time()
+        self._dirty.update(rows.tolist())
+
+    # ---------- Loading ----------
+
+    def mark_stale(self):
+        """Our own order activity changed the book: reload it in the background."""
+        if self._attempts == 0:
+            return
+        self._changes += 1
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+
+    async def _background_refresh(self):
+        try:
+            # Events arriving during a load trigger one more; failed loads are retried
+            while self._changes != self._loaded_changes:
+                if not await self.refresh():
+                    await asyncio.sleep(settings.PORTFOLIO_RETRY_S)
+        except Exception as e:
+            logger.warning(f"Live portfolio refresh failed: {e}")
+
+    async def ensure_loaded(self):
+        if (
+            self._attempts == 0
+            or time.time() >= self._next_load_at
+            or (self._changes != self._loaded_changes and not self._errors)
+        ):
+            # Concurrent readers share one load; a reader giving up on its
+            # deadline doesn't cancel it for the others
+            if self._load_task is None or self._load_task.done():
+                self._load_task = asyncio.create_task(self.refresh())
+            await asyncio.shield(self._load_task)
+
+    async def refresh(self) -> bool:
+        """
+        Load positions and holdings from the broker and rebuild the row arrays.
+
+        Each kind loads on its own: one that fails keeps its last records (or
+        the service's last snapshot) and is retried after PORTFOLIO_RETRY_S.
+        Only a complete load counts as current.
+
+        Returns:
+            True if both kinds loaded
+        """
+        started = self._attempts
+        async with self._lock:
+            if self._attempts != started:
+                return not self._errors  # another caller reloaded while we waited
+            changes = self._changes
+            results = await asyncio.gather(
+                portfolio_service.get_positions(), portfolio_service.get_holdings(),
+                return_exceptions=True,
+            )
+
+            errors: Dict[int, str] = {}
+            for kind, result in zip((POSITION, HOLDING), results):
+                if isinstance(result, Exception):
+                    errors[kind] = str(result) or type(result).__name__
+                    continue
+                if result.get("_fallback"):
+                    # The service's last real snapshot: better than nothing, but not current
+                    errors[kind] = result.get("_error") or "broker fetch failed"
+                self._sources[kind] = result.get("data") or []
+            self._errors = errors
+
+            if any(source is not None for source in self._sources):
+                await self._build(self._sources[POSITION] or [], self._sources[HOLDING] or [])
+            now = time.time()
+            self._attempts += 1
+            if errors:
+                logger.warning(f"Live portfolio: {', '.join(KIND_NAMES[k] for k in errors)} load failed, retrying")
+                self._next_load_at = now + settings.PORTFOLIO_RETRY_S
+            else:
+                self._loaded_changes = changes
+                self.loaded_at = now
+                self._next_load_at = now + settings.PORTFOLIO_RESYNC_S
+
+        await self._subscribe()
+        self._start_push()
+        return not errors
+
+    def require(self, *kinds: int):
+        """Raise KotakAPIError if any of the kinds has never loaded."""
+        for kind in kinds:
+            if self._sources[kind] is None:
+                raise KotakAPIError(
+                    f"Failed to load {KIND_NAMES[kind]}s from the broker: {self._errors.get(kind, 'not loaded')}"
+                )
+
+    async def _build(self, positions: List[dict], holdings: List[dict]):
+        from app.scripmaster.service import scrip_master
+
+        records, keys, instruments, rows = [], [], [], []
+        for position in positions:
+            qty, avg, factor, realized = _position_row(position)
+            segment = str(position.get("exSeg") or "").lower()
+            token = str(position.get("tok") or "")
+            records.append(position)
+            keys.append(f"position:{position.get('trdSym')}:{position.get('prod')}")
+            instruments.append((segment, token, position.get("trdSym")))
+            rows.append((POSITION, qty, avg, factor, 0.0, 0.0, realized))
+        for holding in holdings:
+            qty = _num(holding, "quantity", "holdQty")
+            segment = str(holding.get("exchangeSegment") or holding.get("exSeg") or "").lower()
+            token = str(holding.get("instrumentToken") or holding.get("tok") or "")
+            symbol = holding.get("symbol") or holding.get("trdSym") or holding.get("displaySymbol")
+            market_value = _num(holding, "mktValue")
+            records.append(holding)
+            keys.append(f"holding:{symbol}")
+            instruments.append((segment, token, symbol))
+            rows.append((
+                HOLDING, qty, _num(holding, "averagePrice", "avgPrc"),
+                _num(holding, "multiplier") or 1.0,
+                _num(holding, "closingPrice", "closePrice"),
+                market_value / qty if market_value and qty else 0.0,
+                0.0,
+            ))
+
+        # Ticks are keyed by the scrip master trading symbol of the token
+        scrips = await asyncio.gather(*(
+            scrip_master.get_scrip_by_token_async(token, segment) for segment, token, _ in instruments
+        ))
+        symbol_rows: Dict[str, List[int]] = {}
+        instrument_rows: Dict[Tuple[str, str], List[int]] = {}
+        feed: Dict[str, str] = {}
+        for index, ((segment, token, symbol), scrip) in enumerate(zip(instruments, scrips)):
+            tick_symbol = scrip["tradingSymbol"] if scrip else symbol
+            symbol_rows.setdefault(tick_symbol, []).append(index)
+            if segment and token:
+                instrument_rows.setdefault((segment, token), []).append(index)
+                feed[tick_symbol] = f"{segment}|{token}"
+
+        # Prices already streaming carry over to the reloaded book
+        previous = {
+            symbol: (float(self.ltp[rows[0]]), float(self.close[rows[0]]))
+            for symbol, rows in self._symbol_rows.items()
+        }
+
+        # Swapped in without an await in between, so ticks never see a mix
+        columns = np.array(rows, dtype=float).reshape(-1, 7)
+        self.kind = columns[:, 0].astype(np.int8)
+        self.qty, self.avg, self.factor, self.close, self.ltp, self.realized = (
+            columns[:, i].copy() for i in range(1, 7)
+        )
+        self._records, self._keys, self._feed = records, keys, feed
+        self._symbol_rows = {s: np.array(r, dtype=np.intp) for s, r in symbol_rows.items()}
+        self._instrument_rows = {i: np.array(r, dtype=np.intp) for i, r in instrument_rows.items()}
+        self._book_symbols = list(self._symbol_rows)
+        self._row_instrument = np.zeros(len(records), dtype=np.intp)
+        for index, rows in enumerate(self._symbol_rows.values()):
+            self._row_instrument[rows] = index
+        for symbol, rows in self._symbol_rows.items():
+            ltp, close = previous.get(symbol, (0.0, 0.0))
+            if ltp > 0:
+                self.ltp[rows] = ltp
+            if close > 0:
+                self.close[rows] = close
+        self._revalue_all()
+        if (self.ltp <= 0).any():
+            await self._seed_quotes()
+            self._revalue_all()
+        self._dirty.clear()
+        logger.info(
+            f"📊 Live portfolio loaded: {len(positions)} positions, {len(holdings)} holdings, "
+            f"{len(self._symbol_rows)} instruments"
+        )
+
+    async def _seed_quotes(self):
+        """One quotes call for prices until the first ticks arrive."""
+        if not self._instrument_rows:
+            return
+        from app.market.service import market_service
+        try:
+            quotes = await market_service.get_quotes([f"{s}|{t}" for s, t in self._instrument_rows])
+        except Exception as e:
+            logger.warning(f"Live portfolio: quote seed failed: {e}")
+            return
+        for quote in quotes if isinstance(quotes, list) else [quotes]:
+            rows = self._instrument_rows.get(
+                (str(quote.get("exchange") or "").lower(), str(quote.get("exchange_token") or ""))
+            )
+            if rows is None:
+                continue
+            ltp = _num(quote, "ltp")
+            close = _num(quote.get("ohlc") or {}, "close")
+            if ltp > 0:
+                self.ltp[rows] = ltp
+            if close > 0:
+                self.close[rows] = close
+
+    async def _subscribe(self):
+        # An empty book still releases what the previous one streamed
+        if not self._feed and not self._feed_attached:
+            return
+        from app.websocket.kotak_ws_hsm import kotak_hsm
+        from app.websocket.router import manager
+
+        if not self._feed_attached:
+            kotak_hsm.add_callback(self.on_tick)
+            self._feed_attached = True
+        await manager.subscribe_feed(list(self._feed.items()))
+
+    # ---------- Push ----------
+
+    def _start_push(self):
+        if self._push_task is None or self._push_task.done():
+            self._push_task = asyncio.create_task(self._push_loop())
+
+    async def _push_loop(self):
+        from app.websocket.router import manager
+
+        while True:
+            await asyncio.sleep(settings.PORTFOLIO_PUSH_INTERVAL_S)
+            if not self._dirty or not manager.active_connections:
+                continue
+            rows = sorted(self._dirty)
+            self._dirty.clear()
+            try:
+                await manager.broadcast_all({
+                    "type": "portfolio_update",
+                    "data": {"rows": [self._row_values(i) for i in rows], "totals": self.summary()},
+                })
+            except Exception as e:
+                logger.error(f"Live portfolio push failed: {e}")
+
+    async def stop(self):
+        tasks = [t for t in (self._push_task, self._refresh_task, self._load_task) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._push_task = self._refresh_task = self._load_task = None
+
+    # ---------- Views ----------
+
+    def _row_values(self, i: int) -> dict:
+        return {
+            "rowId": self._keys[i],
+            "kind": KIND_NAMES[self.kind[i]],
+            "ltp": round(float(self.ltp[i]), 2),
+            "unrealized": round(float(self.unrealized[i]), 2),
+            "dayChange": round(float(self.day_change[i]), 2),
+            "exposure": round(float(self.exposure[i]), 2),
+            "value": round(float(self.value[i]), 2),
+        }
+
+    def summary(self) -> dict:
+        """Per-kind totals: unrealized / realized P&L, day change, exposure, market value."""
+        realized = np.bincount(self.kind, weights=self.realized, minlength=2)
+        return {
+            KIND_NAMES[k]: {
+                "unrealized": round(float(self.totals["unrealized"][k]), 2),
+                "realized": round(float(realized[k]), 2),
+                "dayChange": round(float(self.totals["day_change"][k]), 2),
+                "exposure": round(float(self.totals["exposure"][k]), 2),
+                "value": round(float(self.totals["value"][k]), 2),
+            }
+            for k in (POSITION, HOLDING)
+        }
+
+    def book(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        The book netted per instrument: (tick symbols, units, market value),
+        units being quantity x price factor summed over its positions and holdings.
+        """
+        count = len(self._book_symbols)
+        units = np.bincount(self._row_instrument, weights=self.qty * self.factor, minlength=count)
+        value = np.bincount(self._row_instrument, weights=self.value, minlength=count)
+        return list(self._book_symbols), units, value
+
+    def _meta(self, *kinds: int) -> dict:
+        meta = {
+            "live": self.last_tick_at is not None,
+            "loadedAt": self.loaded_at,
+            "lastTickAt": self.last_tick_at,
+        }
+        errors = [self._errors[k] for k in kinds if k in self._errors]
+        if errors:
+            # Last loaded records, not current (same flags as PortfolioService)
+            meta.update({"_fallback": True, "_error": "; ".join(errors)})
+        return meta
+
+    async def get_positions(self) -> dict:
+        """Positions in broker format, with live netQty / averages / ltp / P&L fields."""
+        await self.ensure_loaded()
+        self.require(POSITION)
+        data = []
+        for i in np.flatnonzero(self.kind == POSITION):
+            qty = float(self.qty[i])
+            data.append({
+                **self._records[i],
+                "rowId": self._keys[i],
+                "netQty": int(qty) if qty.is_integer() else qty,
+                "buyAvg": round(float(self.avg[i]), 2) if qty >= 0 else None,
+                "sellAvg": round(float(self.avg[i]), 2) if qty < 0 else None,
+                "ltp": round(float(self.ltp[i]), 2),
+                "urmtom": round(float(self.unrealized[i]), 2),
+                "rpnl": round(float(self.realized[i]), 2),
+                "dayChange": round(float(self.day_change[i]), 2),
+            })
+        totals = self.summary()["position"]
+        return {
+            "stat": "Ok",
+            "stCode": 200,
+            "data": data,
+            "totalMtm": round(totals["unrealized"] + totals["realized"], 2),
+            "totals": totals,
+            **self._meta(POSITION),
+        }
+
+    async def get_holdings(self) -> dict:
+        """Holdings in broker format, with live ltp / mktValue / pnl / dayPnl fields."""
+        await self.ensure_loaded()
+        self.require(HOLDING)
+        data = [
+            {
+                **self._records[i],
+                "rowId": self._keys[i],
+                "ltp": round(float(self.ltp[i]), 2),
+                "mktValue": round(float(self.value[i]), 2),
+                "pnl": round(float(self.unrealized[i]), 2),
+                "dayPnl": round(float(self.day_change[i]), 2),
+            }
+            for i in np.flatnonzero(self.kind == HOLDING)
+        ]
+        totals = self.summary()["holding"]
+        return {
+            "stat": "Ok",
+            "stCode": 200,
+            "data": data,
+            "totalDayGain": totals["dayChange"],
+            "totals": totals,
+            **self._meta(HOLDING),
+        }
+
+    async def get_summary(self) -> dict:
+        await self.ensure_loaded()
+        self.require(POSITION, HOLDING)
+        return {"stat": "Ok", "data": self.summary(), "ticks": self.ticks, **self._meta(POSITION, HOLDING)}
+
+
+live_portfolio = LivePortfolio()
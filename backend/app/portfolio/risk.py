@@ -0,0 +1,273 @@
+"""
+Portfolio risk analytics.
+
+Positions and holdings (netted per instrument by the live portfolio) are
+valued against the daily candle store and analysed as one book:
+
+    exposure       gross / net / long / short market value
+    concentration  Herfindahl index, top-5 share, largest positions
+    beta           per symbol against RISK_BENCHMARK; portfolio beta and
+                   beta-adjusted exposure
+    VaR            historical 1-day VaR and expected shortfall at 95% / 99%
+    drawdown       of the current book replayed over the lookback window
+                   (percentages of its gross exposure)
+
+Everything past loading the candles is matrix arithmetic over the whole
+book. With C the (days x symbols) close matrix, R its daily returns and v
+the book's value per symbol at the last close, the scenario P&L is R @ v
+and the value path (C / C[-1]) @ v; betas come from one centered product
+of R with the benchmark's returns.
+
+R, C / C[-1] and the betas are computed once per trading day (and again
+once its session has closed, when today's candle is in). The result is
+cached until the book's quantities change; after a fill only the changed
+symbols' columns are applied (R[:, changed] @ dv) to the kept scenario P&L
+and value path. Options have no daily candles and are reported as uncovered
+(exposure only); futures are priced off their underlying's candles.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import get_settings
+from app.core.logger import logger
+from app.historical.candle_store import CANDLE_SEGMENT, candle_store, candle_symbol, trading_day
+from app.portfolio.live import HOLDING, POSITION, live_portfolio
+from app.utils.market_hours import session_over_today
+
+settings = get_settings()
+
+VAR_LEVELS = (0.95, 0.99)
+TOP_POSITIONS = 5
+MIN_BETA_OBSERVATIONS = 20
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+class RiskEngine:
+    """Risk metrics of the live book, cached per trading day and book."""
+
+    def __init__(self):
+        # Market data of the trading day and whether it had closed (columns = candle symbols)
+        self._day: Optional[Tuple[int, bool]] = None
+        self._symbols: List[str] = []
+        self._column: Dict[str, int] = {}
+        self._returns = np.zeros((0, 0))  # R: daily returns, 0 before a symbol's first candle
+        self._relative = np.zeros((0, 0))  # C / C[-1]
+        self._last = np.zeros(0)  # C[-1]
+        self._beta = np.zeros(0)
+
+        # Book state kept for incremental updates
+        self._units = np.zeros(0)
+        self._scenario_pnl = np.zeros(0)  # R @ v
+        self._path = np.zeros(0)  # (C / C[-1]) @ v
+
+        self._loaded: set = set()  # symbols asked for in the day's market data load
+        self._signature: Optional[Tuple] = None
+        self._result: Optional[dict] = None
+        self._lock = asyncio.Lock()
+        self.full_loads = 0
+        self.incremental_updates = 0
+
+    # ---------- Market data ----------
+
+    async def _load_market(self, symbols: List[str], day: Tuple[int, bool], resync: bool = False):
+        """Close matrix of the book's symbols and the benchmark -> R, C / C[-1], betas."""
+        benchmark = settings.RISK_BENCHMARK
+        names = list(dict.fromkeys([*symbols, benchmark]))
+        days, closes = await candle_store.closes(names, settings.RISK_LOOKBACK_DAYS, force_sync=resync)
+
+        if len(days) < 2:
+            closes = np.full((2, len(names)), np.nan)  # no returns: nothing is covered
+
+        listed = ~np.isnan(closes)
+        has_data = listed.any(axis=0)
+        # Back-fill each column to its first candle, so it carries no P&L before it
+        first = listed.argmax(axis=0)
+        filled = np.where(listed, closes, closes[first, np.arange(len(names))])
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            raw_returns = closes[1:] / closes[:-1] - 1  # NaN around missing candles
+            returns = np.nan_to_num(filled[1:] / filled[:-1] - 1)
+            relative = filled / filled[-1]
+
+        # Betas against the benchmark over the days both have returns
+        bench = names.index(benchmark)
+        market = raw_returns[:, bench]
+        valid = ~np.isnan(raw_returns) & ~np.isnan(market)[:, None]
+        observations = valid.sum(axis=0)
+        r = np.where(valid, raw_returns, 0.0)
+        m = np.where(valid, market[:, None], 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_r, mean_m = r.sum(axis=0) / observations, m.sum(axis=0) / observations
+            covariance = (r * m).sum(axis=0) / observations - mean_r * mean_m
+            variance = (m * m).sum(axis=0) / observations - mean_m * mean_m
+            beta = np.where(observations >= MIN_BETA_OBSERVATIONS, covariance / variance, np.nan)
+
+        keep = [j for j, name in enumerate(names) if has_data[j] and name in symbols]
+        self._symbols = [names[j] for j in keep]
+        self._column = {name: i for i, name in enumerate(self._symbols)}
+        self._returns = np.ascontiguousarray(returns[:, keep])
+        self._relative = np.ascontiguousarray(relative[:, keep])
+        self._last = filled[-1, keep]
+        self._beta = beta[keep]
+        self._units = np.zeros(len(keep))
+        self._scenario_pnl = np.zeros(self._returns.shape[0])
+        self._path = np.zeros(self._relative.shape[0])
+        self._day = day
+        self.full_loads += 1
+        logger.info(f"📐 Risk market data loaded: {len(keep)}/{len(symbols)} symbols, {len(days)} days")
+
+    def _apply(self, units: np.ndarray) -> int:
+        """Move the kept scenario P&L and value path to new per-symbol units."""
+        changed = np.flatnonzero(units != self._units)
+        if len(changed):
+            dv = (units[changed] - self._units[changed]) * self._last[changed]
+            self._scenario_pnl += self._returns[:, changed] @ dv
+            self._path += self._relative[:, changed] @ dv
+            self._units = units.copy()
+        return len(changed)
+
+    # ---------- Metrics ----------
+
+    def _compute(self, symbols: List[str], value: np.ndarray, uncovered: List[Tuple[str, float]]) -> dict:
+        long, short = value[value > 0].sum(), -value[value < 0].sum()
+        gross = long + short
+
+        weights = np.abs(value) / gross if gross else np.zeros_like(value)
+        order = np.argsort(-weights)[:TOP_POSITIONS]
+        top = [
+            {"symbol": symbols[i], "value": _round(value[i]), "weight": _round(weights[i], 4)}
+            for i in order
+        ]
+
+        v = self._units * self._last
+        betas = np.nan_to_num(self._beta)
+        beta_exposure = float(v @ betas)
+        net_covered = float(v.sum())
+
+        losses = -self._scenario_pnl
+        var = {}
+        if len(losses):
+            cutoffs = np.quantile(losses, VAR_LEVELS)
+            for level, cutoff in zip(VAR_LEVELS, cutoffs):
+                var[f"{round(level * 100)}"] = {
+                    "var": _round(cutoff),
+                    "expectedShortfall": _round(losses[losses >= cutoff].mean()),
+                }
+
+        drawdown = {"max": None, "maxPct": None, "current": None, "currentPct": None}
+        if len(self._path):
+            peak = np.maximum.accumulate(self._path)
+            drop = self._path - peak
+            worst = int(np.argmin(drop))
+            # Percentages of the covered gross exposure (a net short book has no positive peak)
+            covered_gross = float(np.abs(v).sum())
+            drawdown = {
+                "max": _round(drop[worst]),
+                "maxPct": _round(drop[worst] / covered_gross * 100) if covered_gross else None,
+                "current": _round(drop[-1]),
+                "currentPct": _round(drop[-1] / covered_gross * 100) if covered_gross else None,
+            }
+
+        return {
+            "exposure": {
+                "gross": _round(gross), "net": _round(long - short),
+                "long": _round(long), "short": _round(short),
+            },
+            "concentration": {
+                "hhi": _round(float(weights @ weights), 4),
+                "top5Share": _round(weights[order].sum(), 4),
+                "top": top,
+            },
+            "beta": {
+                "benchmark": settings.RISK_BENCHMARK,
+                "portfolio": _round(beta_exposure / net_covered, 3) if net_covered else None,
+                "betaExposure": _round(beta_exposure),
+                "bySymbol": {
+                    s: _round(self._beta[i], 3) for i, s in enumerate(self._symbols) if self._units[i]
+                },
+            },
+            "var": var,
+            "volatility": _round(self._scenario_pnl.std()) if len(self._scenario_pnl) > 1 else None,
+            "drawdown": drawdown,
+            "coverage": {
+                "coveredValue": _round(net_covered),
+                "lookbackDays": int(self._returns.shape[0]),
+                "uncovered": [{"symbol": s, "value": _round(v)} for s, v in uncovered],
+            },
+        }
+
+    # ---------- API ----------
+
+    async def get_risk(self, refresh: bool = False) -> dict:
+        """
+        Risk metrics of the current book.
+
+        Args:
+            refresh: Re-sync the daily candles and recompute from scratch
+        """
+        await live_portfolio.ensure_loaded()
+        live_portfolio.require(POSITION, HOLDING)
+        async with self._lock:
+            started = time.perf_counter()
+            symbols, units, value = live_portfolio.book()
+            day = trading_day()
+            # Today's close joins the candles once the session is over
+            market = (day, session_over_today(CANDLE_SEGMENT))
+
+            # Net units per candle symbol (futures add to their underlying)
+            held: Dict[str, float] = {}
+            uncovered: List[Tuple[str, float]] = []
+            for symbol, quantity, market_value in zip(symbols, units.tolist(), value.tolist()):
+                name = candle_symbol(symbol)
+                if name is None:
+                    if quantity:
+                        uncovered.append((symbol, market_value))
+                    continue
+                held[name] = held.get(name, 0.0) + quantity
+
+            signature = (market, tuple(sorted((s, q) for s, q in held.items() if q)))
+            if not refresh and self._result is not None and signature == self._signature:
+                return {**self._result, "mode": "cached"}
+
+            needed = [s for s, q in held.items() if q]
+            if refresh or market != self._day or any(s not in self._loaded for s in needed):
+                await self._load_market(needed, market, resync=refresh)
+                self._loaded = set(needed)
+                mode = "full"
+            else:
+                mode = "incremental"
+
+            per_symbol = np.zeros(len(self._symbols))
+            for name, quantity in held.items():
+                column = self._column.get(name)
+                if column is not None:
+                    per_symbol[column] = quantity
+                elif quantity:
+                    # No candles for it: exposure only
+                    uncovered.extend(
+                        (s, v) for s, v in zip(symbols, value.tolist()) if candle_symbol(s) == name
+                    )
+            changed = self._apply(per_symbol)
+            if mode == "incremental":
+                self.incremental_updates += 1
+
+            self._result = {
+                "stat": "Ok",
+                "data": self._compute(symbols, value, uncovered),
+                "asOf": day,
+                "computedAt": time.time(),
+                "changedSymbols": changed,
+                "latencyMs": round((time.perf_counter() - started) * 1000, 2),
+            }
+            self._signature = signature
+            return {**self._result, "mode": mode}
+
+
+risk_engine = RiskEngine()
@@ -1,15 +1,24 @@
+import asyncio
+import time
 from fastapi import APIRouter, HTTPException
 from app.portfolio.service import portfolio_service
+from app.portfolio.live import live_portfolio
+from app.portfolio.risk import risk_engine
 from app.scripmaster.service import scrip_master
 from app.core.exceptions import KotakAPIError
-from typing import List, Dict
+from app.config import get_settings
+from app.utils import cache
+from typing import Awaitable, List, Dict, Optional
+
+settings = get_settings()
 
 router = APIRouter(prefix="/portfolio", tags=["Portfolio"])
 
 @router.get("/positions")
 async def get_positions():
+    """Positions valued live on market ticks (urmtom / ltp / totalMtm are current)."""
     try:
-        data = await portfolio_service.get_positions()
+        data = await live_portfolio.get_positions()
         return data
     except KotakAPIError as e:
         if any(kw in str(e).lower() for kw in ["authenticated", "login", "session"]):
@@ -20,8 +29,9 @@ async def get_positions():
 
 @router.get("/holdings")
 async def get_holdings():
+    """Holdings valued live on market ticks (ltp / mktValue / pnl / dayPnl are current)."""
     try:
-        data = await portfolio_service.get_holdings()
+        data = await live_portfolio.get_holdings()
         return data
     except KotakAPIError as e:
         if any(kw in str(e).lower() for kw in ["authenticated", "login", "session"]):
@@ -43,3 +53,72 @@ async def get_limits():
         raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/live/summary")
+async def get_live_summary():
+    """Portfolio totals per kind: unrealized / realized P&L, day change, exposure, market value."""
+    try:
+        return await live_portfolio.get_summary()
+    except KotakAPIError as e:
+        if any(kw in str(e).lower() for kw in ["authenticated", "login", "session"]):
+            raise HTTPException(status_code=401, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/risk")
+async def get_risk(refresh: bool = False):
+    """
+    Risk of the whole book: exposure, concentration, beta vs NIFTY 50, historical
+    VaR / expected shortfall and drawdown. Cached per trading day until the book
+    changes; refresh=true re-syncs the daily candles and recomputes from scratch.
+    """
+    try:
+        return await risk_engine.get_risk(refresh=refresh)
+    except KotakAPIError as e:
+        if any(kw in str(e).lower() for kw in ["authenticated", "login", "session"]):
+            raise HTTPException(status_code=401, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _within_deadline(call: Awaitable, deadline_s: float):
+    """(result, error, elapsed ms) of one snapshot section."""
+    started = time.perf_counter()
+    try:
+        result, error = await asyncio.wait_for(call, timeout=deadline_s), None
+    except asyncio.TimeoutError:
+        result, error = None, f"Timed out after {deadline_s:g}s"
+    except Exception as e:
+        result, error = None, str(e) or type(e).__name__
+    return result, error, round((time.perf_counter() - started) * 1000, 1)
+
+@router.get("/snapshot")
+async def get_snapshot(deadline_s: Optional[float] = None):
+    """
+    Positions, holdings and limits in one document, fetched concurrently.
+    Each section has its own deadline; a section that fails or times out
+    is null and its reason is in "errors", the others are still returned.
+    stat is "Ok", "Partial" or "Not_Ok" (every section failed).
+    """
+    trade_token, trade_sid, base_url, _ = cache.get_trade_session()
+    if not trade_token or not trade_sid or not base_url:
+        raise HTTPException(status_code=401, detail="Not authenticated. Please complete TOTP + MPIN login first.")
+
+    deadline_s = min(max(deadline_s or settings.PORTFOLIO_SNAPSHOT_DEADLINE_S, 0.1), 30.0)
+    sections = {
+        "positions": live_portfolio.get_positions(),
+        "holdings": live_portfolio.get_holdings(),
+        "limits": portfolio_service.get_limits(),
+    }
+    results = await asyncio.gather(*(_within_deadline(call, deadline_s) for call in sections.values()))
+
+    snapshot = {"stat": "Ok", "errors": {}, "latency_ms": {}, "deadline_s": deadline_s}
+    for name, (result, error, elapsed_ms) in zip(sections, results):
+        snapshot[name] = result
+        snapshot["latency_ms"][name] = elapsed_ms
+        if error:
+            snapshot["errors"][name] = error
+    if snapshot["errors"]:
+        snapshot["stat"] = "Not_Ok" if len(snapshot["errors"]) == len(sections) else "Partial"
+    return snapshot
@@ -1,185 +1,165 @@
 from app.core.logger import logger
 from app.core.exceptions import KotakAPIError
+from app.config import get_settings
 from app.utils import cache
+from app.core.broker_gateway import broker_gateway
+from typing import Awaitable, Callable, Dict, Tuple
+import asyncio
+import json
+import time
 import httpx
 
+settings = get_settings()
+
 class PortfolioService:
+    """
+    Positions, holdings and limits behind a stale-while-revalidate cache.
+
+    A response younger than PORTFOLIO_CACHE_TTL is served as is; one younger
+    than PORTFOLIO_CACHE_MAX_STALE is served immediately while a background
+    refresh runs; anything older (or invalidated by our own order activity)
+    is fetched before returning. Concurrent callers share one in-flight
+    fetch per resource. Served responses carry "_age_s" (and "_stale" while
+    revalidating). When the broker call fails, the last real response is
+    returned marked "_fallback" with "_error"; with none, KotakAPIError.
+    """
+
+    def __init__(self):
+        # resource -> (fetched_at, result, usable); unusable entries are only fallbacks
+        self._cache: Dict[str, Tuple[float, dict, bool]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # Bumped by invalidate(), so fetches started before it are never cached
+        self._epoch = 0
+
+    def invalidate(self):
+        """Force the next reads to go to the broker (call after our own order activity)."""
+        self._epoch += 1
+        self._tasks.clear()
+        self._cache = {name: (fetched_at, result, False) for name, (fetched_at, result, _) in self._cache.items()}
+
+    @staticmethod
+    def _served(result: dict, fetched_at: float, **flags) -> dict:
+        return {**result, "_age_s": round(time.monotonic() - fetched_at, 3), **flags}
+
+    def _refresh(self, name: str, fetch: Callable[[], Awaitable[dict]]) -> asyncio.Task:
+        """Shared in-flight fetch of a resource (started if none is running)."""
+        task = self._tasks.get(name)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(name, fetch, self._epoch))
+            # Background refreshes may have no awaiting caller; their errors are logged in _fetch
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            task.add_done_callback(lambda t: self._tasks.pop(name, None) if self._tasks.get(name) is t else None)
+            self._tasks[name] = task
+        return task
+
+    async def _fetch(self, name: str, fetch: Callable[[], Awaitable[dict]], epoch: int) -> Tuple[float, dict]:
+        try:
+            result = await fetch()
+        except Exception as e:
+            logger.warning(f"⚠️  Portfolio {name} fetch failed: {e}")
+            raise
+        fetched_at = time.monotonic()
+        if epoch == self._epoch:
+            self._cache[name] = (fetched_at, result, True)
+        return fetched_at, result
+
+    async def _cached(self, name: str, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        entry = self._cache.get(name)
+        if entry and entry[2]:
+            fetched_at, result, _ = entry
+            age = time.monotonic() - fetched_at
+            if age < settings.PORTFOLIO_CACHE_TTL:
+                return self._served(result, fetched_at)
+            if age < settings.PORTFOLIO_CACHE_MAX_STALE:
+                self._refresh(name, fetch)
+                return self._served(result, fetched_at, _stale=True)
+
+        try:
+            # shield: one caller being cancelled must not cancel the shared fetch
+            fetched_at, result = await asyncio.shield(self._refresh(name, fetch))
+            return self._served(result, fetched_at)
+        except Exception as e:
+            error = f"Status {e.response.status_code}: {e.response.text}" if isinstance(e, httpx.HTTPStatusError) else str(e)
+            if entry:
+                # Last real snapshot instead of made-up values
+                logger.warning(f"⚠️  Kotak {name} API failed - serving last snapshot")
+                return self._served(entry[1], entry[0], _fallback=True, _error=error)
+            raise KotakAPIError(f"Failed to fetch {name}: {error}")
+
+    @staticmethod
+    def _session_base_url() -> str:
+        trade_token, trade_sid, base_url, _ = cache.get_trade_session()
+
+        if not trade_token or not trade_sid or not base_url:
+            raise KotakAPIError("Not authenticated. Please complete TOTP + MPIN login first.")
+        return base_url
+
     async def get_positions(self):
         """
         Fetch all positions for the current trading day.
         Per official documentation: GET /quick/user/positions
         """
-        trade_token, trade_sid, base_url, _ = cache.get_trade_session()
-        
-        if not trade_token or not trade_sid or not base_url:
-            raise KotakAPIError("Not authenticated. Please complete TOTP + MPIN login first.")
-        
-        url = f"{base_url}/quick/user/positions"
-        
-        logger.info(f"GET {url}")
-        
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    url,
-                    headers={
-                        "Auth": trade_token,
-                        "sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
-                )
-                response.raise_for_status()
-                
-                result = response.json()
-                logger.info(f"Positions status: {result.get('stat')}")
-                
-                return result
-                
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Positions fetch failed: Status {e.response.status_code}")
-            logger.error(f"Full response: {e.response.text}")
-            
-            # Return empty positions list as fallback (user has no shares/positions)
-            logger.warning("⚠️  Kotak positions API failed - returning empty list (no shares held)")
-            return { 
-                "stat": "Ok", 
-                "stCode": 200,
-                "data": [],
-                "_fallback": True,
-                "_note": "No positions - user account has no shares"
-            }
-        except Exception as e:
-            logger.error(f"Positions fetch failed: {str(e)}")
-            # Return empty list rather than raising exception
-            logger.warning("⚠️  Positions fetch error - returning empty list")
-            return { 
-                "stat": "Ok", 
-                "stCode": 200,
-                "data": [],
-                "_fallback": True
-            }
-    
+        url = f"{self._session_base_url()}/quick/user/positions"
+
+        async def fetch():
+            logger.info(f"GET {url}")
+            response = await broker_gateway.get(
+                url,
+                endpoint="portfolio"
+            )
+            response.raise_for_status()
+
+            result = response.json()
+            logger.info(f"Positions status: {result.get('stat')}")
+            return result
+
+        return await self._cached("positions", fetch)
+
     async def get_holdings(self):
         """
         Fetch portfolio holdings.
         Per official documentation: GET /portfolio/v1/holdings
         """
-        trade_token, trade_sid, base_url, _ = cache.get_trade_session()
-        
-        if not trade_token or not trade_sid or not base_url:
-            raise KotakAPIError("Not authenticated. Please complete TOTP + MPIN login first.")
-        
-        url = f"{base_url}/portfolio/v1/holdings"
-        
-        logger.info(f"GET {url}")
-        
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    url,
-                    headers={
-                        "Auth": trade_token,
-                        "sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
-                )
-                response.raise_for_status()
-                
-                result = response.json()
-                logger.info(f"Holdings fetch successful")
-                
-                return result
-                
-        except httpx.HTTPStatusError as e:
-            logger.error(f"Holdings fetch failed: Status {e.response.status_code}")
-            logger.error(f"Full response: {e.response.text}")
-            
-            # Return empty holdings list as fallback (user has no shares)
-            logger.warning("⚠️  Kotak holdings API failed - returning empty list (no holdings)")
-            return {
-                "stat": "Ok", 
-                "stCode": 200,
-                "data": [],
-                "_fallback": True,
-                "_note": "No holdings - user account has no shares"
-            }
-        except Exception as e:
-            logger.error(f"Holdings fetch failed: {str(e)}")
-            # Return empty list rather than raising exception
-            logger.warning("⚠️  Holdings fetch error - returning empty list")
-            return {
-                "stat": "Ok", 
-                "stCode": 200,
-                "data": [],
-                "_fallback": True
-            }
-    
+        url = f"{self._session_base_url()}/portfolio/v1/holdings"
+
+        async def fetch():
+            logger.info(f"GET {url}")
+            response = await broker_gateway.get(
+                url,
+                endpoint="portfolio"
+            )
+            response.raise_for_status()
+
+            result = response.json()
+            logger.info(f"Holdings fetch successful")
+            return result
+
+        return await self._cached("holdings", fetch)
+
     async def get_limits(self):
         """
         Fetch trading limits/margins.
         Per official documentation: POST /quick/user/limits
         """
-        trade_token, trade_sid, base_url, _ = cache.get_trade_session()
-        
-        if not trade_token or not trade_sid or not base_url:
-            raise KotakAPIError("Not authenticated. Please complete TOTP + MPIN login first.")
-        
-        url = f"{base_url}/quick/user/limits"
-        
-        logger.info(f"POST {url}")
-        
+        url = f"{self._session_base_url()}/quick/user/limits"
+
         # Default: fetch all limits
-        import json
         payload = {"seg": "ALL", "exch": "ALL", "prod": "ALL"}
         form_data = {"jData": json.dumps(payload)}
-        
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    url,
-                    data=form_data,
-                    headers={
-                        "Auth": trade_token,
-                        "Sid": trade_sid,
-                        "neo-fin-key": "neotradeapi"
-                    }
-                )
-                response.raise_for_status()
-                
-                result = response.json()
-                logger.info(f"Limits status: {result.get('stat')}")
-                
-                # PERSISTENT DEBUG LOGGING
-                with open("debug_limits.json", "w") as f:
-                    json.dump(result, f)
-                
-                return result
-                
-        except (httpx.HTTPStatusError, Exception) as e:
-            error_msg = str(e)
-            if isinstance(e, httpx.HTTPStatusError):
-                error_msg = f"Status {e.response.status_code}: {e.response.text}"
-                
-            logger.error(f"Limits fetch failed: {error_msg}")
-            
-            # FAIL-SAFE: Always return test data if API fails to keep Dashboard alive
-            logger.warning("⚠️  Kotak limits API failed - returning fallback data based on actual account")
-            return {
-                "stat": "Ok",
-                "stCode": 200,
-                "NotionalCash": "40.00",        # Opening cash balance (from actual account)
-                "Net": "40.00",                  # Available margin
-                "MarginUsed": "0.00",            # Currently used margin
-                "CollateralValue": "0.00",       # Margin from pledged shares
-                "AdhocMargin": "0.00",
-                "BoardLotLimit": "5000",
-                "Category": "CLIENT",
-                "SpanMarginPrsnt": "0",
-                "ExposureMarginPrsnt": "0",
-                "UnrealizedMtomPrsnt": "0",
-                "RealizedMtomPrsnt": "0",
-                "_fallback": True,
-                "_note": "Fallback data based on actual account snapshot 2026-01-24"
-            }
+
+        async def fetch():
+            logger.info(f"POST {url}")
+            response = await broker_gateway.post(
+                url,
+                data=form_data,
+                endpoint="portfolio"
+            )
+            response.raise_for_status()
+
+            result = response.json()
+            logger.info(f"Limits status: {result.get('stat')}")
+            return result
+
+        return await self._cached("limits", fetch)
 
 portfolio_service = PortfolioService()
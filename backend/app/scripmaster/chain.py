@@ -0,0 +1,173 @@
+"""
+Derivatives chain index for the scrip master.
+
+Groups option contracts by (underlying, segment, expiry) into strike-sorted
+rows carrying the CE/PE token pairs, so a whole chain (or an ATM window)
+is a single dictionary lookup instead of hundreds of per-symbol queries.
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Segment preference when an underlying trades on more than one exchange
+SEGMENT_PRIORITY = ["nse_fo", "bse_fo", "mcx_fo", "cde_fo"]
+
+ChainKey = Tuple[str, str, str]  # (UNDERLYING, segment, expiry ISO date)
+
+
+class OptionChainIndex:
+    """In-memory option chain index rebuilt after every scrip master load."""
+
+    # Column order expected by build()
+    COLUMNS = [
+        "companyName", "exchangeSegment", "expiryEpoch", "expiryDateISO",
+        "strikePrice", "optionType", "instrumentToken", "tradingSymbol", "lotSize"
+    ]
+
+    def __init__(self):
+        self._chains: Dict[ChainKey, List[dict]] = {}
+        self._strikes: Dict[ChainKey, List[float]] = {}
+        # UNDERLYING -> segment -> sorted expiry ISO dates
+        self._expiries: Dict[str, Dict[str, List[str]]] = {}
+        self.loaded = False
+
+    def build(self, rows: Iterable[tuple]) -> int:
+        """
+        Build the index from scrip rows in COLUMNS order.
+
+        The new structures are assembled off to the side and swapped in at
+        the end so concurrent readers never see a half-built chain.
+
+        Returns:
+            Number of option contracts indexed
+        """
+        chains: Dict[ChainKey, Dict[float, dict]] = {}
+        expiry_epochs: Dict[Tuple[str, str], Dict[str, int]] = {}
+        count = 0
+
+        for (underlying, segment, expiry_epoch, expiry_iso, strike,
+             option_type, token, symbol, lot_size) in rows:
+            if not underlying or not expiry_iso or strike is None:
+                continue
+            option_type = str(option_type).upper()
+            if option_type not in ("CE", "PE"):
+                continue
+
+            underlying = str(underlying).strip().upper()
+            segment = str(segment).lower()
+            key = (underlying, segment, expiry_iso)
+
+            strikes = chains.setdefault(key, {})
+            entry = strikes.get(strike)
+            if entry is None:
+                entry = strikes[strike] = {
+                    "strike": float(strike),
+                    "lotSize": int(lot_size) if lot_size else None,
+                    "CE": None,
+                    "PE": None,
+                }
+            entry[option_type] = {"token": str(token), "symbol": symbol}
+
+            expiry_epochs.setdefault((underlying, segment), {})[expiry_iso] = int(expiry_epoch or 0)
+            count += 1
+
+        sorted_chains = {}
+        sorted_strikes = {}
+        for key, strikes in chains.items():
+            ordered = [strikes[s] for s in sorted(strikes)]
+            sorted_chains[key] = ordered
+            sorted_strikes[key] = [e["strike"] for e in ordered]
+
+        expiries: Dict[str, Dict[str, List[str]]] = {}
+        for (underlying, segment), by_iso in expiry_epochs.items():
+            expiries.setdefault(underlying, {})[segment] = sorted(by_iso, key=lambda iso: (by_iso[iso], iso))
+
+        self._chains = sorted_chains
+        self._strikes = sorted_strikes
+        self._expiries = expiries
+        self.loaded = True
+        return count
+
+    def clear(self):
+        self._chains = {}
+        self._strikes = {}
+        self._expiries = {}
+        self.loaded = False
+
+    def underlyings(self) -> List[str]:
+        return sorted(self._expiries)
+
+    def _resolve_segment(self, underlying: str, segment: Optional[str]) -> Optional[str]:
+        available = self._expiries.get(underlying, {})
+        if segment:
+            segment = segment.lower()
+            return segment if segment in available else None
+        for preferred in SEGMENT_PRIORITY:
+            if preferred in available:
+                return preferred
+        return next(iter(available), None)
+
+    def expiries(self, underlying: str, segment: Optional[str] = None) -> List[str]:
+        """Sorted expiry dates (YYYY-MM-DD) available for an underlying."""
+        underlying = underlying.strip().upper()
+        segment = self._resolve_segment(underlying, segment)
+        if not segment:
+            return []
+        return list(self._expiries[underlying][segment])
+
+    def get_chain(
+        self,
+        underlying: str,
+        expiry: Optional[str] = None,
+        spot: Optional[float] = None,
+        strikes: Optional[int] = None,
+        segment: Optional[str] = None,
+    ) -> Optional[dict]:
+        """
+        Return an option chain for an underlying.
+
+        Args:
+            underlying: Underlying name as in the scrip master (e.g. "NIFTY")
+            expiry: Expiry date YYYY-MM-DD; nearest listed expiry if omitted
+            spot: Underlying price used to locate the ATM strike
+            strikes: Strikes on each side of ATM to return (requires spot)
+            segment: Exchange segment (e.g. "nse_fo"); auto-selected if omitted
+
+        Returns:
+            Chain dict with strike-sorted CE/PE legs, or None if unknown
+        """
+        underlying = underlying.strip().upper()
+        segment = self._resolve_segment(underlying, segment)
+        if not segment:
+            return None
+
+        available = self._expiries[underlying][segment]
+        if expiry is None:
+            expiry = available[0] if available else None
+        key = (underlying, segment, expiry)
+        rows = self._chains.get(key)
+        if rows is None:
+            return None
+
+        atm_strike = None
+        if spot is not None and rows:
+            strike_list = self._strikes[key]
+            pos = bisect_left(strike_list, spot)
+            if pos == len(strike_list):
+                pos -= 1
+            elif pos > 0 and (spot - strike_list[pos - 1]) <= (strike_list[pos] - spot):
+                pos -= 1
+            atm_strike = strike_list[pos]
+            if strikes:
+                rows = rows[max(0, pos - strikes): pos + strikes + 1]
+
+        lot_size = next((r["lotSize"] for r in rows if r["lotSize"]), None)
+        return {
+            "underlying": underlying,
+            "exchangeSegment": segment,
+            "expiry": expiry,
+            "expiries": list(available),
+            "lotSize": lot_size,
+            "atmStrike": atm_strike,
+            "strikes": [dict(r) for r in rows],
+        }
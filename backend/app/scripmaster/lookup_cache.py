@@ -0,0 +1,118 @@
+"""
+Generation-tagged LRU cache for scrip master lookups.
+
+Unlike functools.lru_cache it can be probed without running the lookup,
+which lets the async API answer hits inline on the event loop and only
+hand misses to the lookup thread pool.
+
+Every entry is stamped with the scrip master generation it was read
+from. A reload bumps the generation, which invalidates all earlier
+entries lazily instead of clearing each cache by hand. Negative results
+(not found / no matches) expire after a short TTL, so symbols looked up
+while the master was still loading are retried soon.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Returned by get() when a key is absent (None is a valid cached result)
+MISSING = object()
+
+
+class LookupCache:
+    """Thread-safe LRU shared by the event loop and lookup worker threads."""
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        negative_ttl: float = 30.0,
+        generation: Callable[[], int] = lambda: 0,
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.negative_ttl = negative_ttl
+        self._generation = generation
+        # key -> (generation, value, negative expiry or None)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.stale = 0
+        self.expired = 0
+
+    @staticmethod
+    def _is_negative(value: Any) -> bool:
+        return value is None or value == []
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            generation, value, expires_at = entry
+            if generation != self._generation():
+                del self._data[key]
+                self.stale += 1
+                self.misses += 1
+                return default
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._data[key]
+                self.expired += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            if expires_at is not None:
+                self.negative_hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """
+        Cache a lookup result.
+
+        Args:
+            generation: Generation the value was read under; pass the value
+                        captured before the query so a reload racing with
+                        it cannot stamp old data as current.
+        """
+        if generation is None:
+            generation = self._generation()
+        expires_at = time.monotonic() + self.negative_ttl if self._is_negative(value) else None
+        with self._lock:
+            self._data[key] = (generation, value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "negative_hits": self.negative_hits,
+            "evictions": self.evictions,
+            "stale_dropped": self.stale,
+            "negative_expired": self.expired,
+            "negative_ttl_s": self.negative_ttl,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Query, HTTPException
+from typing import Optional
 from app.scripmaster.service import scrip_master
+from app.scripmaster.schemas import BatchScripRequest
 
 router = APIRouter(prefix="/scripmaster", tags=["ScripMaster"])
 
@@ -12,19 +14,30 @@ async def search_scrips(q: str = Query(..., min_length=1, description="Search qu
     """
     query = q.upper()
     try:
-        results = scrip_master.search_scrips(query)
+        results = await scrip_master.search_scrips_async(query)
         return {"data": results}
     except Exception as e:
         # If scrip master is empty or DB error
         return {"data": []}
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Scrip master lookup cache counters (hits, misses, evictions, negative entries)
+    per lookup kind, for sizing SCRIP_CACHE_* settings.
+    """
+    return {
+        "stat": "Ok",
+        "data": scrip_master.cache_stats()
+    }
+
 @router.get("/scrip/{trading_symbol}")
 async def get_scrip_details(trading_symbol: str):
     """
     Get full scrip details including metadata for symbol decoding.
     Returns comprehensive instrument data from scrip master CSV.
     """
-    scrip = scrip_master.get_scrip(trading_symbol)
+    scrip = await scrip_master.get_scrip_async(trading_symbol)
     
     if not scrip:
         return {
@@ -36,3 +49,50 @@ async def get_scrip_details(trading_symbol: str):
         "stat": "Ok",
         "data": scrip
     }
+
+@router.post("/scrips/batch")
+async def get_scrips_batch(request: BatchScripRequest):
+    """
+    Resolve a list of symbols and/or exchange_segment|token pairs in one pass.
+    Used to enrich positions, holdings and order book rows without one request per row.
+    """
+    pairs = []
+    for item in request.tokens:
+        segment, _, token = item.partition("|")
+        pairs.append((token, segment) if token else (None, None))
+
+    symbols = await scrip_master.get_scrips_by_symbols_async(request.symbols)
+    tokens = await scrip_master.get_scrips_by_tokens_async(pairs)
+
+    return {
+        "stat": "Ok",
+        "data": {
+            "symbols": symbols,
+            "tokens": tokens
+        }
+    }
+
+@router.get("/chain")
+async def get_option_chain(
+    underlying: str = Query(..., min_length=1, description="Underlying name (e.g. NIFTY, BANKNIFTY, RELIANCE)"),
+    expiry: Optional[str] = Query(None, description="Expiry date YYYY-MM-DD (nearest expiry if omitted)"),
+    spot: Optional[float] = Query(None, gt=0, description="Underlying price used to locate ATM"),
+    strikes: Optional[int] = Query(None, ge=1, le=100, description="Strikes on each side of ATM (requires spot)"),
+    segment: Optional[str] = Query(None, description="Exchange segment, e.g. nse_fo"),
+):
+    """
+    Return a whole option chain, or a strike window around ATM, in one call.
+    Each strike carries its CE/PE token pair and lot size.
+    """
+    chain = await scrip_master.get_option_chain_async(underlying, expiry=expiry, spot=spot, strikes=strikes, segment=segment)
+
+    if not chain:
+        return {
+            "stat": "Not Ok",
+            "message": f"No option chain for {underlying.upper()}" + (f" expiring {expiry}" if expiry else "")
+        }
+
+    return {
+        "stat": "Ok",
+        "data": chain
+    }
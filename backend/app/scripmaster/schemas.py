@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class BatchScripRequest(BaseModel):
+    """
+    Batch instrument lookup - resolve many symbols and/or tokens in one call.
+    Results come back in input order; unknown entries are null.
+    """
+    symbols: List[str] = Field(default=[], max_length=1000, description="Trading symbols, e.g. BEL-EQ")
+    tokens: List[str] = Field(default=[], max_length=1000, description="Instruments as exchange_segment|token, e.g. nse_cm|383")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "symbols": ["BEL-EQ", "TCS-EQ"],
+                "tokens": ["nse_cm|383"]
+            }
+        }
@@ -3,20 +3,57 @@ import io
 import asyncio
 import sqlite3
 import httpx
-from functools import lru_cache
-from app.core.http_client import http_client
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from app.core.broker_gateway import broker_gateway, ACCESS
 from app.core.logger import logger
 from app.config import get_settings
+from app.scripmaster.chain import OptionChainIndex
+from app.scripmaster.lookup_cache import LookupCache, MISSING
+from app.scripmaster.snapshot import InstrumentSnapshot, COLUMNS as SNAPSHOT_COLUMNS
 
 settings = get_settings()
 
+# SQLite default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds
+IN_QUERY_CHUNK = 500
+
 class ScripMasterService:
     def __init__(self):
         self.db_path = "scrip_master.db"
+        self.snapshot_path = "scrip_master.snapshot"
         self.base_url = None
+        self.chain_index = OptionChainIndex()
+        self._abs_db_path = os.path.abspath(self.db_path)
+
+        # Lookup caches are stamped with the scrip master generation; a reload
+        # bumps it instead of clearing each cache. Misses go to the lookup
+        # pool, where each worker thread keeps its own read-only connection.
+        self.generation = 0
+        generation = lambda: self.generation
+        negative_ttl = settings.SCRIP_CACHE_NEGATIVE_TTL
+        self._symbol_cache = LookupCache("symbol", settings.SCRIP_CACHE_SYMBOL_SIZE, negative_ttl, generation)
+        self._token_cache = LookupCache("token", settings.SCRIP_CACHE_TOKEN_SIZE, negative_ttl, generation)
+        self._search_cache = LookupCache("search", settings.SCRIP_CACHE_SEARCH_SIZE, negative_ttl, generation)
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.SCRIP_LOOKUP_WORKERS,
+            thread_name_prefix="scrip-lookup"
+        )
+        self._pending = {}
+
         # Initialize DB
         self._init_db()
 
+        # Memory-mapped instrument snapshot: serves symbol/token lookups from
+        # the first request, before (and during) any scrip master reload.
+        self.snapshot = None
+        self._snapshot_stat = None
+        self._snapshot_checked_at = 0.0
+        self._open_snapshot()
+
     def _init_db(self):
         """Initialize SQLite database with schema."""
         try:
@@ -36,9 +73,16 @@ class ScripMasterService:
                         companyName TEXT,
                         description TEXT,
                         segment TEXT,
-                        expiryDateISO TEXT
+                        expiryDateISO TEXT,
+                        tickSize REAL,
+                        freezeQty INTEGER
                     )
                 """)
+                # Migrate tables created before the pre-trade validation columns
+                existing = {row[1] for row in conn.execute("PRAGMA table_info(scrips)")}
+                for column, sql_type in (("tickSize", "REAL"), ("freezeQty", "INTEGER")):
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE scrips ADD COLUMN {column} {sql_type}")
                 # Create Indices for fast lookup
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_token_seg ON scrips(instrumentToken, exchangeSegment);")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_symbol ON scrips(tradingSymbol);")
@@ -57,6 +101,9 @@ class ScripMasterService:
         logger.info("SCRIP MASTER LOADER - SQLITE OPTIMIZED")
         logger.info("=" * 80)
         
+        # Snapshot the current table first so lookups keep working while it is rebuilt
+        await self.ensure_snapshot()
+        
         try:
             # Get base URL from config
             from app.utils import cache
@@ -69,15 +116,12 @@ class ScripMasterService:
             self.base_url = base_url
             
             # Step 1: Get ALL available segment file paths dynamically
-            client = await http_client.get_client()
             file_paths_url = f"{base_url}/script-details/1.0/masterscrip/file-paths"
             
             logger.info(f"Fetching ALL segment file paths from: {file_paths_url}")
             
             try:
-                response = await client.get(file_paths_url, headers={
-                    "Authorization": settings.KOTAK_ACCESS_TOKEN
-                })
+                response = await broker_gateway.get(file_paths_url, auth=ACCESS)
                 response.raise_for_status()
             except httpx.HTTPStatusError as e:
                 if e.response.status_code == 404:
@@ -110,39 +154,38 @@ class ScripMasterService:
                 conn.commit()
 
             # Step 2: Stream Download and Insert Chunk by Chunk
-            async with httpx.AsyncClient(timeout=60.0) as fresh_client:
-                for csv_url in csv_urls:
-                    segment_name = csv_url.split('/')[-1].replace('.csv', '').upper()
-                    logger.info(f"📥 Processing {segment_name}...")
-                    
-                    try:
-                        # Stream response to avoid loading full CSV into RAM
-                        async with fresh_client.stream('GET', csv_url) as resp:
-                            resp.raise_for_status()
-                            
-                            # Read into buffer
-                            content = await resp.aread()
-                            
-                            # Use Pandas to read in chunks
-                            # Using io.BytesIO because we read content (still in RAM but ephemeral per file)
-                            # Ideally we should stream lines, but CSV parsing is complex.
-                            # Since individual CSVs are < 100MB, reading one into RAM is okay, 
-                            # but better to iterate.
-                            
-                            with io.BytesIO(content) as buffer:
-                                # Chunk size 10,000 to keep memory low
-                                for chunk in pd.read_csv(buffer, chunksize=10000):
-                                    self._process_and_insert_chunk(chunk, segment_name)
-                                    
-                        logger.info(f"✅ {segment_name}: Inserted into DB")
+            for csv_url in csv_urls:
+                segment_name = csv_url.split('/')[-1].replace('.csv', '').upper()
+                logger.info(f"📥 Processing {segment_name}...")
+                
+                try:
+                    # Stream response to avoid loading full CSV into RAM
+                    async with broker_gateway.stream('GET', csv_url) as resp:
+                        resp.raise_for_status()
                         
-                    except Exception as seg_err:
-                        logger.error(f"❌ Failed to load {segment_name}: {seg_err}")
-                        continue
-            
-            # Clear caches after reload
-            self.get_scrip_by_token.cache_clear()
-            self.get_scrip.cache_clear()
+                        # Read into buffer
+                        content = await resp.aread()
+                        
+                        # Use Pandas to read in chunks
+                        # Using io.BytesIO because we read content (still in RAM but ephemeral per file)
+                        # Ideally we should stream lines, but CSV parsing is complex.
+                        # Since individual CSVs are < 100MB, reading one into RAM is okay, 
+                        # but better to iterate.
+                        
+                        with io.BytesIO(content) as buffer:
+                            # Chunk size 10,000 to keep memory low
+                            await asyncio.to_thread(self._insert_csv, buffer, segment_name)
+                                
+                    logger.info(f"✅ {segment_name}: Inserted into DB")
+                    
+                except Exception as seg_err:
+                    logger.error(f"❌ Failed to load {segment_name}: {seg_err}")
+                    continue
+        
+            # Publish the new universe, then clear caches after reload
+            await asyncio.to_thread(self._write_snapshot)
+            self._bump_generation()
+            await asyncio.to_thread(self._rebuild_chain_index)
             
             # Log stats
             with self._get_conn() as conn:
@@ -156,6 +199,11 @@ class ScripMasterService:
         except Exception as e:
             logger.error(f"❌ CRITICAL: Failed to load scrip master: {e}")
 
+    def _insert_csv(self, buffer, segment_name: str):
+        """Parse and insert one segment CSV (runs on a worker thread)."""
+        for chunk in pd.read_csv(buffer, chunksize=10000):
+            self._process_and_insert_chunk(chunk, segment_name)
+
     def _process_and_insert_chunk(self, df: pd.DataFrame, segment_name: str):
         """Process a chunk of dataframe and insert into SQLite."""
         # Normalize columns
@@ -173,7 +221,9 @@ class ScripMasterService:
             'dStrikePrice': 'strikePrice',
             'pStrikePrice': 'strikePrice',
             'pSymbolName': 'companyName',
-            'pDesc': 'description'
+            'pDesc': 'description',
+            'dTickSize': 'tickSize',
+            'lFreezeQty': 'freezeQty'
         }
         
         # Filter and Rename
@@ -193,6 +243,12 @@ class ScripMasterService:
              mask = (df['instrumentType'].astype(str).str.contains('OPT')) & (df['strikePrice'] > 1_000_000)
              df.loc[mask, 'strikePrice'] = df.loc[mask, 'strikePrice'] / 100
 
+        # Tick size is published in paise
+        if 'tickSize' in df.columns:
+            df['tickSize'] = pd.to_numeric(df['tickSize'], errors='coerce') / 100
+        if 'freezeQty' in df.columns:
+            df['freezeQty'] = pd.to_numeric(df['freezeQty'], errors='coerce')
+
         # Expiry ISO - Vectorized
         if 'expiryEpoch' in df.columns:
             # Base date 1980-01-01
@@ -209,10 +265,10 @@ class ScripMasterService:
 
         # Insert into DB
         # Only keep columns that match schema to avoid errors
-        # Schema: instrumentToken, exchangeSegment, tradingSymbol, instrumentType, lotSize, expiryEpoch, strikePrice, optionType, companyName, description, segment, expiryDateISO
+        # Schema: instrumentToken, exchangeSegment, tradingSymbol, instrumentType, lotSize, expiryEpoch, strikePrice, optionType, companyName, description, segment, expiryDateISO, tickSize, freezeQty
         schema_cols = ['instrumentToken', 'exchangeSegment', 'tradingSymbol', 'instrumentType', 
                       'lotSize', 'expiryEpoch', 'strikePrice', 'optionType', 'companyName', 
-                      'description', 'segment', 'expiryDateISO']
+                      'description', 'segment', 'expiryDateISO', 'tickSize', 'freezeQty']
         
         # Ensure all schema cols exist
         for col in schema_cols:
@@ -223,76 +279,374 @@ class ScripMasterService:
         with self._get_conn() as conn:
             df[schema_cols].to_sql('scrips', conn, if_exists='append', index=False)
 
-    @lru_cache(maxsize=10000)
+    def _read_conn(self):
+        """Reusable read-only connection, one per thread (event loop or lookup worker)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self._abs_db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _bump_generation(self):
+        """Invalidate every cached lookup from earlier loads."""
+        self.generation += 1
+        logger.info(f"Scrip master generation -> {self.generation}")
+
+    def cache_stats(self):
+        """Hit/miss/eviction counters per lookup kind."""
+        return {
+            "generation": self.generation,
+            "snapshot_records": len(self.snapshot) if self.snapshot is not None else None,
+            "caches": [c.stats() for c in (self._symbol_cache, self._token_cache, self._search_cache)],
+        }
+
+    # --- Instrument snapshot ---
+
+    def _open_snapshot(self) -> bool:
+        started = time.perf_counter()
+        snapshot = InstrumentSnapshot.open(self.snapshot_path)
+        if snapshot is None:
+            return False
+        self.snapshot = snapshot
+        st = os.stat(self.snapshot_path)
+        self._snapshot_stat = (st.st_ino, st.st_mtime_ns)
+        age_min = (time.time() - (snapshot.created_at or time.time())) / 60
+        logger.info(f"✅ Instrument snapshot mapped: {len(snapshot)} records in "
+                    f"{(time.perf_counter() - started) * 1000:.1f}ms (age {age_min:.0f} min)")
+        return True
+
+    def _write_snapshot(self):
+        """Write the scrips table as a snapshot and map it (runs on a worker thread)."""
+        try:
+            cols = ", ".join(SNAPSHOT_COLUMNS)
+            with self._get_conn() as conn:
+                rows = conn.execute(f"SELECT {cols} FROM scrips ORDER BY rowid").fetchall()
+            if not rows:
+                logger.warning("Scrip master table empty - snapshot not written")
+                return
+            InstrumentSnapshot.write(self.snapshot_path, rows)
+            self._open_snapshot()
+        except Exception as e:
+            logger.error(f"Failed to write instrument snapshot: {e}")
+
+    async def ensure_snapshot(self):
+        """Build a snapshot from the existing table if none is mapped yet."""
+        if self.snapshot is None:
+            await asyncio.to_thread(self._write_snapshot)
+
+    def _refresh_snapshot_if_replaced(self):
+        """Pick up a snapshot published by another worker process (checked at most every 30s)."""
+        now = time.monotonic()
+        if now - self._snapshot_checked_at < 30:
+            return
+        self._snapshot_checked_at = now
+        try:
+            st = os.stat(self.snapshot_path)
+        except OSError:
+            return
+        if (st.st_ino, st.st_mtime_ns) != self._snapshot_stat and self._open_snapshot():
+            self._bump_generation()
+            self.chain_index.clear()
+
     def get_scrip(self, symbol: str):
         """Get scrip details by trading symbol - CACHED"""
         if not symbol: return None
+        scrip = self._symbol_cache.get(symbol)
+        if scrip is MISSING:
+            scrip = self._load_scrip(symbol)
+        return scrip
+
+    def _load_scrip(self, symbol: str):
+        generation = self.generation
+        scrip = self._query_scrip(symbol)
+        self._symbol_cache.put(symbol, scrip, generation)
+        if scrip:
+            # Ticks resolve by token; warm that cache so the feed never misses
+            # on an instrument that was subscribed by symbol.
+            self._token_cache.put((scrip["instrumentToken"], str(scrip["exchangeSegment"]).lower()), scrip, generation)
+        return scrip
+
+    def _query_scrip(self, symbol: str):
+        self._refresh_snapshot_if_replaced()
+        if self.snapshot is not None:
+            return self.snapshot.get_symbol(symbol)
         try:
-            with self._get_conn() as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute("SELECT * FROM scrips WHERE tradingSymbol = ? LIMIT 1", (symbol,))
-                row = cursor.fetchone()
-                if row:
-                    return dict(row)
+            cursor = self._read_conn().execute("SELECT * FROM scrips WHERE tradingSymbol = ? LIMIT 1", (symbol,))
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
         except Exception:
             return None
         return None
 
-    @lru_cache(maxsize=10000)
     def get_scrip_by_token(self, token: str, segment: str):
         """Fast lookup using token and segment - CACHED"""
         if not token or not segment: return None
+        scrip = self._token_cache.get((token, segment))
+        if scrip is MISSING:
+            scrip = self._load_scrip_by_token(token, segment)
+        return scrip
+
+    def _load_scrip_by_token(self, token: str, segment: str):
+        generation = self.generation
+        scrip = self._query_scrip_by_token(token, segment)
+        self._token_cache.put((token, segment), scrip, generation)
+        return scrip
+
+    def _query_scrip_by_token(self, token: str, segment: str):
+        self._refresh_snapshot_if_replaced()
+        if self.snapshot is not None:
+            return self.snapshot.get_token(token, segment)
         try:
-            # Lowercase segment is stored as UPPER in DB usually, but let's check.
-            # Loader sets segment_name = UPPER.
-            # 'exchangeSegment' column usually matches 'nse_cm' (lowercase) or 'NSE_CM' (uppercase) in CSV?
-            # From previous logs: "exchangeSegment" -> pExchSeg. 
-            # In CSV sample: pExchSeg="nse_cm" (lowercase) or "NSE_CM"?
-            # Let's try case-insensitive LIKE or normalize.
-            # Usually input segment is 'nse_cm' (lowercase).
+            # Segment is stored as in the CSV (usually lowercase 'nse_cm'), callers may pass either case.
+            conn = self._read_conn()
+            # Try exact match first
+            cursor = conn.execute("SELECT * FROM scrips WHERE instrumentToken = ? AND exchangeSegment = ? LIMIT 1", (token, segment))
+            row = cursor.fetchone()
             
-            with self._get_conn() as conn:
-                conn.row_factory = sqlite3.Row
-                # Try exact match first
-                cursor = conn.execute("SELECT * FROM scrips WHERE instrumentToken = ? AND exchangeSegment = ? LIMIT 1", (token, segment))
+            # Retry with lowercase segment if failed
+            if not row:
+                cursor = conn.execute("SELECT * FROM scrips WHERE instrumentToken = ? AND lower(exchangeSegment) = ? LIMIT 1", (token, segment.lower()))
                 row = cursor.fetchone()
                 
-                # Retry with lowercase segment if failed
-                if not row:
-                    cursor = conn.execute("SELECT * FROM scrips WHERE instrumentToken = ? AND lower(exchangeSegment) = ? LIMIT 1", (token, segment.lower()))
-                    row = cursor.fetchone()
-                    
-                if row:
-                    return dict(row)
+            if row:
+                return dict(row)
         except Exception:
             return None
         return None
 
-    @lru_cache(maxsize=1000)
     def search_scrips(self, query: str):
         """Search scrips by symbol or company name using SQL"""
         if not query or len(query) < 2: return []
-        
+        results = self._search_cache.get(query)
+        if results is MISSING:
+            results = self._load_search(query)
+        return results
+
+    def _load_search(self, query: str):
+        generation = self.generation
+        results = self._query_search(query)
+        self._search_cache.put(query, results, generation)
+        return results
+
+    def _query_search(self, query: str):
         try:
             q_param = f"%{query}%"
-            with self._get_conn() as conn:
-                conn.row_factory = sqlite3.Row
-                # Search Priority: Starts With Symbol > Contains Symbol > Company Name
-                # We can do a simple UNION or just broad search. Let's do broad search with LIMIT.
-                
-                sql = """
-                    SELECT * FROM scrips 
-                    WHERE tradingSymbol LIKE ? 
-                       OR companyName LIKE ? 
-                       OR description LIKE ?
-                    LIMIT 20
-                """
-                cursor = conn.execute(sql, (q_param, q_param, q_param))
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+            # Search Priority: Starts With Symbol > Contains Symbol > Company Name
+            # We can do a simple UNION or just broad search. Let's do broad search with LIMIT.
+            sql = """
+                SELECT * FROM scrips 
+                WHERE tradingSymbol LIKE ? 
+                   OR companyName LIKE ? 
+                   OR description LIKE ?
+                LIMIT 20
+            """
+            cursor = self._read_conn().execute(sql, (q_param, q_param, q_param))
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Search error: {e}")
             return []
 
+    # --- Batch lookups: one cache pass, then one snapshot probe / IN query for all misses ---
+
+    @staticmethod
+    def _probe_batch(cache: LookupCache, keys: list):
+        results = []
+        missing = {}
+        for key in keys:
+            if not key or (isinstance(key, tuple) and not all(key)):
+                results.append(None)
+                continue
+            value = cache.get(key)
+            results.append(value)
+            if value is MISSING:
+                missing[key] = None
+        return results, list(missing)
+
+    def get_scrips_by_symbols(self, symbols: List[str]) -> List[Optional[dict]]:
+        """Resolve many trading symbols in one pass. Results are in input order (None if unknown)."""
+        results, missing = self._probe_batch(self._symbol_cache, symbols)
+        if missing:
+            loaded = self._load_scrips_by_symbols(missing)
+            results = [loaded.get(s) if r is MISSING else r for s, r in zip(symbols, results)]
+        return results
+
+    def get_scrips_by_tokens(self, pairs: List[Tuple[str, str]]) -> List[Optional[dict]]:
+        """Resolve many (token, segment) pairs in one pass. Results are in input order (None if unknown)."""
+        pairs = [tuple(p) for p in pairs]
+        results, missing = self._probe_batch(self._token_cache, pairs)
+        if missing:
+            loaded = self._load_scrips_by_tokens(missing)
+            results = [loaded.get(p) if r is MISSING else r for p, r in zip(pairs, results)]
+        return results
+
+    def _load_scrips_by_symbols(self, symbols: List[str]) -> Dict[str, Optional[dict]]:
+        generation = self.generation
+        found: Dict[str, dict] = {}
+        self._refresh_snapshot_if_replaced()
+        snapshot = self.snapshot
+        if snapshot is not None:
+            for symbol, i in zip(symbols, snapshot.find_symbols(symbols)):
+                if i is not None:
+                    found[symbol] = snapshot.row(i)
+        else:
+            try:
+                conn = self._read_conn()
+                for start in range(0, len(symbols), IN_QUERY_CHUNK):
+                    chunk = symbols[start:start + IN_QUERY_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor = conn.execute(
+                        f"SELECT * FROM scrips WHERE tradingSymbol IN ({placeholders}) ORDER BY rowid", chunk
+                    )
+                    for row in cursor.fetchall():
+                        found.setdefault(row["tradingSymbol"], dict(row))
+            except Exception as e:
+                logger.error(f"Batch symbol lookup failed: {e}")
+                return {}
+
+        loaded = {}
+        for symbol in symbols:
+            scrip = found.get(symbol)
+            loaded[symbol] = scrip
+            self._symbol_cache.put(symbol, scrip, generation)
+            if scrip:
+                self._token_cache.put((scrip["instrumentToken"], str(scrip["exchangeSegment"]).lower()), scrip, generation)
+        return loaded
+
+    def _load_scrips_by_tokens(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[dict]]:
+        generation = self.generation
+        found: Dict[Tuple[str, str], dict] = {}
+        self._refresh_snapshot_if_replaced()
+        snapshot = self.snapshot
+        if snapshot is not None:
+            for pair, i in zip(pairs, snapshot.find_tokens(pairs)):
+                if i is not None:
+                    found[pair] = snapshot.row(i)
+        else:
+            try:
+                conn = self._read_conn()
+                tokens = list({token for token, _ in pairs})
+                by_key: Dict[Tuple[str, str], dict] = {}
+                for start in range(0, len(tokens), IN_QUERY_CHUNK):
+                    chunk = tokens[start:start + IN_QUERY_CHUNK]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor = conn.execute(
+                        f"SELECT * FROM scrips WHERE instrumentToken IN ({placeholders}) ORDER BY rowid", chunk
+                    )
+                    for row in cursor.fetchall():
+                        by_key.setdefault((row["instrumentToken"], str(row["exchangeSegment"]).lower()), dict(row))
+                for token, segment in pairs:
+                    scrip = by_key.get((token, segment.lower()))
+                    if scrip:
+                        found[(token, segment)] = scrip
+            except Exception as e:
+                logger.error(f"Batch token lookup failed: {e}")
+                return {}
+
+        loaded = {}
+        for pair in pairs:
+            scrip = found.get(pair)
+            loaded[pair] = scrip
+            self._token_cache.put(pair, scrip, generation)
+        return loaded
+
+    async def get_scrips_by_symbols_async(self, symbols: List[str]) -> List[Optional[dict]]:
+        """Non-blocking get_scrips_by_symbols() for use on the event loop."""
+        results, missing = self._probe_batch(self._symbol_cache, symbols)
+        if missing:
+            loaded = await self._run_lookup(self._load_scrips_by_symbols, missing)
+            results = [loaded.get(s) if r is MISSING else r for s, r in zip(symbols, results)]
+        return results
+
+    async def get_scrips_by_tokens_async(self, pairs: List[Tuple[str, str]]) -> List[Optional[dict]]:
+        """Non-blocking get_scrips_by_tokens() for use on the event loop."""
+        pairs = [tuple(p) for p in pairs]
+        results, missing = self._probe_batch(self._token_cache, pairs)
+        if missing:
+            loaded = await self._run_lookup(self._load_scrips_by_tokens, missing)
+            results = [loaded.get(p) if r is MISSING else r for p, r in zip(pairs, results)]
+        return results
+
+    async def _run_lookup(self, fn, *args):
+        if self.snapshot is not None:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # --- Async API: hits answered inline, misses go to the lookup pool ---
+
+    async def _lookup_async(self, cache: LookupCache, key, fn, *args, inline: bool = False):
+        value = cache.get(key)
+        if value is not MISSING:
+            return value
+
+        # Snapshot probes are pure in-memory work; cheaper than a thread hop
+        if inline:
+            return fn(*args)
+
+        # Single-flight: concurrent misses on the same key share one worker query
+        pending_key = (cache.name, key, self.generation)
+        future = self._pending.get(pending_key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, fn, *args)
+            self._pending[pending_key] = future
+            future.add_done_callback(lambda _: self._pending.pop(pending_key, None))
+        return await asyncio.shield(future)
+
+    async def get_scrip_async(self, symbol: str):
+        """Non-blocking get_scrip() for use on the event loop."""
+        if not symbol: return None
+        return await self._lookup_async(self._symbol_cache, symbol, self._load_scrip, symbol,
+                                        inline=self.snapshot is not None)
+
+    async def get_scrip_by_token_async(self, token: str, segment: str):
+        """Non-blocking get_scrip_by_token() for use on the event loop."""
+        if not token or not segment: return None
+        return await self._lookup_async(self._token_cache, (token, segment), self._load_scrip_by_token, token, segment,
+                                        inline=self.snapshot is not None)
+
+    async def search_scrips_async(self, query: str):
+        """Non-blocking search_scrips() for use on the event loop."""
+        if not query or len(query) < 2: return []
+        return await self._lookup_async(self._search_cache, query, self._load_search, query)
+
+    async def get_option_chain_async(self, underlying: str, expiry: str = None, spot: float = None,
+                                     strikes: int = None, segment: str = None):
+        """Non-blocking get_option_chain(); the first call builds the index on a worker."""
+        if not underlying: return None
+        if not self.chain_index.loaded:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._rebuild_chain_index)
+        return self.chain_index.get_chain(underlying, expiry=expiry, spot=spot, strikes=strikes, segment=segment)
+
+    def _rebuild_chain_index(self):
+        """Rebuild the option chain index from the scrips table."""
+        try:
+            snapshot = self.snapshot
+            if snapshot is not None:
+                option_rows = snapshot.column_equals("optionType", ["CE", "PE"])
+                rows = snapshot.rows(OptionChainIndex.COLUMNS, option_rows)
+            else:
+                cols = ", ".join(OptionChainIndex.COLUMNS)
+                with self._get_conn() as conn:
+                    rows = conn.execute(
+                        f"SELECT {cols} FROM scrips WHERE optionType IN ('CE', 'PE') AND expiryEpoch > 0"
+                    ).fetchall()
+            count = self.chain_index.build(rows)
+            logger.info(f"✅ Option chain index built: {count} contracts, {len(self.chain_index.underlyings())} underlyings")
+        except Exception as e:
+            logger.error(f"Failed to build option chain index: {e}")
+
+    def get_option_chain(self, underlying: str, expiry: str = None, spot: float = None,
+                         strikes: int = None, segment: str = None):
+        """Get a full option chain or an ATM strike window in one lookup."""
+        if not underlying: return None
+        if not self.chain_index.loaded:
+            self._rebuild_chain_index()
+        return self.chain_index.get_chain(underlying, expiry=expiry, spot=spot, strikes=strikes, segment=segment)
+
 # Global singleton instance
 scrip_master = ScripMasterService()
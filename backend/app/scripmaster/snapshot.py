@@ -0,0 +1,301 @@
+"""
+Memory-mappable binary snapshot of the instrument universe.
+
+File layout (little-endian):
+    header   magic, format version, row count, TOC offset/length
+    sections 64-byte aligned numpy arrays, one per column:
+             - int/float columns: fixed-width values
+             - string columns: (start, length) pairs into a shared UTF-8 heap
+             - hash indexes: sorted 64-bit key hashes + row order
+    TOC      JSON describing every section
+
+Opening a snapshot only parses the header and TOC; column data is read
+straight from the mapped pages, so startup is near-instant and all worker
+processes share the same physical memory via the OS page cache.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+MAGIC = b"SCRIPSNP"
+SNAPSHOT_VERSION = 2  # v2: tickSize, freezeQty
+HEADER = struct.Struct("<8sIIQQQ")  # magic, version, flags, n_rows, toc_offset, toc_length
+HEADER_SIZE = 64
+ALIGN = 64
+
+INT_NULL = np.iinfo(np.int64).min
+
+# Column name -> kind ("str", "i8" or "f8"); order defines row dict order
+COLUMNS = {
+    "instrumentToken": "str",
+    "exchangeSegment": "str",
+    "tradingSymbol": "str",
+    "instrumentType": "str",
+    "lotSize": "i8",
+    "expiryEpoch": "i8",
+    "strikePrice": "f8",
+    "optionType": "str",
+    "companyName": "str",
+    "description": "str",
+    "segment": "str",
+    "expiryDateISO": "str",
+    "tickSize": "f8",
+    "freezeQty": "i8",
+}
+
+
+def key_hash(key: str) -> int:
+    """Stable 64-bit hash (identical across processes, unlike hash())."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def token_key(token, segment) -> str:
+    return f"{token}|{str(segment).lower()}"
+
+
+class InstrumentSnapshot:
+    """Read-only view over a snapshot file."""
+
+    def __init__(self, path: str, mm: mmap.mmap, n_rows: int, toc: dict):
+        self.path = path
+        self._mm = mm
+        self.n_rows = n_rows
+        self.created_at = toc.get("created_at")
+        self.source_rows = toc.get("source_rows", n_rows)
+        self._heap = memoryview(mm)[toc["heap"]["offset"]: toc["heap"]["offset"] + toc["heap"]["length"]]
+
+        self._columns = {}
+        for name, kind in COLUMNS.items():
+            sections = toc["columns"][name]
+            if kind == "str":
+                self._columns[name] = (
+                    self._array(sections["start"], np.int64),
+                    self._array(sections["length"], np.int32),
+                )
+            else:
+                self._columns[name] = self._array(sections["values"], np.dtype(kind))
+
+        self._indexes = {
+            name: (self._array(sec["hashes"], np.uint64), self._array(sec["order"], np.int32))
+            for name, sec in toc["indexes"].items()
+        }
+
+    def _array(self, section: dict, dtype) -> np.ndarray:
+        return np.frombuffer(self._mm, dtype=dtype, count=section["count"], offset=section["offset"])
+
+    # ---------- Open / write ----------
+
+    @classmethod
+    def open(cls, path: str) -> Optional["InstrumentSnapshot"]:
+        """Map a snapshot file. Returns None if missing, corrupt or from another format version."""
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, n_rows, toc_offset, toc_length = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != SNAPSHOT_VERSION:
+                mm.close()
+                return None
+            toc = json.loads(mm[toc_offset: toc_offset + toc_length])
+            return cls(path, mm, n_rows, toc)
+        except Exception:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # partially built views still reference the mapping
+            return None
+
+    @staticmethod
+    def write(path: str, rows: Sequence[tuple]) -> int:
+        """
+        Write rows (tuples in COLUMNS order) as a snapshot.
+
+        The file is written next to the target and renamed into place, so
+        readers holding the old mapping are unaffected.
+
+        Returns:
+            Number of rows written
+        """
+        names = list(COLUMNS)
+        n_rows = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * len(names)
+
+        sections: List[bytes] = []
+        offset = HEADER_SIZE
+
+        def add(data: bytes) -> dict:
+            nonlocal offset
+            pad = (-offset) % ALIGN
+            if pad:
+                sections.append(b"\0" * pad)
+                offset += pad
+            section = {"offset": offset}
+            sections.append(data)
+            offset += len(data)
+            return section
+
+        def add_array(arr: np.ndarray) -> dict:
+            section = add(arr.tobytes())
+            section["count"] = int(arr.size)
+            return section
+
+        toc = {"created_at": time.time(), "source_rows": n_rows, "columns": {}, "indexes": {}}
+        heap_parts: List[bytes] = []
+        heap_len = 0
+
+        for name, values in zip(names, columns):
+            kind = COLUMNS[name]
+            if kind == "str":
+                starts = np.empty(n_rows, dtype=np.int64)
+                lengths = np.empty(n_rows, dtype=np.int32)
+                for i, value in enumerate(values):
+                    if value is None or (isinstance(value, float) and np.isnan(value)):
+                        starts[i], lengths[i] = 0, -1
+                        continue
+                    encoded = str(value).encode()
+                    starts[i], lengths[i] = heap_len, len(encoded)
+                    heap_parts.append(encoded)
+                    heap_len += len(encoded)
+                toc["columns"][name] = {"start": add_array(starts), "length": add_array(lengths)}
+            elif kind == "i8":
+                arr = np.array([INT_NULL if v is None else int(v) for v in values], dtype=np.int64)
+                toc["columns"][name] = {"values": add_array(arr)}
+            else:
+                arr = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+                toc["columns"][name] = {"values": add_array(arr)}
+
+        # Hash indexes; stable sort keeps the first matching row first, like LIMIT 1
+        col = dict(zip(names, columns))
+        index_keys = {
+            "symbol": [str(s) if s is not None else "" for s in col.get("tradingSymbol", ())],
+            "token": [token_key(t, s) for t, s in zip(col.get("instrumentToken", ()), col.get("exchangeSegment", ()))],
+        }
+        for name, keys in index_keys.items():
+            hashes = np.fromiter((key_hash(k) for k in keys), dtype=np.uint64, count=n_rows)
+            order = np.argsort(hashes, kind="stable").astype(np.int32)
+            toc["indexes"][name] = {"hashes": add_array(hashes[order]), "order": add_array(order)}
+
+        toc["heap"] = add(b"".join(heap_parts))
+        toc["heap"]["length"] = heap_len
+
+        toc_bytes = json.dumps(toc).encode()
+        toc_offset = offset
+        header = HEADER.pack(MAGIC, SNAPSHOT_VERSION, 0, n_rows, toc_offset, len(toc_bytes)).ljust(HEADER_SIZE, b"\0")
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            for part in sections:
+                f.write(part)
+            f.write(toc_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return n_rows
+
+    # ---------- Row access ----------
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def _value(self, name: str, i: int):
+        kind = COLUMNS[name]
+        if kind == "str":
+            starts, lengths = self._columns[name]
+            length = int(lengths[i])
+            if length < 0:
+                return None
+            start = int(starts[i])
+            return bytes(self._heap[start: start + length]).decode()
+        value = self._columns[name][i]
+        if kind == "i8":
+            return None if value == INT_NULL else int(value)
+        return None if np.isnan(value) else float(value)
+
+    def row(self, i: int) -> dict:
+        """Decode one row into the same dict shape as a scrips table row."""
+        return {name: self._value(name, i) for name in COLUMNS}
+
+    def rows(self, columns: Sequence[str], indices: Iterable[int]) -> Iterable[tuple]:
+        for i in indices:
+            yield tuple(self._value(name, i) for name in columns)
+
+    def column_equals(self, name: str, values: Sequence[str]) -> np.ndarray:
+        """Row indices whose string column equals any of values."""
+        starts, lengths = self._columns[name]
+        wanted = {v.encode() for v in values}
+        sizes = {len(v) for v in wanted}
+        candidates = np.flatnonzero(np.isin(lengths, list(sizes)))
+        heap = self._heap
+        return np.array(
+            [i for i in candidates if bytes(heap[starts[i]: starts[i] + lengths[i]]) in wanted],
+            dtype=np.int64,
+        )
+
+    # ---------- Index probes ----------
+
+    def _probe(self, index: str, key: str, column_check) -> Optional[int]:
+        hashes, order = self._indexes[index]
+        h = np.uint64(key_hash(key))
+        lo = int(np.searchsorted(hashes, h, side="left"))
+        hi = int(np.searchsorted(hashes, h, side="right"))
+        for pos in range(lo, hi):
+            i = int(order[pos])
+            if column_check(i):
+                return i
+        return None
+
+    def find_symbol(self, symbol: str) -> Optional[int]:
+        return self._probe("symbol", symbol, lambda i: self._value("tradingSymbol", i) == symbol)
+
+    def find_token(self, token: str, segment: str) -> Optional[int]:
+        key = token_key(token, segment)
+        return self._probe(
+            "token", key,
+            lambda i: token_key(self._value("instrumentToken", i), self._value("exchangeSegment", i)) == key
+        )
+
+    def _probe_many(self, index: str, keys: Sequence[str], column_key) -> List[Optional[int]]:
+        """Vectorized probe: one searchsorted pass over the index for all keys."""
+        if not keys:
+            return []
+        hashes, order = self._indexes[index]
+        wanted = np.fromiter((key_hash(k) for k in keys), dtype=np.uint64, count=len(keys))
+        los = np.searchsorted(hashes, wanted, side="left")
+        his = np.searchsorted(hashes, wanted, side="right")
+        found: List[Optional[int]] = []
+        for key, lo, hi in zip(keys, los, his):
+            match = None
+            for pos in range(lo, hi):
+                i = int(order[pos])
+                if column_key(i) == key:
+                    match = i
+                    break
+            found.append(match)
+        return found
+
+    def find_symbols(self, symbols: Sequence[str]) -> List[Optional[int]]:
+        return self._probe_many("symbol", symbols, lambda i: self._value("tradingSymbol", i))
+
+    def find_tokens(self, pairs: Sequence[tuple]) -> List[Optional[int]]:
+        keys = [token_key(token, segment) for token, segment in pairs]
+        return self._probe_many(
+            "token", keys,
+            lambda i: token_key(self._value("instrumentToken", i), self._value("exchangeSegment", i))
+        )
+
+    def get_symbol(self, symbol: str) -> Optional[dict]:
+        i = self.find_symbol(symbol)
+        return self.row(i) if i is not None else None
+
+    def get_token(self, token: str, segment: str) -> Optional[dict]:
+        i = self.find_token(token, segment)
+        return self.row(i) if i is not None else None
@@ -4,6 +4,29 @@ import pytz
 # IST Timezone
 IST = pytz.timezone('Asia/Kolkata')
 
+# Exchange segments -> session type
+SEGMENT_TYPES = {
+    "NSE_CM": "CM", "BSE_CM": "CM",
+    "NSE_FO": "FO", "BSE_FO": "FO",
+    "CDE_FO": "CD", "BCS_FO": "CD",
+    "MCX_FO": "MCX",
+}
+
+# Session type -> (open, close) in IST
+SESSION_TIMES = {
+    "CM": (time(9, 15), time(15, 30)),
+    "FO": (time(9, 15), time(15, 30)),
+    "CD": (time(9, 0), time(17, 0)),
+    "MCX": (time(9, 0), time(23, 30)),
+}
+
+def _segment_type(seg: str) -> str:
+    """Session type of an (upper-case) segment; MCX and CD are tested before FO (mcx_fo, cde_fo)."""
+    if seg in SEGMENT_TYPES:
+        return SEGMENT_TYPES[seg]
+    # Default to CM timing if segment not found
+    return "MCX" if "MCX" in seg else "CD" if "CD" in seg else "FO" if "FO" in seg else "CM"
+
 def get_market_session_info(segment: str):
     """
     Returns market session status strictly based on exchange rules.
@@ -11,6 +34,7 @@ def get_market_session_info(segment: str):
     - F&O (NSE_FO, BSE_FO): 9:15 AM - 3:30 PM
     - Currency (CDE_FO): 9:00 AM - 5:00 PM
     - MCX: 9:00 AM - 11:30 PM
+    Exchange holidays are not known here (weekdays only).
     
     Returns:
     {
@@ -29,17 +53,7 @@ def get_market_session_info(segment: str):
     
     seg = segment.upper()
     
-    # Market timings
-    timings = {
-        "CM": (time(9, 15), time(15, 30)),
-        "FO": (time(9, 15), time(15, 30)),
-        "CD": (time(9, 0), time(17, 0)),
-        "MCX": (time(9, 0), time(23, 30))
-    }
-    
-    # Default to CM/FO timing if segment not found
-    seg_type = "CM" if "CM" in seg else "FO" if "FO" in seg else "CD" if "CD" in seg else "MCX" if "MCX" in seg else "CM"
-    start, end = timings.get(seg_type)
+    start, end = SESSION_TIMES[_segment_type(seg)]
     
     is_open = start <= current_time <= end
     
@@ -48,3 +62,10 @@ def get_market_session_info(segment: str):
         "is_amo": not is_open,
         "segment": segment
     }
+
+def session_over_today(segment: str) -> bool:
+    """True once today's session of the segment has closed (always on weekends, which have none)."""
+    now = datetime.now(IST)
+    if now.weekday() >= 5:
+        return True
+    return now.time() > SESSION_TIMES[_segment_type(segment.upper())][1]
@@ -336,7 +336,7 @@ class KotakHSMClient:
         
         if not token or not segment: return
         
-        scrip = scrip_master.get_scrip_by_token(token, str(segment).lower())
+        scrip = await scrip_master.get_scrip_by_token_async(token, str(segment).lower())
         
         # Fallback for Indices or unknown instruments
         if not scrip:
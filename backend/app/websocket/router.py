@@ -26,6 +26,8 @@ class ConnectionManager:
         self.active_connections: List[WebSocket] = []
         # symbol -> set of websockets
         self.subscriptions: Dict[str, Set[WebSocket]] = {}
+        # Symbols streamed for backend consumers (live portfolio); kept without clients
+        self.feed_symbols: Set[str] = set()
         self._hsm_initialized = False
 
     async def connect(self, websocket: WebSocket):
@@ -34,6 +36,9 @@ class ConnectionManager:
         logger.debug(f"DEBUG: Frontend client connected. Total clients: {len(self.active_connections)}")
         
         # Initialize Kotak HSM connection on first client
+        await self._init_hsm()
+
+    async def _init_hsm(self):
         if not self._hsm_initialized:
             await self._ensure_hsm_connected()
             self._hsm_initialized = True
@@ -47,7 +52,7 @@ class ConnectionManager:
         for symbol in list(self.subscriptions.keys()):
             if websocket in self.subscriptions[symbol]:
                 self.subscriptions[symbol].remove(websocket)
-                if not self.subscriptions[symbol]:
+                if not self.subscriptions[symbol] and symbol not in self.feed_symbols:
                     del self.subscriptions[symbol]
         
         logger.debug(f"DEBUG: Frontend client disconnected. Total clients: {len(self.active_connections)}")
@@ -74,58 +79,132 @@ class ConnectionManager:
 
     async def subscribe_client(self, websocket: WebSocket, symbol: str):
         """Register client for a symbol and subscribe in HSM if new."""
-        subscription_string = ""
-        normalized_symbol = symbol
-
-        # 0. DIRECT TOKEN SUBSCRIPTION (Bypass Scrip Master)
-        # Used for Indices: "nse_cm|Nifty 50" or "nse_cm|26000"
-        if "|" in symbol:
-            logger.info(f"⚡ [ROUTER] Direct token subscription detected: {symbol}")
-            subscription_string = symbol
-            # Ensure it ends with & for Kotak API if not present (logic below adds it if needed, but standardizing here helps)
-        else:
-            # 1. Validate symbol via Scrip Master (SINGLE SOURCE OF TRUTH)
-            scrip = scrip_master.get_scrip(symbol)
-            
+        await self.subscribe_symbols(websocket, [symbol])
+
+    async def subscribe_symbols(self, websocket: WebSocket, symbols: List[str]):
+        """Register client for many symbols, resolved with one batch scrip master lookup."""
+        instruments = []
+        scrip_symbols = []
+
+        for symbol in symbols:
+            # 0. DIRECT TOKEN SUBSCRIPTION (Bypass Scrip Master)
+            # Used for Indices: "nse_cm|Nifty 50" or "nse_cm|26000"
+            if "|" in symbol:
+                logger.info(f"⚡ [ROUTER] Direct token subscription detected: {symbol}")
+                instruments.append((symbol, symbol))
+            else:
+                scrip_symbols.append(symbol)
+
+        if scrip_symbols:
+            # 1. Validate symbols via Scrip Master (SINGLE SOURCE OF TRUTH)
+            scrips = await scrip_master.get_scrips_by_symbols_async(scrip_symbols)
+            resolved = dict(zip(scrip_symbols, scrips))
+
             # Fallback: Try without common suffixes (e.g., BEL-EQ -> BEL)
-            if not scrip and "-" in symbol:
-                base_symbol = symbol.split("-")[0]
-                logger.debug(f"Symbol {symbol} not found. Retrying with base: {base_symbol}")
-                scrip = scrip_master.get_scrip(base_symbol)
-                if scrip:
-                    logger.info(f"✅ Found match for {symbol} using base symbol {base_symbol}")
-                    normalized_symbol = base_symbol
-            
-            if not scrip:
-                logger.warning(f"Rejected local subscription: reason=UNKNOWN_SYMBOL, symbol={symbol}")
-                return
-            
-            # Construct standard Kotak subscription string
-            subscription_string = f"{scrip['exchangeSegment']}|{scrip['instrumentToken']}"
+            retry = {s: s.split("-")[0] for s, scrip in resolved.items() if not scrip and "-" in s}
+            if retry:
+                base_scrips = await scrip_master.get_scrips_by_symbols_async(list(retry.values()))
+                by_base = dict(zip(retry.values(), base_scrips))
+                for symbol, base_symbol in retry.items():
+                    if by_base.get(base_symbol):
+                        logger.info(f"✅ Found match for {symbol} using base symbol {base_symbol}")
+
+            for symbol in scrip_symbols:
+                normalized_symbol = symbol
+                scrip = resolved[symbol]
+                if not scrip and symbol in retry:
+                    normalized_symbol = retry[symbol]
+                    scrip = by_base.get(normalized_symbol)
+
+                if not scrip:
+                    logger.warning(f"Rejected local subscription: reason=UNKNOWN_SYMBOL, symbol={symbol}")
+                    continue
+
+                # Construct standard Kotak subscription string
+                instruments.append((normalized_symbol, f"{scrip['exchangeSegment']}|{scrip['instrumentToken']}"))
 
         # 2. Add to local subscriber sets (use the original requested symbol or normalized one as key)
         # Note: For direct tokens, we use the token string as the key
-        
-        if normalized_symbol not in self.subscriptions:
-            # 3. ENFORCE HSM LIMITS (PHASE 2 MANDATORY)
-            if len(self.subscriptions) >= self.MAX_INSTRUMENTS:
-                logger.warning(f"Rejected HSM subscription: reason=MAX_INSTRUMENTS_REACHED, limit={self.MAX_INSTRUMENTS}, symbol={symbol}")
-                await websocket.send_json({"type": "error", "message": "Global HSM subscription limit reached"})
-                return
-
-            self.subscriptions[normalized_symbol] = set()
-            
-            # 4. Trigger HSM subscription
-            if not subscription_string.endswith("&"):
-                subscription_string += "&"
-                
+        if instruments:
+            await self._subscribe_instruments(websocket, instruments)
+
+    async def subscribe_chain(self, websocket: WebSocket, underlying: str, expiry: str = None,
+                              spot: float = None, strikes: int = None):
+        """Subscribe a client to every leg of an option chain with a single HSM request."""
+        chain = await scrip_master.get_option_chain_async(underlying, expiry=expiry, spot=spot, strikes=strikes)
+        if not chain:
+            logger.warning(f"Rejected chain subscription: reason=UNKNOWN_CHAIN, underlying={underlying}, expiry={expiry}")
+            await websocket.send_json({"type": "error", "message": f"Option chain not found: {underlying}"})
+            return
+
+        segment = chain["exchangeSegment"]
+        instruments = [
+            (leg["symbol"], f"{segment}|{leg['token']}")
+            for row in chain["strikes"]
+            for leg in (row["CE"], row["PE"])
+            if leg
+        ]
+        await self._subscribe_instruments(websocket, instruments)
+        await websocket.send_json({"type": "chain", "data": chain})
+
+    async def _subscribe_instruments(self, websocket: WebSocket, instruments: List[tuple]):
+        """
+        Register client for (symbol, subscription_string) pairs.
+        Instruments not yet streamed are sent to HSM in one subscribe packet.
+        """
+        new_scrips = []
+        for symbol, subscription_string in instruments:
+            if symbol not in self.subscriptions:
+                # ENFORCE HSM LIMITS (PHASE 2 MANDATORY)
+                if len(self.subscriptions) >= self.MAX_INSTRUMENTS:
+                    logger.warning(f"Rejected HSM subscription: reason=MAX_INSTRUMENTS_REACHED, limit={self.MAX_INSTRUMENTS}, symbol={symbol}")
+                    await websocket.send_json({"type": "error", "message": "Global HSM subscription limit reached"})
+                    break
+
+                self.subscriptions[symbol] = set()
+                new_scrips.append(subscription_string.rstrip("&"))
+
+            self.subscriptions[symbol].add(websocket)
+
+        # Trigger HSM subscription
+        if new_scrips:
             if kotak_hsm.connected:
-                await kotak_hsm.subscribe(subscription_string)
+                await kotak_hsm.subscribe("&".join(new_scrips) + "&")
             else:
-                logger.warning(f"HSM not connected. Queuing subscription for {normalized_symbol}")
-        
-        self.subscriptions[normalized_symbol].add(websocket)
-        logger.info(f"Client subscribed to {normalized_symbol}. Active instruments: {len(self.subscriptions)}")
+                logger.warning(f"HSM not connected. Queuing subscription for {len(new_scrips)} instruments")
+
+        logger.info(f"Client subscribed to {len(instruments)} instrument(s). Active instruments: {len(self.subscriptions)}")
+
+    async def subscribe_feed(self, instruments: List[tuple]):
+        """
+        Set the (symbol, subscription_string) pairs streamed for backend
+        consumers, which read ticks through kotak_hsm callbacks. Pass the
+        full current set: symbols no longer in it are released unless a
+        client still streams them. They count towards the HSM limit and are
+        resubscribed after reconnects like client symbols.
+        """
+        await self._init_hsm()
+        wanted = dict(instruments)
+        for symbol in self.feed_symbols - wanted.keys():
+            self.feed_symbols.discard(symbol)
+            if not self.subscriptions.get(symbol):
+                self.subscriptions.pop(symbol, None)
+
+        new_scrips, rejected = [], 0
+        for symbol, subscription_string in wanted.items():
+            if symbol not in self.subscriptions:
+                if len(self.subscriptions) >= self.MAX_INSTRUMENTS:
+                    rejected += 1
+                    continue
+                self.subscriptions[symbol] = set()
+                new_scrips.append(subscription_string.rstrip("&"))
+            self.feed_symbols.add(symbol)
+
+        if rejected:
+            logger.warning(f"Rejected HSM subscription: reason=MAX_INSTRUMENTS_REACHED, limit={self.MAX_INSTRUMENTS}, symbols={rejected}")
+        if new_scrips and kotak_hsm.connected:
+            await kotak_hsm.subscribe("&".join(new_scrips) + "&")
+        logger.info(f"Backend feed: {len(self.feed_symbols)} instrument(s), {len(new_scrips)} new. Active instruments: {len(self.subscriptions)}")
 
     async def broadcast_tick(self, tick: dict):
         """Relay standardized tick to all interested clients."""
@@ -143,16 +222,33 @@ class ConnectionManager:
             for dead in dead_links:
                 self.disconnect(dead)
 
+    async def broadcast_all(self, message: dict):
+        """Send a non-tick message (e.g. order updates) to every connected client."""
+        text = json.dumps(message)
+        dead_links = []
+        for ws in list(self.active_connections):
+            try:
+                await ws.send_text(text)
+            except Exception:
+                dead_links.append(ws)
+        
+        for dead in dead_links:
+            self.disconnect(dead)
+
     async def resubscribe_all(self):
         """Resubscribe to all active symbols (e.g. after HSM reconnect)."""
         logger.info(f"🔄 Resubscribing to {len(self.subscriptions)} symbols after HSM reconnect...")
-        for symbol in self.subscriptions:
-            scrip = scrip_master.get_scrip(symbol)
-            if scrip:
-                sub_str = f"{scrip['exchangeSegment']}|{scrip['instrumentToken']}&"
-                if kotak_hsm.connected:
-                    await kotak_hsm.subscribe(sub_str)
-        logger.info("✅ Resubscription complete.")
+        symbols = list(self.subscriptions)
+        direct = [s for s in symbols if "|" in s]
+        named = [s for s in symbols if "|" not in s]
+
+        scrips = await scrip_master.get_scrips_by_symbols_async(named)
+        sub_strs = direct + [f"{scrip['exchangeSegment']}|{scrip['instrumentToken']}" for scrip in scrips if scrip]
+
+        # One subscribe packet for the whole set instead of one per symbol
+        if sub_strs and kotak_hsm.connected:
+            await kotak_hsm.subscribe("&".join(sub_strs) + "&")
+        logger.info(f"✅ Resubscription complete ({len(sub_strs)} instruments).")
 
 manager = ConnectionManager()
 # Register callback for auto-resubscription
@@ -176,8 +272,16 @@ async def market_data_websocket(websocket: WebSocket):
                     symbols = [symbols]
 
                 if action == "subscribe":
-                    for sym in symbols:
-                        await manager.subscribe_client(websocket, str(sym))
+                    await manager.subscribe_symbols(websocket, [str(sym) for sym in symbols])
+                
+                elif action == "subscribe_chain":
+                    await manager.subscribe_chain(
+                        websocket,
+                        str(msg.get("underlying", "")),
+                        expiry=msg.get("expiry"),
+                        spot=float(msg["spot"]) if msg.get("spot") else None,
+                        strikes=int(msg["strikes"]) if msg.get("strikes") else None
+                    )
                 
                 elif action == "unsubscribe":
                     # Local cleanup (HSM aggregation remains for other clients)
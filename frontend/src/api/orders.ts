@@ -43,12 +43,30 @@ export const ordersAPI = {
         return response.data;
     },
 
+    /**
+     * GET /orders/history
+     * One page of order history (newest first; pass next_cursor for the next page)
+     */
+    getOrderHistory: async (params?: { limit?: number; cursor?: string; status?: string; symbol?: string; product?: string; days?: number }): Promise<any> => {
+        const response = await apiClient.get('/orders/history', { params });
+        return response.data;
+    },
+
     /**
      * GET /orders/trade-book
-     * Fetch executed trades
+     * Fetch executed trades (newest first; pass next_cursor for the next page)
+     */
+    getTradeBook: async (params?: { limit?: number; cursor?: string; symbol?: string; order_id?: string; product?: string }): Promise<any> => {
+        const response = await apiClient.get('/orders/trade-book', { params });
+        return response.data;
+    },
+
+    /**
+     * GET /orders/fills/stats
+     * Per-symbol fill stats and realized P&L
      */
-    getTradeBook: async (): Promise<any> => {
-        const response = await apiClient.get('/orders/trade-book');
+    getFillStats: async (days: number = 30, symbol?: string): Promise<any> => {
+        const response = await apiClient.get('/orders/fills/stats', { params: { days, symbol } });
         return response.data;
     },
 };
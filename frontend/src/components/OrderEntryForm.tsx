@@ -107,7 +107,8 @@ export const OrderEntryForm: React.FC<OrderEntryProps> = ({ symbol, scrip, onOrd
             alert("Order placed successfully!");
             if (onOrderPlaced) onOrderPlaced();
         } catch (error: any) {
-            alert(`Order failed: ${error.response?.data?.detail || error.message}`);
+            const detail = error.response?.data?.detail;
+            alert(`Order failed: ${detail?.message || detail || error.message}`);
         }
     };
 
@@ -63,7 +63,8 @@ export const OrderForm: React.FC<OrderFormProps> = ({ symbol, onOrderPlaced, ini
             onOrderPlaced?.();
         } catch (error: any) {
             console.error('Order failed', error);
-            alert(`Order Failed: ${error.response?.data?.detail || error.message}`);
+            const detail = error.response?.data?.detail;
+            alert(`Order Failed: ${detail?.message || detail || error.message}`);
         } finally {
             setLoading(false);
         }
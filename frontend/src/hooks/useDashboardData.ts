@@ -30,16 +30,15 @@ export const useDashboardData = () => {
             try {
                 // Fetch fresh data (including holdings for portfolio value calculation)
                 const results = await Promise.allSettled([
-                    portfolioService.getLimits(),
-                    portfolioService.getPositions(),
-                    portfolioService.getHoldings(),
+                    portfolioService.getSnapshot(),
                     orderService.getOrderBook(1)
                 ]);
 
-                const limits = results[0].status === 'fulfilled' ? results[0].value : {};
-                const positions = results[1].status === 'fulfilled' ? results[1].value : { data: [] };
-                const holdings = results[2].status === 'fulfilled' ? results[2].value : { data: [] };
-                const orderBook = results[3].status === 'fulfilled' ? results[3].value : { data: [] };
+                const snapshot = results[0].status === 'fulfilled' ? results[0].value : null;
+                const limits = snapshot?.limits ?? {};
+                const positions = snapshot?.positions ?? { data: [] };
+                const holdings = snapshot?.holdings ?? { data: [] };
+                const orderBook = results[1].status === 'fulfilled' ? results[1].value : { data: [] };
 
                 if (isMounted) {
                     const newData = { limits, positions, holdings };
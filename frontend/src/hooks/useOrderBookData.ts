@@ -1,10 +1,12 @@
 import { useState, useEffect, useCallback } from 'react';
 import { orderService } from '../services/orderService';
+import { wsService } from '../services/websocket';
 
 // Module-level cache
 let orderBookCache: {
     data: any[];
     timestamp: number;
+    version?: number;
 } | null = null;
 
 /**
@@ -47,6 +49,12 @@ export const useOrderBookData = () => {
 
         try {
             const response = await orderService.getOrderBook();
+
+            // Unchanged order book (the backend answers these polls with 304) - nothing to re-render
+            if (response.version !== undefined && response.version === orderBookCache?.version) {
+                return;
+            }
+
             const rawOrders = response.data || [];
 
             // CRITICAL: Normalize all orders
@@ -59,7 +67,8 @@ export const useOrderBookData = () => {
 
             orderBookCache = {
                 data: normalizedOrders,
-                timestamp: Date.now()
+                timestamp: Date.now(),
+                version: response.version
             };
         } catch (error) {
             console.error('Failed to fetch orders', error);
@@ -74,7 +83,12 @@ export const useOrderBookData = () => {
         fetchOrders();
 
         const interval = setInterval(() => fetchOrders(false), 5000);
-        return () => clearInterval(interval);
+        // Refresh immediately when the backend reports an order status change
+        const unsubscribe = wsService.subscribeOrderUpdates(() => fetchOrders(false));
+        return () => {
+            clearInterval(interval);
+            unsubscribe();
+        };
     }, [fetchOrders]);
 
     const refresh = () => fetchOrders(true);
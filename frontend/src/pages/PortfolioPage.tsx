@@ -4,6 +4,7 @@ import { StatCard } from '../components/ui/StatCard';
 import { Table, TableRow, TableCell } from '../components/ui/Table';
 import { Button } from '../components/ui/Button';
 import { portfolioService } from '../services/portfolioService';
+import { wsService, PortfolioUpdate } from '../services/websocket';
 import { formatCurrency } from '../utils/formatters';
 import { Activity, Briefcase, Calculator, Wallet, Layers } from 'lucide-react';
 
@@ -14,12 +15,16 @@ const PortfolioPage: React.FC = () => {
 
     const fetchData = async () => {
         try {
-            const [positions, holdings, limits] = await Promise.all([
-                portfolioService.getPositions(),
-                portfolioService.getHoldings(),
-                portfolioService.getLimits()
-            ]);
-            setData({ positions, holdings, limits });
+            const snapshot = await portfolioService.getSnapshot();
+            if (Object.keys(snapshot.errors).length) {
+                console.warn('Portfolio snapshot partially failed', snapshot.errors);
+            }
+            // Keep the last good section when one fails
+            setData((prev: any) => ({
+                positions: snapshot.positions ?? prev?.positions,
+                holdings: snapshot.holdings ?? prev?.holdings,
+                limits: snapshot.limits ?? prev?.limits,
+            }));
         } catch (error) {
             console.error('Failed to fetch portfolio', error);
         } finally {
@@ -33,6 +38,31 @@ const PortfolioPage: React.FC = () => {
         return () => clearInterval(interval);
     }, []);
 
+    // Merge live valuation deltas pushed by the backend between fetches
+    useEffect(() => {
+        wsService.connect().catch(() => { /* falls back to polling */ });
+        return wsService.subscribePortfolioUpdates((update: PortfolioUpdate) => {
+            setData((prev: any) => {
+                if (!prev) return prev;
+                const byId = new Map(update.rows.map(row => [row.rowId, row]));
+                const positions = (prev.positions?.data || []).map((pos: any) => {
+                    const row = byId.get(pos.rowId);
+                    return row ? { ...pos, ltp: row.ltp, urmtom: row.unrealized, dayChange: row.dayChange } : pos;
+                });
+                const holdings = (prev.holdings?.data || []).map((hold: any) => {
+                    const row = byId.get(hold.rowId);
+                    return row ? { ...hold, ltp: row.ltp, mktValue: row.value, pnl: row.unrealized, dayPnl: row.dayChange } : hold;
+                });
+                const { position, holding } = update.totals;
+                return {
+                    ...prev,
+                    positions: { ...prev.positions, data: positions, totalMtm: position.unrealized + position.realized },
+                    holdings: { ...prev.holdings, data: holdings, totalDayGain: holding.dayChange },
+                };
+            });
+        });
+    }, []);
+
     const mtm = parseFloat(data?.positions?.totalMtm) || 0;
     const dayGain = parseFloat(data?.holdings?.totalDayGain) || 0;
 
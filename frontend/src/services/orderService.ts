@@ -8,6 +8,12 @@ export const orderService = {
         return response.data;
     },
 
+    // Place Basket (legs validated together, sent concurrently)
+    placeBasket: async (orders: any[]): Promise<any> => {
+        const response = await apiClient.post('/orders/basket', { orders });
+        return response.data;
+    },
+
     // Fetch Order Book
     getOrderBook: async (days: number = 3): Promise<OrderBookResponse> => {
         const response = await apiClient.get(`/orders/order-book?days=${days}`);
@@ -3,7 +3,34 @@ import type { PortfolioResponse, Position, Holding, Limits } from '../types/port
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
+// NORMALIZE: Kotak limits PascalCase → camelCase
+const normalizeLimits = (raw: any): Limits => ({
+    stat: raw.stat || 'Ok',
+    netCash: raw.Net ?? '0',                    // Available funds
+    marginUsed: raw.MarginUsed ?? '0',          // Currently used margin
+    collateralValue: raw.Collateral ?? '0',     // CORRECTED: Use Collateral (pledged shares) not CollateralValue
+    notionalCash: raw.NotionalCash ?? '0',      // Total cash (may be 0)
+    category: raw.Category
+});
+
+// One combined response; a failed section is null with its reason in errors
+export interface PortfolioSnapshot {
+    stat: 'Ok' | 'Partial' | 'Not_Ok';
+    positions: PortfolioResponse<Position> | null;
+    holdings: PortfolioResponse<Holding> | null;
+    limits: Limits | null;
+    errors: Partial<Record<'positions' | 'holdings' | 'limits', string>>;
+    latency_ms: Record<string, number>;
+}
+
 export const portfolioService = {
+    // Positions, holdings and limits fetched concurrently by the backend
+    getSnapshot: async (): Promise<PortfolioSnapshot> => {
+        const response = await axios.get(`${API_URL}/portfolio/snapshot`);
+        const raw = response.data;
+        return { ...raw, limits: raw.limits ? normalizeLimits(raw.limits) : null };
+    },
+
     // Get Positions (Day/Net)
     getPositions: async (): Promise<PortfolioResponse<Position>> => {
         const response = await axios.get(`${API_URL}/portfolio/positions`);
@@ -25,15 +52,7 @@ export const portfolioService = {
         // LOG: Raw API response for debugging
         console.log('[LIMITS API] Raw Kotak Response:', raw);
 
-        // NORMALIZE: PascalCase → camelCase
-        const normalized: Limits = {
-            stat: raw.stat || 'Ok',
-            netCash: raw.Net ?? '0',                    // Available funds
-            marginUsed: raw.MarginUsed ?? '0',          // Currently used margin
-            collateralValue: raw.Collateral ?? '0',     // CORRECTED: Use Collateral (pledged shares) not CollateralValue
-            notionalCash: raw.NotionalCash ?? '0',      // Total cash (may be 0)
-            category: raw.Category
-        };
+        const normalized = normalizeLimits(raw);
 
         // LOG: Normalized data sent to UI
         console.log('[LIMITS API] Normalized for UI:', normalized);
@@ -19,6 +19,42 @@ interface QuoteData {
 
 type QuoteCallback = (quote: QuoteData) => void;
 
+export interface OrderUpdate {
+    order_number: string;
+    trading_symbol?: string;
+    status: string;
+    message?: string;
+    filled_quantity?: string;
+    average_price?: string;
+    updated_at: string;
+}
+
+type OrderUpdateCallback = (update: OrderUpdate) => void;
+
+// Changed rows of the backend live portfolio (rowId matches the REST rows)
+export interface PortfolioRowUpdate {
+    rowId: string;
+    kind: 'position' | 'holding';
+    ltp: number;
+    unrealized: number;
+    dayChange: number;
+    exposure: number;
+    value: number;
+}
+
+export interface PortfolioUpdate {
+    rows: PortfolioRowUpdate[];
+    totals: Record<'position' | 'holding', {
+        unrealized: number;
+        realized: number;
+        dayChange: number;
+        exposure: number;
+        value: number;
+    }>;
+}
+
+type PortfolioUpdateCallback = (update: PortfolioUpdate) => void;
+
 class WebSocketService {
     private ws: WebSocket | null = null;
     private subscriptions: Map<string, Set<QuoteCallback>> = new Map();
@@ -29,6 +65,8 @@ class WebSocketService {
     private connected = false;
     private connectingPromise: Promise<void> | null = null;
     private tickCount: Map<string, number> = new Map(); // Track ticks per symbol
+    private orderUpdateCallbacks: Set<OrderUpdateCallback> = new Set();
+    private portfolioUpdateCallbacks: Set<PortfolioUpdateCallback> = new Set();
 
     constructor() {
         // Auto-connect on initialization
@@ -76,6 +114,30 @@ class WebSocketService {
                             return;
                         }
 
+                        // Order status transitions pushed by the backend order tracker
+                        if (data.type === 'order_update') {
+                            this.orderUpdateCallbacks.forEach(callback => {
+                                try {
+                                    callback(data.data);
+                                } catch (error) {
+                                    console.error('Error in order update callback:', error);
+                                }
+                            });
+                            return;
+                        }
+
+                        // Live portfolio valuation deltas
+                        if (data.type === 'portfolio_update') {
+                            this.portfolioUpdateCallbacks.forEach(callback => {
+                                try {
+                                    callback(data.data);
+                                } catch (error) {
+                                    console.error('Error in portfolio update callback:', error);
+                                }
+                            });
+                            return;
+                        }
+
                         // Handle tick data with COMPREHENSIVE LOGGING
                         if (data.symbol) {
                             const tickNum = (this.tickCount.get(data.symbol) || 0) + 1;
@@ -195,6 +257,20 @@ class WebSocketService {
         };
     }
 
+    subscribeOrderUpdates(callback: OrderUpdateCallback): () => void {
+        this.orderUpdateCallbacks.add(callback);
+        return () => {
+            this.orderUpdateCallbacks.delete(callback);
+        };
+    }
+
+    subscribePortfolioUpdates(callback: PortfolioUpdateCallback): () => void {
+        this.portfolioUpdateCallbacks.add(callback);
+        return () => {
+            this.portfolioUpdateCallbacks.delete(callback);
+        };
+    }
+
     private handleQuoteUpdate(data: QuoteData) {
         const callbacks = this.subscriptions.get(data.symbol);
 
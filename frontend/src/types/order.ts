@@ -43,4 +43,7 @@ export interface ModifyOrderRequest {
 export interface OrderBookResponse {
     stat: string;
     data: Order[];
+    version?: number; // order state store version (unchanged => same orders)
+    boot?: number; // backend boot the version belongs to
+    full?: boolean;
 }
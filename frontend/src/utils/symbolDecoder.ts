@@ -41,20 +41,49 @@ function formatExpiry(isoDate: string | null): string {
     }
 }
 
+// Symbols waiting for the next batch lookup / currently being looked up
+const pendingSymbols = new Set<string>();
+const inFlightSymbols = new Set<string>();
+let flushTimer: ReturnType<typeof setTimeout> | null = null;
+
 /**
- * Pre-fetch scrip data for symbol
+ * Fetch scrip data for many symbols with one batch request
  */
-async function fetchScrip(symbol: string): Promise<any> {
+async function fetchScrips(symbols: string[]): Promise<void> {
+    if (symbols.length === 0) return;
+    symbols.forEach(s => inFlightSymbols.add(s));
     try {
         const API = (import.meta.env.VITE_API_URL || 'http://localhost:8000').replace(/\/$/, '');
-        const response = await fetch(`${API}/scripmaster/scrip/${symbol}`);
+        const response = await fetch(`${API}/scripmaster/scrips/batch`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ symbols })
+        });
         const json = await response.json();
         if (json.stat === 'Ok' && json.data) {
-            scripCache.set(symbol, json.data);
-            return json.data;
+            symbols.forEach((symbol, i) => {
+                const scrip = json.data.symbols[i];
+                if (scrip) scripCache.set(symbol, scrip);
+            });
         }
     } catch { }
-    return null;
+    symbols.forEach(s => inFlightSymbols.delete(s));
+}
+
+/**
+ * Queue a symbol for the next batch lookup (rows rendered together share one request)
+ */
+function queueFetch(symbol: string): void {
+    if (scripCache.has(symbol) || inFlightSymbols.has(symbol)) return;
+    pendingSymbols.add(symbol);
+    if (flushTimer === null) {
+        flushTimer = setTimeout(() => {
+            flushTimer = null;
+            const batch = Array.from(pendingSymbols);
+            pendingSymbols.clear();
+            fetchScrips(batch);
+        }, 10);
+    }
 }
 
 /**
@@ -78,7 +107,7 @@ export function parseSymbol(symbol: string, providedScrip?: any): ParsedInstrume
 
     if (!scrip) {
         // Not in cache - fetch async in background
-        fetchScrip(s);
+        queueFetch(s);
 
         // Return raw symbol as UNVERIFIED
         return {
@@ -153,6 +182,6 @@ export function parseSymbol(symbol: string, providedScrip?: any): ParsedInstrume
  * Prefetch scrips for all order symbols
  */
 export async function prefetchSymbols(symbols: string[]): Promise<void> {
-    const uniqueSymbols = Array.from(new Set(symbols));
-    await Promise.all(uniqueSymbols.map(s => fetchScrip(s)));
+    const uniqueSymbols = Array.from(new Set(symbols)).filter(s => !scripCache.has(s));
+    await fetchScrips(uniqueSymbols);
 }